@@ -0,0 +1,230 @@
+"""
+Cold-start benchmark of the ragaai_catalyst package.
+
+Measures, each in a fresh interpreter:
+  - the import time and resident memory of every submodule,
+  - the import and construction time of RagaAICatalyst, Tracer and SyntheticDataGeneration,
+    against a local StubCatalystServer.
+
+Results are written as JSON, and a previous result file can be passed with --compare to print
+the change of every measurement.
+
+Usage:
+    python benchmarks/bench_cold_start.py [--repeat N] [--output results.json] [--compare old.json]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+MODULES = [
+    "ragaai_catalyst",
+    "ragaai_catalyst.ragaai_catalyst",
+    "ragaai_catalyst.transport",
+    "ragaai_catalyst.dataset",
+    "ragaai_catalyst.evaluation",
+    "ragaai_catalyst.experiment",
+    "ragaai_catalyst.prompt_manager",
+    "ragaai_catalyst.guardrails_manager",
+    "ragaai_catalyst.guard_executor",
+    "ragaai_catalyst.synthetic_data_generation",
+    "ragaai_catalyst.tracers.tracer",
+]
+
+CONSTRUCTORS = ["RagaAICatalyst", "Tracer", "SyntheticDataGeneration"]
+
+PROJECT_NAME = "stub-project"
+DATASET_NAME = "stub-dataset"
+
+
+def _rss_kb():
+    """The resident memory of this process in KiB."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    import resource
+
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Peak rather than current memory; bytes on macOS, KiB elsewhere
+    return maxrss // 1024 if sys.platform == "darwin" else maxrss
+
+
+def _child_import(module):
+    rss_before = _rss_kb()
+    start = time.perf_counter()
+    __import__(module)
+    elapsed = time.perf_counter() - start
+    return {"import_s": elapsed, "rss_kb": _rss_kb(), "rss_delta_kb": _rss_kb() - rss_before}
+
+
+def _child_construct(name, base_url):
+    start = time.perf_counter()
+    import ragaai_catalyst
+
+    cls = getattr(ragaai_catalyst, name)
+    import_s = time.perf_counter() - start
+
+    if name != "RagaAICatalyst":
+        # The other clients need an authenticated session, which is measured on its own
+        ragaai_catalyst.RagaAICatalyst(
+            access_key="stub-access-key", secret_key="stub-secret-key", base_url=base_url
+        )
+
+    start = time.perf_counter()
+    if name == "RagaAICatalyst":
+        cls(access_key="stub-access-key", secret_key="stub-secret-key", base_url=base_url)
+    elif name == "Tracer":
+        cls(
+            project_name=PROJECT_NAME,
+            dataset_name=DATASET_NAME,
+            tracer_type="langchain",
+            spool_dir=tempfile.mkdtemp(prefix="bench_cold_start_"),
+        )
+    else:
+        cls()
+    construct_s = time.perf_counter() - start
+    return {"import_s": import_s, "construct_s": construct_s, "rss_kb": _rss_kb()}
+
+
+def _run_child(args):
+    """Run a measurement in a fresh interpreter and return its result."""
+    env = dict(os.environ)
+    # Do not pick up credentials or a warm cache of the calling environment
+    for var in ("RAGAAI_CATALYST_TOKEN", "RAGAAI_CATALYST_RESOLUTION_CACHE"):
+        env.pop(var, None)
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", *args],
+        capture_output=True,
+        text=True,
+        env=env,
+    )
+    if result.returncode != 0:
+        return {"error": (result.stderr.strip().splitlines() or ["unknown error"])[-1]}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def _summarize(samples):
+    if any("error" in sample for sample in samples):
+        return {"error": next(s["error"] for s in samples if "error" in s)}
+    summary = {}
+    for key in samples[0]:
+        values = [sample[key] for sample in samples]
+        summary[key] = statistics.median(values)
+        if key.endswith("_s"):
+            summary[key.replace("_s", "_min_s")] = min(values)
+    return summary
+
+
+def _version():
+    try:
+        from importlib.metadata import version
+
+        return version("ragaai_catalyst")
+    except Exception:
+        return "unknown"
+
+
+def run(repeat):
+    # Imported here, the measurements run in fresh interpreters that must not import it early
+    from ragaai_catalyst.stub_server import StubCatalystServer
+
+    results = {
+        "meta": {
+            "package_version": _version(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "repeat": repeat,
+        },
+        "imports": {},
+        "constructors": {},
+    }
+    for module in MODULES:
+        results["imports"][module] = _summarize(
+            [_run_child(["import", module]) for _ in range(repeat)]
+        )
+    with StubCatalystServer(
+        projects={PROJECT_NAME: 1}, datasets={DATASET_NAME: 1}
+    ) as server:
+        for name in CONSTRUCTORS:
+            results["constructors"][name] = _summarize(
+                [_run_child(["construct", name, server.base_url]) for _ in range(repeat)]
+            )
+    return results
+
+
+def _flatten(results):
+    flat = {}
+    for section in ("imports", "constructors"):
+        for name, measurements in results.get(section, {}).items():
+            for key, value in measurements.items():
+                if key != "error":
+                    flat[f"{section}/{name}/{key}"] = value
+    return flat
+
+
+def compare(old, new):
+    old_flat, new_flat = _flatten(old), _flatten(new)
+    print(f"{'measurement':70} {'old':>10} {'new':>10} {'change':>8}")
+    for key in sorted(set(old_flat) & set(new_flat)):
+        before, after = old_flat[key], new_flat[key]
+        change = f"{(after - before) / before:+.0%}" if before else "n/a"
+        print(f"{key:70} {before:10.4g} {after:10.4g} {change:>8}")
+
+
+def print_results(results):
+    print(f"{'module':45} {'import ms':>10} {'RSS MiB':>8}")
+    for module, summary in results["imports"].items():
+        if "error" in summary:
+            print(f"{module:45} error: {summary['error']}")
+            continue
+        print(f"{module:45} {summary['import_s'] * 1000:10.1f} {summary['rss_kb'] / 1024:8.1f}")
+    print()
+    print(f"{'constructor':45} {'import ms':>10} {'init ms':>8} {'RSS MiB':>8}")
+    for name, summary in results["constructors"].items():
+        if "error" in summary:
+            print(f"{name:45} error: {summary['error']}")
+            continue
+        print(
+            f"{name:45} {summary['import_s'] * 1000:10.1f} "
+            f"{summary['construct_s'] * 1000:8.1f} {summary['rss_kb'] / 1024:8.1f}"
+        )
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        kind, *args = sys.argv[2:]
+        result = _child_import(*args) if kind == "import" else _child_construct(*args)
+        print(json.dumps(result))
+        return
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="fresh interpreters per measurement, the median is reported")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--compare", help="a previous JSON result file to compare against")
+    args = parser.parse_args()
+
+    results = run(args.repeat)
+    print_results(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            print()
+            compare(json.load(f), results)
+
+
+if __name__ == "__main__":
+    main()
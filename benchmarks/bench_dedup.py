@@ -0,0 +1,98 @@
+"""
+Benchmark of question deduplication as batches arrive during QnA generation.
+
+Generates batches of questions from templates, where some questions are exact repeats and some
+are rewordings of earlier ones, and compares the previous deduplication (isin on the questions
+kept so far, concat and drop_duplicates per batch) with DedupIndex, in time and in duplicates
+caught.
+
+Usage:
+    python benchmarks/bench_dedup.py [--questions N] [--batch-size N] [--repeat-rate R] [--reword-rate R]
+"""
+import argparse
+import random
+import time
+
+import pandas as pd
+
+from ragaai_catalyst.dedup import DedupIndex, SIMILARITY_THRESHOLD
+
+SUBJECTS = ["capital", "population", "currency", "largest city", "official language", "highest mountain"]
+SYLLABLES = ["ka", "lo", "mi", "ren", "tu", "vas", "bor", "nel", "qui", "sha", "dor", "fen", "gri", "hal", "jun"]
+FORMS = ["What is the {} of {}?", "What's the {} of {}?", "what is the {} of {}", "Tell me the {} of {}."]
+
+
+def make_batches(num_questions, batch_size, repeat_rate, reword_rate, seed=0):
+    """Return batches of questions, and the number of distinct (subject, place) pairs asked."""
+    rng = random.Random(seed)
+    asked = []
+    asked_set = set()
+    questions = []
+    while len(questions) < num_questions:
+        draw = rng.random()
+        if asked and draw < repeat_rate:
+            questions.append(rng.choice(questions))
+        elif asked and draw < repeat_rate + reword_rate:
+            subject, place = rng.choice(asked)
+            questions.append(rng.choice(FORMS[1:]).format(subject, place))
+        else:
+            place = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(3, 5))).title()
+            subject = rng.choice(SUBJECTS)
+            if (subject, place) in asked_set:
+                continue
+            asked_set.add((subject, place))
+            asked.append((subject, place))
+            questions.append(FORMS[0].format(subject, place))
+    batches = [
+        pd.DataFrame({"Question": questions[start:start + batch_size], "Answer": "a"})
+        for start in range(0, num_questions, batch_size)
+    ]
+    return batches, len(asked)
+
+
+def legacy_dedup(batches):
+    result_df = pd.DataFrame(columns=["Question", "Answer"])
+    for batch_df in batches:
+        new_questions = batch_df[~batch_df["Question"].isin(result_df["Question"])]
+        if not new_questions.empty:
+            result_df = pd.concat([result_df, new_questions], ignore_index=True)
+            result_df = result_df.drop_duplicates(subset=["Question"])
+    return len(result_df)
+
+
+def index_dedup(batches, threshold):
+    index = DedupIndex(threshold=threshold)
+    kept = 0
+    for batch_df in batches:
+        for record in batch_df.to_dict("records"):
+            kept += index.add(record["Question"])
+    return kept
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--questions", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=5)
+    parser.add_argument("--repeat-rate", type=float, default=0.1, help="fraction of exact repeats")
+    parser.add_argument("--reword-rate", type=float, default=0.2, help="fraction of rewordings")
+    args = parser.parse_args()
+
+    batches, distinct = make_batches(args.questions, args.batch_size, args.repeat_rate, args.reword_rate)
+    print(f"{args.questions} questions in batches of {args.batch_size}, {distinct} distinct")
+    for name, function, extra in [
+        ("isin + drop_duplicates", legacy_dedup, ()),
+        ("DedupIndex, exact", index_dedup, (None,)),
+        ("DedupIndex, near", index_dedup, (SIMILARITY_THRESHOLD,)),
+    ]:
+        kept, elapsed = timed(function, batches, *extra)
+        print(f"{name:24} kept {kept:7d} ({kept - distinct:+6d})  {elapsed:8.2f} s")
+
+
+if __name__ == "__main__":
+    main()
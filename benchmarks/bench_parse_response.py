@@ -0,0 +1,111 @@
+"""
+Benchmark of Experiment.parse_response on a synthetic experiment result.
+
+Builds a response with the given number of rows and metrics, checks that parse_response
+returns the same frame as the previous, column-by-column implementation, and reports the
+time of both.
+
+Usage:
+    python benchmarks/bench_parse_response.py [--rows N] [--metrics N] [--repeat N]
+"""
+import argparse
+import random
+import timeit
+
+import pandas as pd
+
+from ragaai_catalyst.experiment import Experiment
+
+
+def make_response(num_rows, num_metrics, seed=0):
+    rng = random.Random(seed)
+    columns = [
+        {"columnName": "prompt", "displayName": "prompt"},
+        {"columnName": "response", "displayName": "response"},
+        {"columnName": "trace_uri", "displayName": "trace_uri"},
+    ]
+    metric_names = [f"metric_{i}" for i in range(num_metrics)]
+    for name in metric_names:
+        columns.append({"columnName": f"{name}_id", "displayName": f"{name}_reason"})
+    docs = []
+    for row in range(num_rows):
+        doc = {
+            "prompt": f"question {row}",
+            "response": f"answer {row}",
+            "trace_uri": f"s3://bucket/{row}.json",
+            "score": rng.random(),
+        }
+        for name in metric_names:
+            if rng.random() < 0.05:
+                continue  # A metric that was not computed for this row
+            doc[f"{name}_id"] = {
+                "reason": f"reason {row}",
+                "metric_config": {"threshold": {"gte": 0.5}, "model": "gpt-4o-mini"},
+                "status": rng.choice(["Passed", "Failed"]),
+                "score": rng.random(),
+            }
+        docs.append(doc)
+    return {"data": {"docs": docs, "columns": columns}}
+
+
+def legacy_parse_response(response):
+    """The column-by-column implementation that parse_response replaced."""
+    x = pd.DataFrame(response["data"]["docs"])
+    column_names_to_replace = [
+        {item["columnName"]: item["displayName"]}
+        for item in response["data"]["columns"]
+    ]
+    if column_names_to_replace:
+        for item in column_names_to_replace:
+            x = x.rename(columns=item)
+        dict_cols = [
+            col
+            for col in x.columns
+            if x[col].dtype == "object"
+            and x[col].apply(lambda y: isinstance(y, dict)).any()
+        ]
+        for dict_col in dict_cols:
+            x[f"{dict_col}_reason"] = x[dict_col].apply(
+                lambda y: y.get("reason") if isinstance(y, dict) else None
+            )
+            x[f"{dict_col}_metric_config"] = x[dict_col].apply(
+                lambda y: y.get("metric_config") if isinstance(y, dict) else None
+            )
+            x[f"{dict_col}_status"] = x[dict_col].apply(
+                lambda y: y.get("status") if isinstance(y, dict) else None
+            )
+            x = x.drop(columns=[dict_col])
+    x.columns = x.columns.str.replace("_reason_reason", "_reason")
+    x.columns = x.columns.str.replace("_reason_metric_config", "_metric_config")
+    x.columns = x.columns.str.replace("_reason_status", "_status")
+    columns_list = list(set(x.columns.tolist()) - {"trace_uri"})
+    return x[columns_list]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--metrics", type=int, default=24)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    response = make_response(args.rows, args.metrics)
+    # parse_response does not use the state of the experiment
+    experiment = Experiment.__new__(Experiment)
+
+    success, parsed = experiment.parse_response(response)
+    assert success
+    expected = legacy_parse_response(response)
+    pd.testing.assert_frame_equal(
+        parsed[sorted(parsed.columns)], expected[sorted(expected.columns)]
+    )
+
+    legacy = min(timeit.repeat(lambda: legacy_parse_response(response), number=1, repeat=args.repeat))
+    current = min(timeit.repeat(lambda: experiment.parse_response(response), number=1, repeat=args.repeat))
+    print(f"{args.rows} rows, {args.metrics} metrics, {parsed.shape[1]} result columns")
+    print(f"column by column: {legacy * 1000:8.1f} ms")
+    print(f"single build:     {current * 1000:8.1f} ms  ({legacy / current:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark of PDF text extraction on a generated text PDF.
+
+Writes a PDF with the given number of pages of text, checks that extract_pdf_text returns the
+same text as the previous page-by-page implementation, and reports the time of the previous
+implementation, of extract_pdf_text with 1 and with N worker processes, and of a cached read.
+
+Usage:
+    python benchmarks/bench_pdf_extraction.py [--pages N] [--lines N] [--workers N]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import PyPDF2
+
+from ragaai_catalyst.pdf_extraction import extract_pdf_text
+
+
+def write_text_pdf(path, num_pages, lines_per_page):
+    """Write a PDF whose pages hold lines of Helvetica text."""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # The page tree, once the page objects are numbered
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_ids = []
+    for page in range(num_pages):
+        lines = [f"BT /F1 9 Tf 40 {800 - 11 * line} Td (Page {page} line {line}: the quick brown fox "
+                 f"jumps over the lazy dog {page * lines_per_page + line}) Tj ET"
+                 for line in range(lines_per_page)]
+        stream = "\n".join(lines).encode()
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects)
+        )
+        page_ids.append(len(objects))
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, num_pages)
+
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(f.tell())
+            f.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+        xref = f.tell()
+        f.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+        for offset in offsets:
+            f.write(b"%010d 00000 n \n" % offset)
+        f.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+
+
+def legacy_read_pdf(file_path):
+    """The page-by-page implementation that extract_pdf_text replaced."""
+    text = ""
+    with open(file_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        for page in pdf_reader.pages:
+            text += page.extract_text()
+    return text
+
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, default=1000)
+    parser.add_argument("--lines", type=int, default=60, help="lines of text per page")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "manual.pdf")
+        write_text_pdf(path, args.pages, args.lines)
+        cache_dir = os.path.join(directory, "cache")
+
+        expected, legacy = timed(legacy_read_pdf, path)
+        print(f"{args.pages} pages, {os.path.getsize(path) / 1e6:.1f} MB, {len(expected)} characters")
+        print(f"page by page:       {legacy:8.2f} s")
+        for workers in sorted({1, args.workers}):
+            text, elapsed = timed(extract_pdf_text, path, max_workers=workers)
+            assert text == expected
+            print(f"{workers:2d} worker(s):       {elapsed:8.2f} s  ({legacy / elapsed:.1f}x)")
+
+        extract_pdf_text(path, max_workers=args.workers, cache_dir=cache_dir)
+        text, elapsed = timed(extract_pdf_text, path, cache_dir=cache_dir)
+        assert text == expected
+        print(f"cached:             {elapsed:8.2f} s  ({legacy / elapsed:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Microbenchmark of the per-span serialization done by FileSpanExporter.
+
+Compares the previous round trip, `json.dumps(json.loads(span.to_json()))`, with converting the
+span to a dictionary directly and serializing it once, and checks both produce the same content.
+
+Usage:
+    python benchmarks/bench_span_serializer.py [--spans N]
+"""
+import argparse
+import json
+import timeit
+
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SpanExporter, SimpleSpanProcessor
+
+from ragaai_catalyst.tracers.utils import serializer
+
+
+class _CollectingExporter(SpanExporter):
+    def __init__(self):
+        self.spans = []
+
+    def export(self, spans):
+        self.spans.extend(spans)
+
+
+def _make_spans(count):
+    exporter = _CollectingExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    tracer = provider.get_tracer("bench")
+    for i in range(count):
+        with tracer.start_as_current_span("llm") as span:
+            span.set_attribute("llm.request.model", "gpt-4o-mini")
+            span.set_attribute("llm.prompts.0.content", "What is the capital of France? " * 20)
+            span.set_attribute("llm.usage.total_tokens", 120 + i)
+            span.set_attribute("llm.request.stop", ["\n", "###"])
+            span.add_event("token", {"index": i})
+    return exporter.spans
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--spans", type=int, default=2000)
+    args = parser.parse_args()
+    spans = _make_spans(args.spans)
+
+    for span in spans:
+        # Attribute sequences are tuples in the dictionary, so compare the serialized content
+        assert json.loads(serializer.dumps(serializer.span_to_dict(span))) == json.loads(
+            span.to_json()
+        )
+
+    round_trip = timeit.timeit(
+        lambda: [json.dumps(json.loads(span.to_json())) for span in spans], number=1
+    )
+    direct = timeit.timeit(
+        lambda: [serializer.dumps(serializer.span_to_dict(span)) for span in spans],
+        number=1,
+    )
+    print(f"spans:                     {args.spans}")
+    print(f"orjson installed:          {serializer.orjson is not None}")
+    print(f"to_json round trip:        {round_trip / args.spans * 1e6:.1f} us/span")
+    print(f"span_to_dict + dumps:      {direct / args.spans * 1e6:.1f} us/span")
+    print(f"speedup:                   {round_trip / direct:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Throughput benchmark of the trace upload and guardrail paths against a local stub server.
+
+Runs RagaExporter.check_and_upload_files and GuardExecutor.execute_deployment against a
+StubCatalystServer with injected latency and errors, so the results depend only on the SDK and
+the configured server behaviour, not on the network.
+
+Usage:
+    python benchmarks/bench_stub_throughput.py [--files N] [--file-kb KB] [--calls N]
+        [--latency-ms MS [MS ...]] [--error-rate RATE] [--concurrency N] [--workers N]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ragaai_catalyst import RagaAICatalyst, transport
+from ragaai_catalyst.stub_server import StubCatalystServer
+
+PROJECT_NAME = "stub-project"
+DATASET_NAME = "stub-dataset"
+DEPLOYMENT_ID = 1
+
+
+def _write_trace_files(directory, num_files, file_kb):
+    os.makedirs(os.path.join(directory, "backup"), exist_ok=True)
+    span = {"name": "llm", "attributes": {"prompt": "x" * 900}}
+    spans = [span] * max(1, file_kb)
+    paths = []
+    for i in range(num_files):
+        path = os.path.join(directory, f"trace_{i}.json")
+        with open(path, "w") as f:
+            json.dump(spans, f)
+        paths.append(path)
+    return paths
+
+
+def bench_upload(server, num_files, file_kb, concurrency):
+    from ragaai_catalyst.tracers.exporters.raga_exporter import RagaExporter
+
+    exporter = RagaExporter(
+        project_name=PROJECT_NAME, dataset_name=DATASET_NAME, max_concurrency=concurrency
+    )
+
+    async def upload(paths):
+        session = transport.get_async_session()
+        try:
+            return await exporter.check_and_upload_files(session=session, file_paths=paths)
+        finally:
+            await transport.close_async_session()
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = _write_trace_files(directory, num_files, file_kb)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = asyncio.run(upload(paths))
+        elapsed = time.perf_counter() - start
+    succeeded = sum(1 for result in (results or {}).values() if result["success"])
+    return elapsed, succeeded
+
+
+def bench_guardrail(server, num_calls, workers):
+    from ragaai_catalyst import GuardExecutor, GuardrailsManager
+
+    manager = GuardrailsManager(project_name=PROJECT_NAME)
+    executor = GuardExecutor(DEPLOYMENT_ID, manager, field_map={"context": "document"})
+    payload = {"prompt": "What is the capital of France?", "context": "Paris", "response": "Paris"}
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(lambda _: executor.execute_deployment(payload), range(num_calls)))
+    elapsed = time.perf_counter() - start
+    return elapsed, sum(1 for result in results if result is not None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=200, help="trace files per upload run")
+    parser.add_argument("--file-kb", type=int, default=64, help="approximate size of a trace file")
+    parser.add_argument("--calls", type=int, default=500, help="guardrail calls per run")
+    parser.add_argument("--latency-ms", type=float, nargs="+", default=[0, 10, 50],
+                        help="server latencies to run with")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="fraction of requests the server fails")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent trace uploads")
+    parser.add_argument("--workers", type=int, default=8, help="threads calling the guardrail")
+    args = parser.parse_args()
+
+    with StubCatalystServer(
+        projects={PROJECT_NAME: 1}, datasets={DATASET_NAME: 1}, seed=0
+    ) as server:
+        server.add_deployment(DEPLOYMENT_ID)
+        with contextlib.redirect_stdout(io.StringIO()):
+            RagaAICatalyst(access_key="stub-access-key", secret_key="stub-secret-key",
+                           base_url=server.base_url)
+
+        print(f"{'path':10} {'latency ms':>10} {'ops':>6} {'ok':>6} {'seconds':>8} {'ops/s':>8}")
+        for latency_ms in args.latency_ms:
+            server.inject(r".*", latency=latency_ms / 1000, error_rate=args.error_rate)
+            # The token is not part of the measured paths
+            server.inject(r"/token", latency=0.0)
+
+            elapsed, ok = bench_upload(server, args.files, args.file_kb, args.concurrency)
+            print(f"{'upload':10} {latency_ms:10g} {args.files:6d} {ok:6d} "
+                  f"{elapsed:8.2f} {args.files / elapsed:8.1f}")
+
+            try:
+                elapsed, ok = bench_guardrail(server, args.calls, args.workers)
+            except ImportError as e:
+                print(f"{'guardrail':10} skipped: {e}")
+                continue
+            print(f"{'guardrail':10} {latency_ms:10g} {args.calls:6d} {ok:6d} "
+                  f"{elapsed:8.2f} {args.calls / elapsed:8.1f}")
+
+        requests_served = sum(server.request_counts.values())
+        print(f"\n{requests_served} requests served, {len(server.uploads)} files uploaded")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Microbenchmark of the unique keys computed by FileSpanExporter on every export.
+
+Exports the same spans repeatedly with a fixed metadata and pipeline and reports how many
+times the metadata and pipeline were hashed, and how long an export takes with and without
+the unique key cache.
+
+Usage:
+    python benchmarks/bench_unique_key.py [--exports N]
+"""
+import argparse
+import tempfile
+import timeit
+from unittest import mock
+
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SpanExporter, SimpleSpanProcessor
+
+from ragaai_catalyst.tracers.exporters import file_span_exporter
+from ragaai_catalyst.tracers.exporters.trace_spool import TraceSpool
+from ragaai_catalyst.tracers.utils import utils
+
+
+class _CollectingExporter(SpanExporter):
+    def __init__(self):
+        self.spans = []
+
+    def export(self, spans):
+        self.spans.extend(spans)
+
+
+def _make_spans():
+    exporter = _CollectingExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    tracer = provider.get_tracer("bench")
+    with tracer.start_as_current_span("chain"):
+        with tracer.start_as_current_span("llm"):
+            pass
+    return exporter.spans
+
+
+def _make_exporter():
+    metadata = {
+        "log_source": "langchain_tracer",
+        "recorded_on": "2024-01-01 00:00:00",
+        **{f"key{i}": f"Value {i}" for i in range(20)},
+    }
+    pipeline = {
+        "llm_model": "gpt-4o-mini",
+        "vector_store": "faiss",
+        "embed_model": "text-embedding-ada-002",
+    }
+    exporter = file_span_exporter.FileSpanExporter(
+        project_name="bench",
+        metadata=metadata,
+        pipeline=pipeline,
+        storage_mode="jsonl",
+        spool=TraceSpool(tempfile.mkdtemp()),
+    )
+    return exporter, metadata, pipeline
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--exports", type=int, default=2000)
+    args = parser.parse_args()
+
+    spans = _make_spans()
+    exporter, metadata, pipeline = _make_exporter()
+
+    # Count how often the metadata and pipeline themselves are hashed
+    hashed = {"metadata": 0, "pipeline": 0}
+    original = utils.get_unique_key
+
+    def counting_get_unique_key(input_data):
+        if isinstance(input_data, dict):
+            if "log_source" in input_data:
+                hashed["metadata"] += 1
+            elif "llm_model" in input_data:
+                hashed["pipeline"] += 1
+        return original(input_data)
+
+    with mock.patch.object(utils, "get_unique_key", counting_get_unique_key):
+        for _ in range(args.exports):
+            exporter.export(spans)
+    print(f"exports:                   {args.exports}")
+    print(f"metadata hashed:           {hashed['metadata']}")
+    print(f"pipeline hashed:           {hashed['pipeline']}")
+
+    cached = timeit.timeit(
+        lambda: file_span_exporter.get_cached_unique_key(metadata, exclude_keys=("id",)),
+        number=args.exports,
+    )
+    uncached = timeit.timeit(
+        lambda: utils.get_unique_key(
+            {k: v for k, v in metadata.items() if k != "id"}
+        ),
+        number=args.exports,
+    )
+    print(f"metadata key, cached:      {cached / args.exports * 1e6:.2f} us")
+    print(f"metadata key, uncached:    {uncached / args.exports * 1e6:.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,45 @@
-from .experiment import Experiment
-from .ragaai_catalyst import RagaAICatalyst
-from .tracers import Tracer
-from .utils import response_checker
-from .dataset import Dataset
-from .prompt_manager import PromptManager
-from .evaluation import Evaluation
-from .synthetic_data_generation import SyntheticDataGeneration
-from .guardrails_manager import GuardrailsManager
-from .guard_executor import GuardExecutor
+import importlib
+from typing import TYPE_CHECKING
+
+# The public classes are imported on first access, so that importing the package does not
+# import the heavy dependencies (OpenTelemetry, pandas, LLM clients) of the classes left unused.
+_LAZY_ATTRIBUTES = {
+    "Experiment": ".experiment",
+    "RagaAICatalyst": ".ragaai_catalyst",
+    "Tracer": ".tracers",
+    "response_checker": ".utils",
+    "Dataset": ".dataset",
+    "PromptManager": ".prompt_manager",
+    "Evaluation": ".evaluation",
+    "SyntheticDataGeneration": ".synthetic_data_generation",
+    "GuardrailsManager": ".guardrails_manager",
+    "GuardExecutor": ".guard_executor",
+}
+
+if TYPE_CHECKING:
+    from .experiment import Experiment
+    from .ragaai_catalyst import RagaAICatalyst
+    from .tracers import Tracer
+    from .utils import response_checker
+    from .dataset import Dataset
+    from .prompt_manager import PromptManager
+    from .evaluation import Evaluation
+    from .synthetic_data_generation import SyntheticDataGeneration
+    from .guardrails_manager import GuardrailsManager
+    from .guard_executor import GuardExecutor
+
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
 
 
 __all__ = ["Experiment", "RagaAICatalyst", "Tracer", "PromptManager", "Evaluation","SyntheticDataGeneration", "GuardrailsManager"]
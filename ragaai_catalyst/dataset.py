@@ -1,5 +1,8 @@
 import os
 import requests
+from . import transport
+from .token_manager import token_manager
+from .resolution_cache import resolution_cache
 from .utils import response_checker
 from typing import Union
 import logging
@@ -22,32 +25,13 @@ class Dataset:
             if os.getenv("RAGAAI_CATALYST_BASE_URL")
             else "https://catalyst.raga.ai/api"
         )
-        headers = {
-            "Authorization": f'Bearer {os.getenv("RAGAAI_CATALYST_TOKEN")}',
-        }
         try:
-            response = requests.get(
-                f"{Dataset.BASE_URL}/v2/llm/projects?size={self.num_projects}",
-                headers=headers,
-                timeout=self.TIMEOUT,
-            )
-            response.raise_for_status()
-            logger.debug("Projects list retrieved successfully")
-            
-            project_list = [
-                project["name"] for project in response.json()["data"]["content"]
-            ]
-
-            if project_name not in project_list:
-                raise ValueError("Project not found. Please enter a valid project name")
-
-            self.project_id = [
-                project["id"] for project in response.json()["data"]["content"] if project["name"] == project_name
-            ][0]
-
+            self.project_id = resolution_cache.get_project_id(Dataset.BASE_URL, project_name)
         except requests.exceptions.RequestException as e:
             logger.error(f"Failed to retrieve projects list: {e}")
             raise
+        if self.project_id is None:
+            raise ValueError("Project not found. Please enter a valid project name")
 
     def list_datasets(self):
         """
@@ -63,12 +47,12 @@ class Dataset:
         def make_request():
             headers = {
                 'Content-Type': 'application/json',
-                "Authorization": f"Bearer {os.getenv('RAGAAI_CATALYST_TOKEN')}",
+                "Authorization": f"Bearer {token_manager.get_token()}",
                 "X-Project-Id": str(self.project_id),
             }
             json_data = {"size": 12, "page": "0", "projectId": str(self.project_id), "search": ""}
             try:
-                response = requests.post(
+                response = transport.post(
                     f"{Dataset.BASE_URL}/v2/llm/dataset",
                     headers=headers,
                     json=json_data,
@@ -100,11 +84,11 @@ class Dataset:
 
     def get_schema_mapping(self):
         headers = {
-            "Authorization": f"Bearer {os.getenv('RAGAAI_CATALYST_TOKEN')}",
+            "Authorization": f"Bearer {token_manager.get_token()}",
             "X-Project-Name": self.project_name,
         }
         try:
-            response = requests.get(
+            response = transport.get(
                 f"{Dataset.BASE_URL}/v1/llm/schema-elements",
                 headers=headers,
                 timeout=Dataset.TIMEOUT,
@@ -126,17 +110,17 @@ class Dataset:
             raise ValueError(f"Dataset {dataset_name} does not exists. Please enter a valid dataset name")
 
         headers = {
-            "Authorization": f"Bearer {os.getenv('RAGAAI_CATALYST_TOKEN')}",
+            "Authorization": f"Bearer {token_manager.get_token()}",
             "X-Project-Name": self.project_name,
         }
         headers = {
                 'Content-Type': 'application/json',
-                "Authorization": f"Bearer {os.getenv('RAGAAI_CATALYST_TOKEN')}",
+                "Authorization": f"Bearer {token_manager.get_token()}",
                 "X-Project-Id": str(self.project_id),
             }
         json_data = {"size": 12, "page": "0", "projectId": str(self.project_id), "search": ""}
         try:
-            response = requests.post(
+            response = transport.post(
                 f"{Dataset.BASE_URL}/v2/llm/dataset",
                 headers=headers,
                 json=json_data,
@@ -150,7 +134,7 @@ class Dataset:
             raise
 
         try:
-            response = requests.get(
+            response = transport.get(
                 f"{Dataset.BASE_URL}/v2/llm/dataset/{dataset_id}?initialCols=0",
                 headers=headers,
                 timeout=Dataset.TIMEOUT,
@@ -174,11 +158,11 @@ class Dataset:
         #### get presigned URL
         def get_presignedUrl():
             headers = {
-                "Authorization": f"Bearer {os.getenv('RAGAAI_CATALYST_TOKEN')}",
+                "Authorization": f"Bearer {token_manager.get_token()}",
                 "X-Project-Id": str(self.project_id),
             }
             try:
-                response = requests.get(
+                response = transport.get(
                     f"{Dataset.BASE_URL}/v2/llm/dataset/csv/presigned-url",
                     headers=headers,
                     timeout=Dataset.TIMEOUT,
@@ -209,7 +193,7 @@ class Dataset:
             }
             try:
                 with open(csv_path, 'rb') as file:
-                    response = requests.put(
+                    response = transport.put(
                         url,
                         headers=headers,
                         data=file,
@@ -236,11 +220,11 @@ class Dataset:
         def upload_csv_to_elastic(data):
             header = {
                 'Content-Type': 'application/json',
-                'Authorization': f"Bearer {os.getenv('RAGAAI_CATALYST_TOKEN')}",
+                'Authorization': f"Bearer {token_manager.get_token()}",
                 "X-Project-Id": str(self.project_id)
             }
             try:
-                response = requests.post(
+                response = transport.post(
                     f"{Dataset.BASE_URL}/v2/llm/dataset/csv",
                     headers=header,
                     json=data,
@@ -274,6 +258,7 @@ class Dataset:
             if not upload_csv_response['success']:
                 raise ValueError('Unable to upload csv')
             else:
+                resolution_cache.invalidate(project_id=self.project_id)
                 print(upload_csv_response['message'])
         except Exception as e:
             logger.error(f"Error in create_from_csv: {e}")
@@ -0,0 +1,146 @@
+import re
+import hashlib
+import logging
+import unicodedata
+from collections import defaultdict
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# The prime modulus of the MinHash permutations
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+# Words left out of the comparison of questions. Question words that change what is asked,
+# like "who", "when" or "why", are kept.
+STOPWORDS = frozenset("""
+    a about an and are as at be been being by can could did do does for from give had has have in
+    into is it its me name of on or please tell that the their there these this those to was were
+    what whats which will with would
+""".split())
+
+# The default Jaccard similarity of content words from which two texts are near duplicates.
+# Conservative, so that long texts differing in one entity are kept
+SIMILARITY_THRESHOLD = 0.9
+
+
+def normalize_text(text):
+    """Normalize text for duplicate detection: Unicode compatibility forms, case, punctuation and whitespace."""
+    text = unicodedata.normalize("NFKC", str(text)).casefold()
+    text = re.sub(r"[^\w\s]", "", text)
+    return " ".join(text.split())
+
+
+def _hash(value):
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "little")
+
+
+class DedupIndex:
+    """
+    An incremental index of texts that detects exact duplicates, after normalization, and near
+    duplicates, such as paraphrases, as texts are added.
+
+    Near duplicates are found with MinHash signatures of the content words of the texts, without
+    STOPWORDS, and locality-sensitive hashing: the signature is split into bands, and only texts
+    sharing a band are compared, by the Jaccard similarity of their words. Texts with different
+    numbers, e.g. years or amounts, are never near duplicates. Adding and looking up a text are
+    O(1) amortized in the number of texts.
+    """
+
+    def __init__(self, threshold=SIMILARITY_THRESHOLD, num_perm=120, bands=20, seed=0):
+        """
+        Initializes the DedupIndex.
+
+        Args:
+            threshold (float, optional): The Jaccard similarity of content words from which two
+                texts are near duplicates. None detects exact duplicates only. Defaults to
+                SIMILARITY_THRESHOLD, 0.9, which catches rewordings like "Tell me the capital
+                of France." after "What is the capital of France?", but not questions about
+                another entity like "What is the capital of Spain?", even in a long question.
+            num_perm (int, optional): The number of MinHash permutations. Defaults to 120.
+            bands (int, optional): The number of LSH bands, which must divide `num_perm`. With the
+                defaults, texts of 0.7 similarity share a band with a probability of 92% (over
+                99.9% at 0.9), and texts below 0.4 with a probability under 9%. Defaults to 20.
+            seed (int, optional): The seed of the permutations. Defaults to 0.
+
+        Returns:
+            None
+        """
+        if num_perm % bands:
+            raise ValueError("bands must divide num_perm.")
+        self.threshold = threshold
+        self.bands = bands
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, _MAX_HASH, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, _MAX_HASH, size=num_perm, dtype=np.uint64)
+        self._exact = set()
+        self._words = []
+        self._buckets = [defaultdict(list) for _ in range(bands)]
+
+    def __len__(self):
+        return len(self._exact)
+
+    @staticmethod
+    def _word_hashes(normalized):
+        words = normalized.split()
+        content_words = [word for word in words if word not in STOPWORDS] or words or [""]
+        return {_hash(word) & _MAX_HASH for word in content_words}
+
+    @staticmethod
+    def _numbers(normalized):
+        return frozenset(word for word in normalized.split() if any(c.isdigit() for c in word))
+
+    def _band_keys(self, words):
+        values = np.fromiter(words, dtype=np.uint64, count=len(words))
+        # (a * x + b) mod p, with a, b, x < 2^32 so that a * x + b fits in 64 bits
+        signature = ((np.outer(self._a, values) + self._b[:, None]) % _MERSENNE_PRIME).min(axis=1)
+        return [band.tobytes() for band in np.split(signature, self.bands)]
+
+    def _near_duplicate(self, words, numbers, band_keys):
+        checked = set()
+        for buckets, key in zip(self._buckets, band_keys):
+            for candidate in buckets.get(key, ()):
+                if candidate in checked:
+                    continue
+                checked.add(candidate)
+                other, other_numbers = self._words[candidate]
+                if numbers != other_numbers:
+                    continue
+                if len(words & other) >= self.threshold * len(words | other):
+                    return True
+        return False
+
+    def add(self, text):
+        """
+        Add a text to the index, unless it duplicates a text already added.
+
+        Returns:
+            bool: True if the text was added, False if it is a duplicate.
+        """
+        normalized = normalize_text(text)
+        digest = hashlib.blake2b(normalized.encode(), digest_size=16).digest()
+        if digest in self._exact:
+            return False
+        if self.threshold is not None:
+            words = self._word_hashes(normalized)
+            numbers = self._numbers(normalized)
+            band_keys = self._band_keys(words)
+            if self._near_duplicate(words, numbers, band_keys):
+                return False
+            text_id = len(self._words)
+            self._words.append((words, numbers))
+            for buckets, key in zip(self._buckets, band_keys):
+                buckets[key].append(text_id)
+        self._exact.add(digest)
+        return True
+
+    def is_duplicate(self, text):
+        """Return whether a text duplicates a text of the index, without adding it."""
+        normalized = normalize_text(text)
+        if hashlib.blake2b(normalized.encode(), digest_size=16).digest() in self._exact:
+            return True
+        if self.threshold is None:
+            return False
+        words = self._word_hashes(normalized)
+        return self._near_duplicate(words, self._numbers(normalized), self._band_keys(words))
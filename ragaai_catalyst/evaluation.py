@@ -1,13 +1,28 @@
-import os
 import requests
+from . import transport
+from .token_manager import token_manager
+from .resolution_cache import resolution_cache
+from .job_status import (
+    COMPLETED,
+    JobFailedError,
+    async_wait_for_jobs,
+    fetch_job_statuses,
+    wait_for_jobs,
+)
 import pandas as pd
 import io
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from .ragaai_catalyst import RagaAICatalyst
 import logging
 import pdb
 
 logger = logging.getLogger(__name__)
 
+# The datasets listed for bulk submissions, enough for every dataset of a project
+NUM_BULK_DATASETS = 99999
+
 class Evaluation:
 
     def __init__(self, project_name, dataset_name):
@@ -19,66 +34,31 @@ class Evaluation:
         self.num_projects=99999
 
         try:
-            response = requests.get(
-                f"{self.base_url}/v2/llm/projects?size={self.num_projects}",
-                headers={
-                    "Authorization": f'Bearer {os.getenv("RAGAAI_CATALYST_TOKEN")}',
-                },
-                timeout=self.timeout,
-            )
-            response.raise_for_status()
-            logger.debug("Projects list retrieved successfully")
-
-            project_list = [
-                project["name"] for project in response.json()["data"]["content"]
-            ]
-            if project_name not in project_list:
-                raise ValueError("Project not found. Please enter a valid project name")
-            
-            self.project_id = [
-                project["id"] for project in response.json()["data"]["content"] if project["name"] == project_name
-            ][0]
-
+            self.project_id = resolution_cache.get_project_id(self.base_url, project_name)
         except requests.exceptions.RequestException as e:
             logger.error(f"Failed to retrieve projects list: {e}")
             raise
+        if self.project_id is None:
+            raise ValueError("Project not found. Please enter a valid project name")
 
         try:
-
-            headers = {
-                'Content-Type': 'application/json',
-                "Authorization": f"Bearer {os.getenv('RAGAAI_CATALYST_TOKEN')}",
-                "X-Project-Id": str(self.project_id),
-            }
-            json_data = {"size": 12, "page": "0", "projectId": str(self.project_id), "search": ""}
-            response = requests.post(
-                f"{self.base_url}/v2/llm/dataset",
-                headers=headers,
-                json=json_data,
-                timeout=self.timeout,
+            self.dataset_id = resolution_cache.get_dataset_id(
+                self.base_url, self.project_id, dataset_name
             )
-            
-            response.raise_for_status()
-            datasets_content = response.json()["data"]["content"]
-            dataset_list = [dataset["name"] for dataset in datasets_content]
-
-            if dataset_name not in dataset_list:
-                raise ValueError("Dataset not found. Please enter a valid dataset name")
-                
-            self.dataset_id = [dataset["id"] for dataset in datasets_content if dataset["name"]==dataset_name][0]
-
         except requests.exceptions.RequestException as e:
             logger.error(f"Failed to retrieve dataset list: {e}")
             raise
+        if self.dataset_id is None:
+            raise ValueError("Dataset not found. Please enter a valid dataset name")
 
     
     def list_metrics(self):
         headers = {
-            "Authorization": f"Bearer {os.getenv('RAGAAI_CATALYST_TOKEN')}",
+            "Authorization": f"Bearer {token_manager.get_token()}",
             'X-Project-Id': str(self.project_id),
         }
         try:
-            response = requests.get(
+            response = transport.get(
                 f'{self.base_url}/v1/llm/llm-metrics', 
                 headers=headers,
                 timeout=self.timeout)
@@ -101,11 +81,11 @@ class Evaluation:
         try:
             headers = {
                 'Content-Type': 'application/json',
-                "Authorization": f"Bearer {os.getenv('RAGAAI_CATALYST_TOKEN')}",
+                "Authorization": f"Bearer {token_manager.get_token()}",
                 "X-Project-Id": str(self.project_id),
             }
             json_data = {"size": 12, "page": "0", "projectId": str(self.project_id), "search": ""}
-            response = requests.post(
+            response = transport.post(
                 f"{self.base_url}/v2/llm/dataset",
                 headers=headers,
                 json=json_data,
@@ -130,7 +110,7 @@ class Evaluation:
         self.dataset_id=data_set_id
 
         headers = {
-            "Authorization": f"Bearer {os.getenv('RAGAAI_CATALYST_TOKEN')}",
+            "Authorization": f"Bearer {token_manager.get_token()}",
             'Content-Type': 'application/json',
             'X-Project-Id': str(self.project_id),
         }
@@ -140,7 +120,7 @@ class Evaluation:
             "rowFilterList": []
         }
         try:
-            response = requests.post(
+            response = transport.post(
                 f'{self.base_url}/v1/llm/docs', 
                 headers=headers,
                 json=data,
@@ -164,13 +144,19 @@ class Evaluation:
     def _get_variablename_from_user_schema_mapping(self, schemaName, metric_name, schema_mapping, metric_to_evaluate):
         user_dataset_schema = self._get_dataset_schema(metric_to_evaluate)
         user_dataset_columns = [item["displayName"] for item in user_dataset_schema]
+        return self._find_variablename(
+            schemaName, metric_name, schema_mapping, user_dataset_columns, self.dataset_name
+        )
+
+    @staticmethod
+    def _find_variablename(schemaName, metric_name, schema_mapping, user_dataset_columns, dataset_name):
         variableName = None
         for key, val in schema_mapping.items():
             if "".join(val.split("_")).lower()==schemaName:
                 if key in user_dataset_columns:
                     variableName=key
                 else:
-                    raise ValueError(f"Column '{key}' is not present in '{self.dataset_name}' dataset")
+                    raise ValueError(f"Column '{key}' is not present in '{dataset_name}' dataset")
         if variableName:
             return variableName
         else:
@@ -184,12 +170,7 @@ class Evaluation:
             if schema["name"]==metric_name:
                 requiredFields = schema["config"]["requiredFields"]
 
-                #this is added to check if "Chat" column is required for metric evaluation
-                required_variables = [_["name"].lower() for _ in requiredFields]
-                if "chat" in required_variables:
-                    metric_to_evaluate = "chat"
-                else:
-                    metric_to_evaluate = "prompt"
+                metric_to_evaluate = self._get_metric_to_evaluate(requiredFields)
 
                 for field in requiredFields:
                     schemaName = field["name"]
@@ -197,6 +178,14 @@ class Evaluation:
                     mapping.append({"schemaName": schemaName, "variableName": variableName})
         return mapping
 
+    @staticmethod
+    def _get_metric_to_evaluate(requiredFields):
+        #this is added to check if "Chat" column is required for metric evaluation
+        required_variables = [_["name"].lower() for _ in requiredFields]
+        if "chat" in required_variables:
+            return "chat"
+        return "prompt"
+
     def _get_metricParams(self):
         return {
                 "metricSpec": {
@@ -217,11 +206,11 @@ class Evaluation:
     
     def _get_metrics_schema_response(self):
         headers = {
-            "Authorization": f"Bearer {os.getenv('RAGAAI_CATALYST_TOKEN')}",
+            "Authorization": f"Bearer {token_manager.get_token()}",
             'X-Project-Id': str(self.project_id),
         }
         try:
-            response = requests.get(
+            response = transport.get(
                 f'{self.base_url}/v1/llm/llm-metrics', 
                 headers=headers,
                 timeout=self.timeout)
@@ -240,33 +229,37 @@ class Evaluation:
             logger.error(f"An unexpected error occurred: {e}")
             return []
 
-    def _update_base_json(self, metrics):
-        metrics_schema_response = self._get_metrics_schema_response()
+    def _get_metric_base_json(self, metric):
         sub_providers = ["openai","azure","gemini","groq"]
-        metricParams = []
-        for metric in metrics:
-            base_json = self._get_metricParams()
-            base_json["metricSpec"]["name"] = metric["name"]
-            
-            #pasing model configuration
-            for key, value in metric["config"].items():
-                #checking if provider is one of the allowed providers
-                if key.lower()=="provider" and value.lower() not in sub_providers:
-                    raise ValueError("Enter a valid provider name. The following Provider names are supported: OpenAI, Azure, Gemini, Groq")
-    
-                if key.lower()=="threshold":
-                    if len(value)>1:
-                        raise ValueError("'threshold' can only take one argument gte/lte/eq")
-                    else:
-                        for key_thres, value_thres in value.items():
-                            base_json["metricSpec"]["config"]["params"][key] = {f"{key_thres}":value_thres}
+        base_json = self._get_metricParams()
+        base_json["metricSpec"]["name"] = metric["name"]
+        
+        #pasing model configuration
+        for key, value in metric["config"].items():
+            #checking if provider is one of the allowed providers
+            if key.lower()=="provider" and value.lower() not in sub_providers:
+                raise ValueError("Enter a valid provider name. The following Provider names are supported: OpenAI, Azure, Gemini, Groq")
+
+            if key.lower()=="threshold":
+                if len(value)>1:
+                    raise ValueError("'threshold' can only take one argument gte/lte/eq")
                 else:
-                    base_json["metricSpec"]["config"]["params"][key] = {"value": value}
+                    for key_thres, value_thres in value.items():
+                        base_json["metricSpec"]["config"]["params"][key] = {f"{key_thres}":value_thres}
+            else:
+                base_json["metricSpec"]["config"]["params"][key] = {"value": value}
 
 
-            # if metric["config"]["model"]:
-            #     base_json["metricSpec"]["config"]["params"]["model"]["value"] = metric["config"]["model"]
-            base_json["metricSpec"]["displayName"] = metric["column_name"]
+        # if metric["config"]["model"]:
+        #     base_json["metricSpec"]["config"]["params"]["model"]["value"] = metric["config"]["model"]
+        base_json["metricSpec"]["displayName"] = metric["column_name"]
+        return base_json
+
+    def _update_base_json(self, metrics):
+        metrics_schema_response = self._get_metrics_schema_response()
+        metricParams = []
+        for metric in metrics:
+            base_json = self._get_metric_base_json(metric)
             mappings = self._get_mapping(metric["name"], metrics_schema_response, metric["schema_mapping"])
             base_json["metricSpec"]["config"]["mappings"] = mappings
             metricParams.append(base_json)
@@ -276,11 +269,11 @@ class Evaluation:
 
     def _get_executed_metrics_list(self):
         headers = {
-            "Authorization": f"Bearer {os.getenv('RAGAAI_CATALYST_TOKEN')}",
+            "Authorization": f"Bearer {token_manager.get_token()}",
             'X-Project-Id': str(self.project_id),
         }
         try:
-            response = requests.get(
+            response = transport.get(
                 f"{self.base_url}/v2/llm/dataset/{str(self.dataset_id)}?initialCols=0",
                 headers=headers,
                 timeout=self.timeout,
@@ -324,12 +317,12 @@ class Evaluation:
 
         headers = {
             'Content-Type': 'application/json',
-            "Authorization": f"Bearer {os.getenv('RAGAAI_CATALYST_TOKEN')}",
+            "Authorization": f"Bearer {token_manager.get_token()}",
             'X-Project-Id': str(self.project_id),
         }
         metric_schema_mapping = self._update_base_json(metrics)
         try:
-            response = requests.post(
+            response = transport.post(
                 f'{self.base_url}/playground/metric-evaluation', 
                 headers=headers, 
                 json=metric_schema_mapping,
@@ -353,14 +346,171 @@ class Evaluation:
         except Exception as e:
             logger.error(f"An unexpected error occurred: {e}")
 
+    def _bulk_request(self, method, path, **kwargs):
+        headers = {
+            'Content-Type': 'application/json',
+            'X-Project-Id': str(self.project_id),
+        }
+        token = token_manager.get_token()
+        for attempt in range(2):
+            response = transport.request(
+                method, f"{self.base_url}{path}", headers=dict(headers, Authorization=f"Bearer {token}"),
+                timeout=self.timeout, **kwargs
+            )
+            if response.status_code != 401 or attempt:
+                break
+            # Workers that got a 401 with the same token share one refresh
+            token = token_manager.refresh(stale_token=token)
+        if response.status_code == 400:
+            raise ValueError(response.json()["message"])
+        response.raise_for_status()
+        return response.json()
+
+    def _get_bulk_dataset_columns(self, dataset_id):
+        data = {"datasetId": str(dataset_id), "fields": [], "rowFilterList": []}
+        columns = self._bulk_request("POST", "/v1/llm/docs", json=data)["data"]["columns"]
+        return [item["displayName"] for item in columns]
+
+    def _get_bulk_executed_metrics(self, dataset_id):
+        response = self._bulk_request("GET", f"/v2/llm/dataset/{dataset_id}?initialCols=0")
+        dataset_columns = [item["displayName"] for item in response["data"]["datasetColumnsResponses"]]
+        return [data for data in dataset_columns if not data.startswith('_')]
+
+    def add_metrics_bulk(self, submissions, max_workers=8):
+        """
+        Add metrics to many datasets of the project at once.
+
+        The metric schemas and the dataset list are fetched once for all submissions, the schema
+        and the existing columns of every dataset once per dataset, and the submissions are sent
+        concurrently. All submissions are validated before any is sent.
+
+        Args:
+            submissions (list): (dataset_name, metrics) pairs, with `metrics` as in `add_metrics`.
+            max_workers (int, optional): The maximum number of concurrent requests. Defaults to 8.
+
+        Returns:
+            list: The job ID of every submission, in the order of `submissions`, or None for a
+                submission that failed.
+
+        Raises:
+            ValueError: If a dataset, metric or column of a submission is invalid.
+            requests.exceptions.RequestException: If the shared schemas could not be fetched.
+        """
+        submissions = [(dataset_name, list(metrics)) for dataset_name, metrics in submissions]
+        required_keys = {"name", "config", "column_name", "schema_mapping"}
+        for _, metrics in submissions:
+            for metric in metrics:
+                missing_keys = required_keys - metric.keys()
+                if missing_keys:
+                    raise ValueError(f"{missing_keys} required for each metric evaluation.")
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            metrics_future = executor.submit(self._bulk_request, "GET", "/v1/llm/llm-metrics")
+            datasets_future = executor.submit(
+                self._bulk_request,
+                "POST",
+                "/v2/llm/dataset",
+                json={"size": NUM_BULK_DATASETS, "page": "0", "projectId": str(self.project_id), "search": ""},
+            )
+            metrics_schema = metrics_future.result()["data"]["metrics"]
+            datasets = {
+                dataset["name"]: dataset
+                for dataset in datasets_future.result()["data"]["content"]
+            }
+            metric_names = {metric["name"] for metric in metrics_schema}
+            required_fields = {
+                metric["name"]: metric["config"]["requiredFields"] for metric in metrics_schema
+            }
+
+            # The dataset a metric runs on depends on whether it evaluates prompts or chats
+            def evaluated_dataset_id(dataset, metric_to_evaluate):
+                if dataset["datasetType"] == metric_to_evaluate or dataset["datasetType"] is None:
+                    return dataset["id"]
+                return dataset["derivedDatasetId"]
+
+            for dataset_name, metrics in submissions:
+                if dataset_name not in datasets:
+                    raise ValueError(f"Dataset '{dataset_name}' not found. Please enter a valid dataset name")
+                for metric in metrics:
+                    if metric["name"] not in metric_names:
+                        raise ValueError("Enter a valid metric name")
+
+            column_ids = set()
+            for dataset_name, metrics in submissions:
+                dataset = datasets[dataset_name]
+                column_ids.add(dataset["id"])
+                for metric in metrics:
+                    if required_fields[metric["name"]]:
+                        column_ids.add(evaluated_dataset_id(
+                            dataset, self._get_metric_to_evaluate(required_fields[metric["name"]])
+                        ))
+            executed_ids = {datasets[dataset_name]["id"] for dataset_name, _ in submissions}
+            columns_futures = {
+                dataset_id: executor.submit(self._get_bulk_dataset_columns, dataset_id)
+                for dataset_id in column_ids
+            }
+            executed_futures = {
+                dataset_id: executor.submit(self._get_bulk_executed_metrics, dataset_id)
+                for dataset_id in executed_ids
+            }
+            dataset_columns = {key: future.result() for key, future in columns_futures.items()}
+            executed_metrics = {key: future.result() for key, future in executed_futures.items()}
+
+            payloads = []
+            for dataset_name, metrics in submissions:
+                dataset = datasets[dataset_name]
+                for metric in metrics:
+                    if metric["column_name"] in executed_metrics[dataset["id"]]:
+                        raise ValueError(f"Column name '{metric['column_name']}' already exists.")
+                # Like add_metrics, the job runs on the dataset of the last metric with required fields
+                dataset_id = dataset["id"]
+                metricParams = []
+                for metric in metrics:
+                    base_json = self._get_metric_base_json(metric)
+                    fields = required_fields[metric["name"]]
+                    mappings = []
+                    if fields:
+                        dataset_id = evaluated_dataset_id(dataset, self._get_metric_to_evaluate(fields))
+                        for field in fields:
+                            variableName = self._find_variablename(
+                                field["name"].lower(),
+                                metric["name"],
+                                metric["schema_mapping"],
+                                dataset_columns[dataset_id],
+                                dataset_name,
+                            )
+                            mappings.append({"schemaName": field["name"], "variableName": variableName})
+                    base_json["metricSpec"]["config"]["mappings"] = mappings
+                    metricParams.append(base_json)
+                payloads.append({"datasetId": dataset_id, "metricParams": metricParams})
+
+            def submit(dataset_name, payload):
+                try:
+                    response = self._bulk_request(
+                        "POST", "/playground/metric-evaluation", json=payload
+                    )
+                    if response["success"]:
+                        logger.debug(f"{dataset_name}: {response['message']}")
+                        return response["data"]["jobId"]
+                    logger.error(f"Failed to add metrics to {dataset_name}: {response.get('message')}")
+                except (requests.exceptions.RequestException, ValueError) as e:
+                    logger.error(f"Failed to add metrics to {dataset_name}: {e}")
+                return None
+
+            job_futures = [
+                executor.submit(submit, dataset_name, payload)
+                for (dataset_name, _), payload in zip(submissions, payloads)
+            ]
+            return [future.result() for future in job_futures]
+
     def get_status(self):
         headers = {
             'Content-Type': 'application/json',
-            "Authorization": f"Bearer {os.getenv('RAGAAI_CATALYST_TOKEN')}",
+            "Authorization": f"Bearer {token_manager.get_token()}",
             'X-Project-Id': str(self.project_id),
         }
         try:
-            response = requests.get(
+            response = transport.get(
                 f'{self.base_url}/job/status', 
                 headers=headers, 
                 timeout=self.timeout)
@@ -384,48 +534,238 @@ class Evaluation:
         except Exception as e:
             logger.error(f"An unexpected error occurred: {e}")
 
-    def get_results(self):
+    def _fetch_job_statuses(self):
+        return fetch_job_statuses(self.base_url, {'X-Project-Id': str(self.project_id)})
+
+    def _job_ids(self, job_ids):
+        if job_ids is not None:
+            return list(job_ids)
+        if self.jobId is None:
+            raise ValueError("No job to wait for. Please add metrics first.")
+        return [self.jobId]
+
+    def wait_for_completion(self, timeout=None, job_ids=None, on_complete=None, **poll_options):
+        """
+        Wait until evaluation jobs finish.
+
+        The jobs are polled together, with one status request per poll, at intervals that grow
+        exponentially with random jitter.
+
+        Args:
+            timeout (float, optional): The maximum time to wait in seconds. Defaults to None (no limit).
+            job_ids (list, optional): The jobs to wait for. Defaults to the job of the last
+                `add_metrics` call.
+            on_complete (callable, optional): Called with the job ID and status of every job as
+                soon as it finishes. Defaults to None.
+            **poll_options: `initial_interval` (1 s), `max_interval` (30 s), `multiplier` (2) and
+                `jitter` (0.5) of the polling.
+
+        Returns:
+            dict: The final status, "Completed" or "Failed", of every job by job ID.
+
+        Raises:
+            TimeoutError: If a job did not finish within the timeout.
+        """
+        return wait_for_jobs(
+            self._fetch_job_statuses, self._job_ids(job_ids), timeout, on_complete, **poll_options
+        )
+
+    async def await_completion(self, timeout=None, job_ids=None, on_complete=None, **poll_options):
+        """Async version of `wait_for_completion`. `on_complete` may be a coroutine function."""
+        return await async_wait_for_jobs(
+            self._fetch_job_statuses, self._job_ids(job_ids), timeout, on_complete, **poll_options
+        )
+
+    def wait_for_results(self, timeout=None, poll_options=None, **get_results_kwargs):
+        """
+        Wait until the job of the last `add_metrics` call finishes, then get the results.
+
+        Args:
+            timeout (float, optional): The maximum time to wait in seconds. Defaults to None (no limit).
+            poll_options (dict, optional): The polling options of `wait_for_completion`.
+            **get_results_kwargs: Passed to `get_results`, e.g. `stream=True`.
+
+        Returns:
+            The return value of `get_results`.
+
+        Raises:
+            TimeoutError: If the job did not finish within the timeout.
+            JobFailedError: If the job failed.
+        """
+        statuses = self.wait_for_completion(timeout=timeout, **(poll_options or {}))
+        self._raise_for_failed(statuses)
+        return self.get_results(**get_results_kwargs)
+
+    async def await_results(self, timeout=None, poll_options=None, **get_results_kwargs):
+        """Async version of `wait_for_results`. The results are downloaded in the default executor."""
+        statuses = await self.await_completion(timeout=timeout, **(poll_options or {}))
+        self._raise_for_failed(statuses)
+        return await asyncio.get_running_loop().run_in_executor(
+            None, functools.partial(self.get_results, **get_results_kwargs)
+        )
+
+    @staticmethod
+    def _raise_for_failed(statuses):
+        failed = [job_id for job_id, status in statuses.items() if status != COMPLETED]
+        if failed:
+            raise JobFailedError(f"Job {failed[0]} failed. No results to fetch.")
+
+    def _get_results_url(self):
+        """Request an export of the results and return its presigned URL, or None on failure."""
+        headers = {
+            'Content-Type': 'application/json',
+            "Authorization": f"Bearer {token_manager.get_token()}",
+            'X-Project-Id': str(self.project_id),
+            }
+        
+        data = {
+            "fields": [
+                "*"
+            ],
+            "datasetId": str(self.dataset_id),
+            "rowFilterList": [],
+            "export": True
+            }
+        try:    
+            response = transport.post(
+                f'{self.base_url}/v1/llm/docs', 
+                headers=headers, 
+                json=data,
+                timeout=self.timeout)
+            response.raise_for_status()
+            return response.json()["data"]["preSignedURL"]
+        except requests.exceptions.HTTPError as http_err:
+            logger.error(f"HTTP error occurred: {http_err}")
+        except requests.exceptions.ConnectionError as conn_err:
+            logger.error(f"Connection error occurred: {conn_err}")
+        except requests.exceptions.Timeout as timeout_err:
+            logger.error(f"Timeout error occurred: {timeout_err}")
+        except requests.exceptions.RequestException as req_err:
+            logger.error(f"An error occurred: {req_err}")
+        except Exception as e:
+            logger.error(f"An unexpected error occurred: {e}")
+        return None
+
+    def _open_results(self):
+        """Open the exported results CSV as a streamed response, or return None on failure."""
+        preSignedURL = self._get_results_url()
+        if not preSignedURL:
+            return None
+        try:
+            response = transport.get(preSignedURL, timeout=self.timeout, stream=True)
+            response.raise_for_status()
+            # Let the CSV parser read the decompressed body straight from the socket
+            response.raw.decode_content = True
+            return response
+        except requests.exceptions.RequestException as req_err:
+            logger.error(f"An error occurred: {req_err}")
+        return None
+
+    @staticmethod
+    def _result_columns(columns):
+        """The columns of the results shown to the user, without internal and nested ones."""
+        return [col for col in columns if not col.startswith('_') and '.' not in col]
+
+    def iter_results(self, chunksize=100_000, **read_csv_kwargs):
+        """
+        Iterate over the results in DataFrame chunks, streaming the exported CSV.
+
+        The CSV is parsed while it downloads, so only one chunk is held in memory at a time.
+
+        Args:
+            chunksize (int, optional): The number of rows per chunk. Defaults to 100000.
+            **read_csv_kwargs: Passed to `pd.read_csv`, e.g. `dtype` to fix the column types.
+
+        Yields:
+            pd.DataFrame: The next rows of the results, with the columns of `get_results`.
+        """
+        response = self._open_results()
+        if response is None:
+            return
+        with response:
+            with pd.read_csv(response.raw, chunksize=chunksize, **read_csv_kwargs) as reader:
+                column_list = None
+                for chunk in reader:
+                    if column_list is None:
+                        column_list = self._result_columns(chunk.columns.to_list())
+                    yield chunk[column_list]
+
+    def _write_results_parquet(self, parquet_path, chunksize, **read_csv_kwargs):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError(
+                "Writing results to Parquet requires pyarrow. "
+                "Install it with `pip install ragaai_catalyst[parquet]`."
+            )
 
-        def get_presignedUrl():
-            headers = {
-                'Content-Type': 'application/json',
-                "Authorization": f"Bearer {os.getenv('RAGAAI_CATALYST_TOKEN')}",
-                'X-Project-Id': str(self.project_id),
-                }
-            
-            data = {
-                "fields": [
-                    "*"
-                ],
-                "datasetId": str(self.dataset_id),
-                "rowFilterList": [],
-                "export": True
-                }
-            try:    
-                response = requests.post(
-                    f'{self.base_url}/v1/llm/docs', 
-                    headers=headers, 
-                    json=data,
-                    timeout=self.timeout)
-                response.raise_for_status()
-                return response.json()
-            except requests.exceptions.HTTPError as http_err:
-                logger.error(f"HTTP error occurred: {http_err}")
-            except requests.exceptions.ConnectionError as conn_err:
-                logger.error(f"Connection error occurred: {conn_err}")
-            except requests.exceptions.Timeout as timeout_err:
-                logger.error(f"Timeout error occurred: {timeout_err}")
-            except requests.exceptions.RequestException as req_err:
-                logger.error(f"An error occurred: {req_err}")
-            except Exception as e:
-                logger.error(f"An unexpected error occurred: {e}")
-                return {}
+        writer = None
+        try:
+            for chunk in self.iter_results(chunksize=chunksize, **read_csv_kwargs):
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    # Later chunks may hold floats or text where the first one had integers or
+                    # nothing, so widen those columns up front
+                    schema = pa.schema([
+                        field.with_type(pa.float64()) if pa.types.is_integer(field.type)
+                        else field.with_type(pa.string()) if pa.types.is_null(field.type)
+                        else field
+                        for field in table.schema
+                    ])
+                    writer = pq.ParquetWriter(parquet_path, schema)
+                try:
+                    table = table.cast(writer.schema)
+                except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+                    raise ValueError(
+                        f"The column types of the results changed between chunks: {e}. "
+                        "Pass `dtype` to fix them."
+                    ) from e
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+        if writer is None:
+            return None
+        return parquet_path
+
+    def get_results(self, stream=False, parquet_path=None, chunksize=100_000, **read_csv_kwargs):
+        """
+        Get the results of the evaluation.
+
+        By default the exported CSV is downloaded and then parsed. With `stream=True` it is
+        parsed while it downloads, so it is not held in memory as text next to the DataFrame.
+        With `parquet_path`, the results are written to a Parquet file chunk by chunk instead
+        of being returned, which bounds the memory to one chunk. Use `iter_results` to process
+        the chunks directly.
+
+        Args:
+            stream (bool, optional): Parse the CSV while it downloads. Defaults to False.
+            parquet_path (str, optional): Write the results to this Parquet file, which requires
+                pyarrow. Defaults to None.
+            chunksize (int, optional): The number of rows per chunk written to `parquet_path`.
+                Defaults to 100000.
+            **read_csv_kwargs: Passed to `pd.read_csv` when streaming, e.g. `dtype`.
+
+        Returns:
+            pd.DataFrame: The results, or an empty DataFrame if they could not be retrieved. With
+                `parquet_path`, the path of the written file, or None if there were no results.
+        """
+        if parquet_path is not None:
+            return self._write_results_parquet(parquet_path, chunksize, **read_csv_kwargs)
+
+        if stream:
+            response = self._open_results()
+            if response is None:
+                return pd.DataFrame()
+            with response:
+                df = pd.read_csv(response.raw, **read_csv_kwargs)
+            return df[self._result_columns(df.columns.to_list())]
 
         def parse_response():
             try:
-                response = get_presignedUrl()
-                preSignedURL = response["data"]["preSignedURL"]
-                response = requests.get(preSignedURL, timeout=self.timeout)
+                preSignedURL = self._get_results_url()
+                response = transport.get(preSignedURL, timeout=self.timeout)
                 response.raise_for_status()
                 return response.text
             except requests.exceptions.HTTPError as http_err:
@@ -444,9 +784,6 @@ class Evaluation:
         if response_text:
             df = pd.read_csv(io.StringIO(response_text))
 
-            column_list = df.columns.to_list()
-            column_list = [col for col in column_list if not col.startswith('_')]
-            column_list = [col for col in column_list if '.' not in col]
-            return df[column_list]
+            return df[self._result_columns(df.columns.to_list())]
         else:
             return pd.DataFrame()
@@ -1,7 +1,20 @@
 import os
-import requests
+from . import transport
+from .token_manager import token_manager
+from .resolution_cache import resolution_cache
+from .job_status import (
+    COMPLETED,
+    JobFailedError,
+    async_wait_for_jobs,
+    fetch_job_statuses,
+    wait_for_jobs,
+)
+import asyncio
+import functools
 import logging
 import pandas as pd
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from .utils import response_checker
 from .ragaai_catalyst import RagaAICatalyst
 
@@ -50,9 +63,9 @@ class Experiment:
         }
         headers = {
             "Content-Type": "application/json",
-            "Authorization": f'Bearer {os.getenv("RAGAAI_CATALYST_TOKEN")}',
+            "Authorization": f'Bearer {token_manager.get_token()}',
         }
-        response = requests.get(
+        response = transport.get(
             f"{RagaAICatalyst.BASE_URL}/projects",
             params=params,
             headers=headers,
@@ -68,11 +81,7 @@ class Experiment:
         self.access_key = os.getenv("RAGAAI_CATALYST_ACCESS_KEY")
         self.secret_key = os.getenv("RAGAAI_CATALYST_SECRET_KEY")
 
-        self.token = (
-            os.getenv("RAGAAI_CATALYST_TOKEN")
-            if os.getenv("RAGAAI_CATALYST_TOKEN") is not None
-            else get_token()
-        )
+        self.token = token_manager.get_token()
         
         if not self._check_if_project_exists(project_name=project_name):
             raise ValueError(f"Project '{project_name}' not found. Please enter a valid project name")
@@ -86,9 +95,9 @@ class Experiment:
         headers = {
             "X-Project-Name":project_name,
             # "accept":"application/json, text/plain, */*",
-            "Authorization": f'Bearer {os.getenv("RAGAAI_CATALYST_TOKEN")}',
+            "Authorization": f'Bearer {token_manager.get_token()}',
         }
-        response = requests.get(
+        response = transport.get(
             f"{RagaAICatalyst.BASE_URL}/v1/llm/sub-datasets?projectName={project_name}",
             headers=headers,
             timeout=self.TIMEOUT,
@@ -109,31 +118,10 @@ class Experiment:
 
 
     def _check_if_project_exists(self,project_name,num_projects=100):
-        # TODO: 1. List All projects
-        params = {
-            "size": str(num_projects),
-            "page": "0",
-            "type": "llm",
-        }
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f'Bearer {os.getenv("RAGAAI_CATALYST_TOKEN")}',
-        }
-        response = requests.get(
-            f"{RagaAICatalyst.BASE_URL}/projects",
-            params=params,
-            headers=headers,
-            timeout=self.TIMEOUT,
+        exists = (
+            resolution_cache.get_project_id(RagaAICatalyst.BASE_URL, project_name)
+            is not None
         )
-        response.raise_for_status()
-        logger.debug("Projects list retrieved successfully")
-        project_list = [
-            project["name"] for project in response.json()["data"]["content"]
-        ]
-        
-        # TODO: 2. Check if the given project_name exists
-        # TODO: 3. Return bool (True / False output)
-        exists = project_name in project_list
         if exists:
             logger.info(f"Project '{project_name}' exists.")
         else:
@@ -154,13 +142,13 @@ class Experiment:
 
         def make_request():
             headers = {
-                "authorization": f"Bearer {os.getenv('RAGAAI_CATALYST_TOKEN')}",
+                "authorization": f"Bearer {token_manager.get_token()}",
                 "X-Project-Name": self.project_name,
             }
             params = {
                 "name": self.project_name,
             }
-            response = requests.get(
+            response = transport.get(
                 f"{Experiment.BASE_URL}/project",
                 headers=headers,
                 params=params,
@@ -195,7 +183,7 @@ class Experiment:
         """
         headers = {
             "Content-Type": "application/json",
-            "Authorization": f'Bearer {os.getenv("RAGAAI_CATALYST_TOKEN")}',
+            "Authorization": f'Bearer {token_manager.get_token()}',
             "X-Project-Name": self.project_name,
         }
 
@@ -222,7 +210,7 @@ class Experiment:
         logger.debug(
             f"Preparing to add metrics for '{self.experiment_name}': {metrics}"
         )
-        response = requests.post(
+        response = transport.post(
             f"{Experiment.BASE_URL}/v1/llm/experiment",
             headers=headers,
             json=json_data,
@@ -246,10 +234,10 @@ class Experiment:
         elif status_code == 401:
             headers = {
                 "Content-Type": "application/json",
-                "Authorization": f'Bearer {os.getenv("RAGAAI_CATALYST_TOKEN")}',
+                "Authorization": f'Bearer {token_manager.get_token()}',
                 "X-Project-Name": self.project_name,
             }
-            response = requests.post(
+            response = transport.post(
                 f"{Experiment.BASE_URL}/v1/llm/experiment",
                 headers=headers,
                 json=json_data,
@@ -285,7 +273,7 @@ class Experiment:
         """
         headers = {
             "Content-Type": "application/json",
-            "Authorization": f'Bearer {os.getenv("RAGAAI_CATALYST_TOKEN")}',
+            "Authorization": f'Bearer {token_manager.get_token()}',
             "X-Project-Name": self.project_name,
         }
         if job_id is not None:
@@ -300,7 +288,7 @@ class Experiment:
             "jobId": job_id_to_check,
         }
         logger.debug(f"Fetching status for Job ID: {job_id_to_check}")
-        response = requests.get(
+        response = transport.get(
             f"{Experiment.BASE_URL}/job/status",
             headers=headers,
             json=json_data,
@@ -316,10 +304,10 @@ class Experiment:
         elif status_code == 401:
             headers = {
                 "Content-Type": "application/json",
-                "Authorization": f'Bearer {os.getenv("RAGAAI_CATALYST_TOKEN")}',
+                "Authorization": f'Bearer {token_manager.get_token()}',
                 "X-Project-Name": self.project_name,
             }
-            response = requests.post(
+            response = transport.post(
                 f"{Experiment.BASE_URL}/job/status",
                 headers=headers,
                 json=json_data,
@@ -341,6 +329,86 @@ class Experiment:
                 response_checker(response, "Experiment.get_status"),
             )
 
+    def _fetch_job_statuses(self):
+        return fetch_job_statuses(Experiment.BASE_URL, {"X-Project-Name": self.project_name})
+
+    def _job_ids(self, job_ids):
+        if job_ids is not None:
+            return list(job_ids)
+        if self.job_id is None:
+            raise ValueError("No job to wait for. Please run an experiment test first")
+        return [self.job_id]
+
+    def wait_for_completion(self, timeout=None, job_ids=None, on_complete=None, **poll_options):
+        """
+        Wait until experiment jobs finish.
+
+        The jobs are polled together, with one status request per poll, at intervals that grow
+        exponentially with random jitter.
+
+        Args:
+            timeout (float, optional): The maximum time to wait in seconds. Defaults to None (no limit).
+            job_ids (list, optional): The jobs to wait for. Defaults to the job of the last
+                `add_metrics` call.
+            on_complete (callable, optional): Called with the job ID and status of every job as
+                soon as it finishes, e.g. to download its results. Defaults to None.
+            **poll_options: `initial_interval` (1 s), `max_interval` (30 s), `multiplier` (2) and
+                `jitter` (0.5) of the polling.
+
+        Returns:
+            dict: The final status, "Completed" or "Failed", of every job by job ID.
+
+        Raises:
+            TimeoutError: If a job did not finish within the timeout.
+        """
+        return wait_for_jobs(
+            self._fetch_job_statuses, self._job_ids(job_ids), timeout, on_complete, **poll_options
+        )
+
+    async def await_completion(self, timeout=None, job_ids=None, on_complete=None, **poll_options):
+        """Async version of `wait_for_completion`. `on_complete` may be a coroutine function."""
+        return await async_wait_for_jobs(
+            self._fetch_job_statuses, self._job_ids(job_ids), timeout, on_complete, **poll_options
+        )
+
+    def wait_for_results(self, job_id=None, timeout=None, poll_options=None, **results_kwargs):
+        """
+        Wait until a job finishes, then get all its results with `get_all_results`.
+
+        Args:
+            job_id (int, optional): The job to wait for. Defaults to the job of the last
+                `add_metrics` call.
+            timeout (float, optional): The maximum time to wait in seconds. Defaults to None (no limit).
+            poll_options (dict, optional): The polling options of `wait_for_completion`.
+            **results_kwargs: Passed to `get_all_results`, e.g. `page_size`.
+
+        Returns:
+            pd.DataFrame: The results.
+
+        Raises:
+            TimeoutError: If the job did not finish within the timeout.
+            JobFailedError: If the job failed.
+        """
+        [job_id] = self._job_ids([job_id] if job_id is not None else None)
+        statuses = self.wait_for_completion(
+            timeout=timeout, job_ids=[job_id], **(poll_options or {})
+        )
+        if statuses[job_id] != COMPLETED:
+            raise JobFailedError(f"Job {job_id} failed. No results to fetch.")
+        return self.get_all_results(job_id=job_id, **results_kwargs)
+
+    async def await_results(self, job_id=None, timeout=None, poll_options=None, **results_kwargs):
+        """Async version of `wait_for_results`. The results are downloaded in the default executor."""
+        [job_id] = self._job_ids([job_id] if job_id is not None else None)
+        statuses = await self.await_completion(
+            timeout=timeout, job_ids=[job_id], **(poll_options or {})
+        )
+        if statuses[job_id] != COMPLETED:
+            raise JobFailedError(f"Job {job_id} failed. No results to fetch.")
+        return await asyncio.get_running_loop().run_in_executor(
+            None, functools.partial(self.get_all_results, job_id=job_id, **results_kwargs)
+        )
+
     def get_results(self, job_id=None):
         """
         A function that retrieves results based on the experiment ID.
@@ -348,6 +416,7 @@ class Experiment:
         If the request is successful (status code 200), it returns the retrieved test response.
         If the status code is 401, it retries the request and returns the test response if successful.
         If the status is neither 200 nor 401, it logs an error and returns the response checker result.
+        Only the first results are returned, use `get_all_results` or `iter_results` for all of them.
         """
         if job_id is not None:
             job_id_to_use = job_id
@@ -360,7 +429,7 @@ class Experiment:
 
         headers = {
             "Content-Type": "application/json",
-            "Authorization": f'Bearer {os.getenv("RAGAAI_CATALYST_TOKEN")}',
+            "Authorization": f'Bearer {token_manager.get_token()}',
             "X-Project-Id": str(self.project_id),
         }
 
@@ -381,7 +450,7 @@ class Experiment:
         elif status_json == "Completed":
             print(f"Job completed. fetching results.\n Visit Job Status: {base_url_without_api}/home/job-status to track")
 
-        response = requests.post(
+        response = transport.post(
             f"{Experiment.BASE_URL}/v1/llm/docs",
             headers=headers,
             json=json_data,
@@ -411,10 +480,10 @@ class Experiment:
         elif response.status_code == 401:
             headers = {
                 "Content-Type": "application/json",
-                "Authorization": f'Bearer {os.getenv("RAGAAI_CATALYST_TOKEN")}',
+                "Authorization": f'Bearer {token_manager.get_token()}',
                 "X-Project-Id": str(self.project_id),
             }
-            response = requests.post(
+            response = transport.post(
                 f"{Experiment.BASE_URL}/v1/llm/docs",
                 headers=headers,
                 json=json_data,
@@ -432,52 +501,235 @@ class Experiment:
                 response_checker(response, "Experiment.get_test_results"),
             )
 
-    def parse_response(self, response):
+    def _fetch_results_page(self, page, page_size):
+        """Fetch one page of experiment results, refreshing the token once on a 401."""
+        json_data = {
+            "fields": [],
+            "experimentId": self.experiment_id,
+            "numRecords": page_size,
+            "page": page,
+            "projectId": self.project_id,
+            "filterList": [],
+        }
+        token = token_manager.get_token()
+        for attempt in range(2):
+            headers = {
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {token}",
+                "X-Project-Id": str(self.project_id),
+            }
+            response = transport.post(
+                f"{Experiment.BASE_URL}/v1/llm/docs",
+                headers=headers,
+                json=json_data,
+                timeout=Experiment.TIMEOUT,
+            )
+            if response.status_code != 401 or attempt:
+                break
+            token = token_manager.refresh(stale_token=token)
+        if response.status_code != 200:
+            raise FailedToRetrieveResults(
+                f"Failed to retrieve results page {page}: "
+                f"{response_checker(response, 'Experiment.iter_results')}"
+            )
+        test_response = response.json()
+        if not test_response.get("success"):
+            raise FailedToRetrieveResults(
+                f"Failed to retrieve results page {page}: {test_response.get('message')}"
+            )
+        return test_response
+
+    def _iter_result_pages(self, job_id, page_size, prefetch):
+        """Yield the response of every non-empty page of results, see `iter_results`."""
+        job_id_to_use = job_id if job_id is not None else self.job_id
+        if job_id_to_use is None:
+            raise FailedToRetrieveResults("Please run an experiment test first")
+        if page_size < 1 or prefetch < 1:
+            raise ValueError("page_size and prefetch must be at least 1.")
+
+        status = self.get_status(job_id_to_use)
+        if status != "Completed":
+            raise FailedToRetrieveResults(
+                f"Job {job_id_to_use} is not completed (status: {status})."
+            )
+
+        with ThreadPoolExecutor(
+            max_workers=prefetch, thread_name_prefix="ExperimentResults"
+        ) as executor:
+            pending = deque()
+            next_page = 0
+            try:
+                while True:
+                    while len(pending) < prefetch:
+                        pending.append(
+                            executor.submit(self._fetch_results_page, next_page, page_size)
+                        )
+                        next_page += 1
+                    test_response = pending.popleft().result()
+                    docs = test_response["data"]["docs"]
+                    if docs:
+                        yield test_response
+                    if len(docs) < page_size:
+                        return
+            finally:
+                # Pages requested past the last one, or left behind by an early exit
+                for future in pending:
+                    future.cancel()
+
+    def _parse_page(self, test_response, metric_columns):
+        parse_success, parsed_response = self.parse_response(test_response, metric_columns)
+        if not parse_success:
+            raise FailedToRetrieveResults(f"Failed to parse response: {test_response}")
+        return parsed_response
+
+    def iter_results(self, job_id=None, page_size=1000, prefetch=4, as_records=False):
         """
-        Parse the response to get the results
+        Iterate over all the results of an experiment, one page at a time.
+
+        Up to `prefetch` pages are requested concurrently ahead of the page being consumed, so
+        results download at network speed while at most `prefetch` pages are held in memory.
+        Iteration stops at the first page with fewer than `page_size` results.
+
+        Args:
+            job_id (int, optional): The job whose status is checked before fetching. Defaults to
+                the job of the last `add_metrics` call.
+            page_size (int, optional): The number of results per page. Defaults to 1000.
+            prefetch (int, optional): The maximum number of pages requested ahead. Defaults to 4.
+            as_records (bool, optional): Yield the raw result documents of each page as a list of
+                dicts instead of a parsed DataFrame. Defaults to False.
+
+        Yields:
+            pd.DataFrame or list: The results of one page, parsed like `get_results`. The metric
+                columns are those of the first page, and are split the same way on every page,
+                so that the pages have the same columns.
+
+        Raises:
+            FailedToRetrieveResults: If the job is not completed, or a page could not be
+                retrieved or parsed.
         """
-        try:
-            x = pd.DataFrame(response["data"]["docs"])
+        metric_columns = None
+        for test_response in self._iter_result_pages(job_id, page_size, prefetch):
+            if as_records:
+                yield test_response["data"]["docs"]
+                continue
+            if metric_columns is None:
+                metric_columns = self._metric_columns(test_response)
+            yield self._parse_page(test_response, metric_columns)
+
+    def get_all_results(self, job_id=None, page_size=1000, prefetch=4):
+        """
+        Retrieve all the results of an experiment in one DataFrame.
 
-            column_names_to_replace = [
-                {item["columnName"]: item["displayName"]}
-                for item in response["data"]["columns"]
-            ]
+        Args:
+            job_id (int, optional): The job whose status is checked before fetching. Defaults to
+                the job of the last `add_metrics` call.
+            page_size (int, optional): The number of results per page. Defaults to 1000.
+            prefetch (int, optional): The maximum number of pages requested concurrently.
+                Defaults to 4.
 
-            if column_names_to_replace:
-                for item in column_names_to_replace:
-                    x = x.rename(columns=item)
+        Returns:
+            pd.DataFrame: The results, parsed like `get_results`. A column is split as a metric
+                column if it holds metric results on any page.
 
-                dict_cols = [
-                    col
-                    for col in x.columns
-                    if x[col].dtype == "object"
-                    and x[col].apply(lambda y: isinstance(y, dict)).any()
-                ]
+        Raises:
+            FailedToRetrieveResults: If the job is not completed, or a page could not be
+                retrieved or parsed.
+        """
+        responses = list(self._iter_result_pages(job_id, page_size, prefetch))
+        if not responses:
+            return pd.DataFrame()
+        metric_columns = set().union(*(self._metric_columns(response) for response in responses))
+        return pd.concat(
+            [self._parse_page(response, metric_columns) for response in responses],
+            ignore_index=True,
+        )
 
-                for dict_col in dict_cols:
-                    x[f"{dict_col}_reason"] = x[dict_col].apply(
-                        lambda y: y.get("reason") if isinstance(y, dict) else None
-                    )
-                    x[f"{dict_col}_metric_config"] = x[dict_col].apply(
-                        lambda y: (
-                            y.get("metric_config") if isinstance(y, dict) else None
-                        )
-                    )
-                    x[f"{dict_col}_status"] = x[dict_col].apply(
-                        lambda y: y.get("status") if isinstance(y, dict) else None
-                    )
+    # Suffixes of the columns a metric result is split into, and the key each is read from
+    METRIC_FIELDS = (
+        ("_reason", "reason"),
+        ("_metric_config", "metric_config"),
+        ("_status", "status"),
+    )
+
+    @staticmethod
+    def _display_names(names, response):
+        """Rename columns to their display names, or return None if the response has none."""
+        column_names_to_replace = [
+            {item["columnName"]: item["displayName"]}
+            for item in response["data"]["columns"]
+        ]
+        if not column_names_to_replace:
+            return None
+        # Apply the renames in order, so that chained renames resolve like before
+        for item in column_names_to_replace:
+            names = [item.get(name, name) for name in names]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Duplicate column names after renaming: {names}")
+        return names
+
+    @staticmethod
+    def _holds_metric_results(column):
+        return column.dtype == "object" and any(isinstance(value, dict) for value in column.tolist())
+
+    def _metric_columns(self, response):
+        """Return the display names of the columns of a response that hold metric results (dicts)."""
+        x = pd.DataFrame(response["data"]["docs"])
+        names = self._display_names(list(x.columns), response)
+        if names is None:
+            return set()
+        return {
+            name for position, name in enumerate(names)
+            if self._holds_metric_results(x.iloc[:, position])
+        }
+
+    def parse_response(self, response, metric_columns=None):
+        """
+        Parse the response to get the results
 
-                    x = x.drop(columns=[dict_col])
+        Columns are renamed to their display names, and every column holding metric results
+        (dicts) is split into `<name>_reason`, `<name>_metric_config` and `<name>_status`
+        columns. The frame is built once from the final columns.
 
-            x.columns = x.columns.str.replace("_reason_reason", "_reason")
-            x.columns = x.columns.str.replace("_reason_metric_config", "_metric_config")
-            x.columns = x.columns.str.replace("_reason_status", "_status")
+        Args:
+            response (dict): The response of a results request.
+            metric_columns (collection, optional): The display names of the columns to split,
+                whatever their values on this page, so that pages of one experiment are split
+                alike. Defaults to the columns holding dicts.
+        """
+        try:
+            x = pd.DataFrame(response["data"]["docs"])
+
+            names = self._display_names(list(x.columns), response)
+            if names is None:
+                names = list(x.columns)
+                metric_columns = ()
+
+            columns = {}
+            for position, name in enumerate(names):
+                column = x.iloc[:, position]
+                if metric_columns is None:
+                    is_metric = self._holds_metric_results(column)
+                else:
+                    is_metric = name in metric_columns
+                if not is_metric:
+                    columns[name] = column
+                    continue
+                results = [value if isinstance(value, dict) else {} for value in column.tolist()]
+                for suffix, key in self.METRIC_FIELDS:
+                    columns[f"{name}{suffix}"] = [result.get(key) for result in results]
+
+            flattened = {}
+            for name, column in columns.items():
+                if isinstance(name, str):
+                    name = (
+                        name.replace("_reason_reason", "_reason")
+                        .replace("_reason_metric_config", "_metric_config")
+                        .replace("_reason_status", "_status")
+                    )
+                if name != "trace_uri":
+                    flattened[name] = column
 
-            columns_list = x.columns.tolist()
-            #remove trace_uri from columns_list if it exists
-            columns_list = list(set(columns_list) - {"trace_uri"})
-            x = x[columns_list]
+            x = pd.DataFrame(flattened, index=x.index)
 
             return True, x
 
@@ -1,7 +1,8 @@
 import litellm
 import json
-import requests
-import os
+from . import transport
+from . import llm_cache
+from .token_manager import token_manager
 import logging
 logger = logging.getLogger('LiteLLM')
 logger.setLevel(logging.ERROR)
@@ -27,10 +28,10 @@ class GuardExecutor:
         headers = {
             'x-project-id': str(self.guard_manager.project_id),
             'Content-Type': 'application/json',
-            'Authorization': f'Bearer {os.getenv("RAGAAI_CATALYST_TOKEN")}'
+            'Authorization': f'Bearer {token_manager.get_token()}'
         }
         try:
-            response = requests.request("POST", api, headers=headers, data=payload,timeout=self.guard_manager.timeout)
+            response = transport.request("POST", api, headers=headers, data=payload,timeout=self.guard_manager.timeout)
         except Exception as e:
             print('Failed running guardrail: ',str(e))
             return None
@@ -45,8 +46,14 @@ class GuardExecutor:
     def llm_executor(self,messages,model_params,llm_caller):
         if llm_caller == 'litellm':
             model_params['messages'] = messages
-            response = litellm.completion(**model_params)
-            return response
+            if model_params.get('stream'):
+                return litellm.completion(**model_params)
+            return llm_cache.cached_completion(
+                model_params,
+                lambda: litellm.completion(**model_params),
+                encode=lambda response: response.model_dump(),
+                decode=lambda data: litellm.ModelResponse(**data),
+            )
         else:
             print(f"{llm_caller} not supported currently, use litellm as llm caller")
 
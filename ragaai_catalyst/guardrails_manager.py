@@ -1,6 +1,7 @@
-import requests
+from . import transport
+from .token_manager import token_manager
+from .resolution_cache import resolution_cache
 import json
-import os
 from .ragaai_catalyst import RagaAICatalyst
 
 
@@ -17,11 +18,9 @@ class GuardrailsManager:
         self.deployment_name = "NA"
         self.deployment_id = "NA"
         self.base_url = f"{RagaAICatalyst.BASE_URL}"
-        list_projects, project_name_with_id = self._get_project_list()
-        if project_name not in list_projects:
+        self.project_id = resolution_cache.get_project_id(self.base_url, project_name)
+        if self.project_id is None:
             raise ValueError(f"Project '{self.project_name}' does not exists")
-        
-        self.project_id = [_["id"] for _ in project_name_with_id if _["name"]==self.project_name][0]
 
 
     def _get_project_list(self):
@@ -30,11 +29,9 @@ class GuardrailsManager:
         
         :return: A tuple containing a list of project names and a list of dictionaries with project IDs and names.
         """
-        headers = {'Authorization': f'Bearer {os.getenv("RAGAAI_CATALYST_TOKEN")}'}
-        response = requests.request("GET", f"{self.base_url}/v2/llm/projects?size={self.num_projects}", headers=headers, timeout=self.timeout)
-        project_content = response.json()["data"]["content"]
-        list_project = [_["name"] for _ in project_content]
-        project_name_with_id = [{"id": _["id"], "name": _["name"]} for _ in project_content]
+        projects = resolution_cache.get_projects(self.base_url)
+        list_project = list(projects)
+        project_name_with_id = [{"id": id, "name": name} for name, id in projects.items()]
         return list_project, project_name_with_id
 
 
@@ -46,10 +43,10 @@ class GuardrailsManager:
         """
         payload = {}
         headers = {
-                'Authorization': f'Bearer {os.getenv("RAGAAI_CATALYST_TOKEN")}',
+                'Authorization': f'Bearer {token_manager.get_token()}',
                 'X-Project-Id': str(self.project_id)
                 }
-        response = requests.request("GET", f"{self.base_url}/guardrail/deployment?size={self.num_projects}&page=0&sort=lastUsedAt,desc", headers=headers, data=payload, timeout=self.timeout)
+        response = transport.request("GET", f"{self.base_url}/guardrail/deployment?size={self.num_projects}&page=0&sort=lastUsedAt,desc", headers=headers, data=payload, timeout=self.timeout)
         deployment_ids_content = response.json()["data"]["content"]
         deployment_ids_content = [{"id": _["id"], "name": _["name"]} for _ in deployment_ids_content]
         return deployment_ids_content
@@ -64,10 +61,10 @@ class GuardrailsManager:
         """
         payload = {}
         headers = {
-                'Authorization': f'Bearer {os.getenv("RAGAAI_CATALYST_TOKEN")}',
+                'Authorization': f'Bearer {token_manager.get_token()}',
                 'X-Project-Id': str(self.project_id)
                 }
-        response = requests.request("GET", f"{self.base_url}/guardrail/deployment/{deployment_id}", headers=headers, data=payload, timeout=self.timeout)
+        response = transport.request("GET", f"{self.base_url}/guardrail/deployment/{deployment_id}", headers=headers, data=payload, timeout=self.timeout)
         if response.json()['success']:
             return response.json()
         else:
@@ -83,10 +80,10 @@ class GuardrailsManager:
         """
         payload = {}
         headers = {
-                'Authorization': f'Bearer {os.getenv("RAGAAI_CATALYST_TOKEN")}',
+                'Authorization': f'Bearer {token_manager.get_token()}',
                 'X-Project-Id': str(self.project_id)
                 }
-        response = requests.request("GET", f"{self.base_url}/v1/llm/llm-metrics?category=Guardrail", headers=headers, data=payload, timeout=self.timeout)
+        response = transport.request("GET", f"{self.base_url}/v1/llm/llm-metrics?category=Guardrail", headers=headers, data=payload, timeout=self.timeout)
         list_guardrails_content = response.json()["data"]["metrics"]
         list_guardrails = [_["name"] for _ in list_guardrails_content]
         return list_guardrails
@@ -100,10 +97,10 @@ class GuardrailsManager:
         """
         payload = {}
         headers = {
-                'Authorization': f'Bearer {os.getenv("RAGAAI_CATALYST_TOKEN")}',
+                'Authorization': f'Bearer {token_manager.get_token()}',
                 'X-Project-Id': str(self.project_id)
                 }
-        response = requests.request("GET", f"{self.base_url}/guardrail/deployment/configurations", headers=headers, data=payload, timeout=self.timeout)
+        response = transport.request("GET", f"{self.base_url}/guardrail/deployment/configurations", headers=headers, data=payload, timeout=self.timeout)
         return response.json()["data"]
 
     
@@ -122,11 +119,11 @@ class GuardrailsManager:
         
         payload = json.dumps({"name": str(deployment_name)})
         headers = {
-                'Authorization': f'Bearer {os.getenv("RAGAAI_CATALYST_TOKEN")}',
+                'Authorization': f'Bearer {token_manager.get_token()}',
                 'Content-Type': 'application/json',
                 'X-Project-Id': str(self.project_id)
                 }
-        response = requests.request("POST", f"{self.base_url}/guardrail/deployment", headers=headers, data=payload, timeout=self.timeout)
+        response = transport.request("POST", f"{self.base_url}/guardrail/deployment", headers=headers, data=payload, timeout=self.timeout)
         if response.status_code == 409:
             raise ValueError(f"Data with '{deployment_name}' already exists, choose a unique name")
         if response.json()["success"]:
@@ -170,11 +167,11 @@ class GuardrailsManager:
         payload["guardrails"] = self._get_guardrail_list_payload(guardrails)
         payload = json.dumps(payload)
         headers = {
-                'Authorization': f'Bearer {os.getenv("RAGAAI_CATALYST_TOKEN")}',
+                'Authorization': f'Bearer {token_manager.get_token()}',
                 'Content-Type': 'application/json',
                 'X-Project-Id': str(self.project_id)
                 }
-        response = requests.request("POST", f"{self.base_url}/guardrail/deployment/{str(self.deployment_id)}/configure", headers=headers, data=payload)
+        response = transport.request("POST", f"{self.base_url}/guardrail/deployment/{str(self.deployment_id)}/configure", headers=headers, data=payload)
         if response.json()["success"]:
             print(response.json()["message"])
         else:
@@ -1,4 +1,6 @@
-import requests
+from . import transport
+from . import llm_cache
+from .rate_limiter import estimate_request_tokens
 import json
 import subprocess
 import logging
@@ -7,7 +9,7 @@ import pandas as pd
 
 logger = logging.getLogger(__name__)
 
-def api_completion(messages, model_config, kwargs):
+def api_completion(messages, model_config, kwargs, sample=None, rate_limiter=None):
     attempts = 0
     while attempts < 3:
 
@@ -17,39 +19,57 @@ def api_completion(messages, model_config, kwargs):
             
         job_id = model_config.get('job_id',-1)
         converted_message = convert_input(messages,model_config, user_id)
-        payload = json.dumps(converted_message)
-        headers = {
-            'Content-Type': 'application/json',
-            # 'Wd-PCA-Feature-Key':f'your_feature_key, $(whoami)'
-        }
         try:
-            response = requests.request("POST", internal_llm_proxy, headers=headers, data=payload)
-            if model_config.get('log_level','')=='debug':
-                logger.info(f'Model response Job ID {job_id} {response.text}')
-            if response.status_code!=200:
-                # logger.error(f'Error in model response Job ID {job_id}:',str(response.text))
-                raise ValueError(str(response.text))
-            
-            if response.status_code==200:
-                response = response.json()                
-                if "error" in response:
-                    raise ValueError(response["error"]["message"])
-                else:
-                    result=  response["choices"][0]["message"]["content"]
-                    response1 = result.replace('\n', '')
-                    try:
-                        json_data = json.loads(response1)
-                        df = pd.DataFrame(json_data)
-                        return(df)
-                    except json.JSONDecodeError:
-                        attempts += 1  # Increment attempts if JSON parsing fails
-                        if attempts == 3:
-                            raise Exception("Failed to generate a valid response after multiple attempts.")
+            # Only responses that parse are cached, so that a retry sends the request again
+            result = llm_cache.cached_completion(
+                {"internal_llm_proxy": internal_llm_proxy, **converted_message},
+                lambda: _request_content(internal_llm_proxy, converted_message, model_config, job_id, rate_limiter),
+                sample=sample,
+                encode=_cacheable_content,
+            )
+            response1 = result.replace('\n', '')
+            try:
+                json_data = json.loads(response1)
+                df = pd.DataFrame(json_data)
+                return(df)
+            except json.JSONDecodeError:
+                attempts += 1  # Increment attempts if JSON parsing fails
+                if attempts == 3:
+                    raise Exception("Failed to generate a valid response after multiple attempts.")
 
         except Exception as e:
             raise ValueError(f"{e}")
 
 
+def _cacheable_content(content):
+    """Return the content of a response to cache, or None if it is not valid JSON."""
+    try:
+        json.loads(content.replace('\n', ''))
+    except json.JSONDecodeError:
+        return None
+    return content
+
+
+def _request_content(internal_llm_proxy, converted_message, model_config, job_id, rate_limiter):
+    if rate_limiter is not None:
+        rate_limiter.acquire(estimate_request_tokens(converted_message['messages'], model_config.get('max_tokens')))
+    payload = json.dumps(converted_message)
+    headers = {
+        'Content-Type': 'application/json',
+        # 'Wd-PCA-Feature-Key':f'your_feature_key, $(whoami)'
+    }
+    response = transport.request("POST", internal_llm_proxy, headers=headers, data=payload)
+    if model_config.get('log_level','')=='debug':
+        logger.info(f'Model response Job ID {job_id} {response.text}')
+    if response.status_code!=200:
+        # logger.error(f'Error in model response Job ID {job_id}:',str(response.text))
+        raise ValueError(str(response.text))
+    response = response.json()
+    if "error" in response:
+        raise ValueError(response["error"]["message"])
+    return response["choices"][0]["message"]["content"]
+
+
 def get_username():
     result = subprocess.run(['whoami'], capture_output=True, text=True)
     result = result.stdout
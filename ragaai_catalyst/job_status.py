@@ -0,0 +1,144 @@
+import time
+import random
+import asyncio
+import inspect
+import logging
+
+from . import transport
+from .token_manager import token_manager
+
+logger = logging.getLogger(__name__)
+
+TIMEOUT = 10
+COMPLETED = "Completed"
+FAILED = "Failed"
+TERMINAL_STATUSES = (COMPLETED, FAILED)
+
+
+class JobFailedError(Exception):
+    pass
+
+
+def fetch_job_statuses(base_url, headers):
+    """
+    Fetch the status of every job of a project with a single request.
+
+    Args:
+        base_url (str): The base URL of the RagaAI Catalyst API.
+        headers (dict): The project headers of the request, e.g. X-Project-Id. The authorization
+            header is added, and the token refreshed once if it is rejected.
+
+    Returns:
+        dict: The job statuses by job ID.
+
+    Raises:
+        requests.exceptions.RequestException: If the statuses could not be fetched.
+    """
+    token = token_manager.get_token()
+    for attempt in range(2):
+        response = transport.get(
+            f"{base_url}/job/status",
+            headers=dict(headers, Authorization=f"Bearer {token}"),
+            timeout=TIMEOUT,
+        )
+        if response.status_code != 401 or attempt:
+            break
+        token = token_manager.refresh(stale_token=token)
+    response.raise_for_status()
+    return {job["id"]: job["status"] for job in response.json()["data"]["content"]}
+
+
+def backoff_intervals(initial_interval=1.0, max_interval=30.0, multiplier=2.0, jitter=0.5):
+    """
+    Yield the delays between polls: exponentially growing up to `max_interval`, each shortened
+    by a random fraction of up to `jitter`, so that many waiters do not poll in lockstep.
+    """
+    interval = initial_interval
+    while True:
+        yield interval * (1 - jitter * random.random())
+        interval = min(interval * multiplier, max_interval)
+
+
+class _JobTracker:
+    """The bookkeeping shared by the sync and async waits."""
+
+    def __init__(self, job_ids, timeout, poll_options):
+        self.pending = list(dict.fromkeys(job_ids))
+        if not self.pending:
+            raise ValueError("No job to wait for.")
+        self.finished = {}
+        self.deadline = time.monotonic() + timeout if timeout is not None else None
+        self.intervals = backoff_intervals(**poll_options)
+
+    def update(self, statuses):
+        """Record the jobs that finished, and return them."""
+        newly_finished = []
+        for job_id in list(self.pending):
+            status = statuses.get(job_id)
+            if status in TERMINAL_STATUSES:
+                self.pending.remove(job_id)
+                self.finished[job_id] = status
+                newly_finished.append((job_id, status))
+            logger.debug(f"Job {job_id}: {status}")
+        return newly_finished
+
+    def next_delay(self):
+        """Return the delay before the next poll, or raise TimeoutError past the deadline."""
+        delay = next(self.intervals)
+        if self.deadline is None:
+            return delay
+        remaining = self.deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError(
+                f"Jobs {self.pending} did not finish in time, finished: {self.finished}"
+            )
+        return min(delay, remaining)
+
+
+def wait_for_jobs(fetch_statuses, job_ids, timeout=None, on_complete=None, **poll_options):
+    """
+    Wait for jobs to finish, polling all of them with one status request per poll.
+
+    Args:
+        fetch_statuses (callable): Returns the statuses of the jobs by job ID, e.g. a partial of
+            `fetch_job_statuses`.
+        job_ids (list): The jobs to wait for.
+        timeout (float, optional): The maximum time to wait in seconds. Defaults to None (no limit).
+        on_complete (callable, optional): Called with the job ID and status of every job as soon
+            as it finishes, e.g. to download its results. Defaults to None.
+        **poll_options: `initial_interval`, `max_interval`, `multiplier` and `jitter` of
+            `backoff_intervals`.
+
+    Returns:
+        dict: The final status, "Completed" or "Failed", of every job by job ID.
+
+    Raises:
+        TimeoutError: If a job did not finish within the timeout.
+    """
+    tracker = _JobTracker(job_ids, timeout, poll_options)
+    while True:
+        for job_id, status in tracker.update(fetch_statuses()):
+            if on_complete is not None:
+                on_complete(job_id, status)
+        if not tracker.pending:
+            return tracker.finished
+        time.sleep(tracker.next_delay())
+
+
+async def async_wait_for_jobs(fetch_statuses, job_ids, timeout=None, on_complete=None, **poll_options):
+    """
+    Async version of `wait_for_jobs`. `fetch_statuses` runs in the default executor, and
+    `on_complete` may be a coroutine function.
+    """
+    tracker = _JobTracker(job_ids, timeout, poll_options)
+    loop = asyncio.get_running_loop()
+    while True:
+        statuses = await loop.run_in_executor(None, fetch_statuses)
+        for job_id, status in tracker.update(statuses):
+            if on_complete is not None:
+                result = on_complete(job_id, status)
+                if inspect.isawaitable(result):
+                    await result
+        if not tracker.pending:
+            return tracker.finished
+        await asyncio.sleep(tracker.next_delay())
@@ -0,0 +1,228 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Request fields that do not change the response, left out of the cache key
+IGNORED_KEYS = frozenset({"api_key", "job_id", "log_level"})
+
+_lock = threading.Lock()
+_cache = None
+_configured = False
+
+
+def request_key(request, sample=None):
+    """
+    Return the cache key of an LLM request: a hash of its canonical JSON form.
+
+    Args:
+        request (dict): The request, e.g. the model, parameters and messages.
+        sample (optional): Distinguishes identical requests whose responses are expected to
+            differ, e.g. the batches of one generation. Defaults to None.
+
+    Returns:
+        str: The key.
+    """
+    request = {key: value for key, value in request.items() if key not in IGNORED_KEYS}
+    canonical = json.dumps([request, sample], sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class LLMCache:
+    """
+    A cache of LLM responses by request key: an in-memory LRU, optionally backed by a SQLite
+    file shared by every process that uses it.
+
+    Values are stored as JSON, so cached responses are copies that callers may modify.
+    """
+
+    def __init__(self, max_entries=1024, ttl=None, path=None, max_disk_entries=100_000):
+        """
+        Initializes the LLMCache.
+
+        Args:
+            max_entries (int, optional): The maximum number of responses kept in memory.
+                Defaults to 1024.
+            ttl (float, optional): How long a response is reused, in seconds. Defaults to None
+                (forever).
+            path (str, optional): A SQLite file the responses are persisted in. Defaults to None
+                (memory only).
+            max_disk_entries (int, optional): The maximum number of responses kept in the file,
+                the least recently used ones being evicted. Defaults to 100000.
+
+        Returns:
+            None
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self.max_disk_entries = max_disk_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key: (created, encoded value)
+        self._connection = None
+        self.hits = 0
+        self.misses = 0
+        if path:
+            self._connection = self._connect(os.path.expanduser(path))
+
+    @staticmethod
+    def _connect(path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        connection.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        return connection
+
+    def _expired(self, created, now):
+        return self.ttl is not None and now - created > self.ttl
+
+    def _remember(self, key, created, encoded):
+        self._entries[key] = (created, encoded)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, key):
+        """Return the cached value of a key, or None."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry[0], now):
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+            elif self._connection is not None:
+                entry = self._get_from_disk(key, now)
+                if entry is not None:
+                    self._remember(key, *entry)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(entry[1])
+
+    def _get_from_disk(self, key, now):
+        try:
+            row = self._connection.execute(
+                "SELECT created, value FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if self._expired(row[0], now):
+                self._connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            self._connection.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            return row
+        except sqlite3.Error as e:
+            logger.warning(f"Error reading the LLM cache {self.path}: {e}")
+            return None
+
+    def set(self, key, value):
+        """Cache a JSON-serializable value under a key."""
+        encoded = json.dumps(value)
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, encoded)
+            if self._connection is None:
+                return
+            try:
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                    (key, encoded, now, now),
+                )
+                self._connection.execute(
+                    "DELETE FROM responses WHERE key IN "
+                    "(SELECT key FROM responses ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                    (self.max_disk_entries,),
+                )
+            except sqlite3.Error as e:
+                logger.warning(f"Error writing the LLM cache {self.path}: {e}")
+
+    def clear(self):
+        """Remove every cached value, from memory and from the file."""
+        with self._lock:
+            self._entries.clear()
+            if self._connection is not None:
+                self._connection.execute("DELETE FROM responses")
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+def configure(cache):
+    """
+    Set the response cache used by every LLM call of the SDK: synthetic data generation, the
+    proxy and internal API completions, and guard execution.
+
+    Args:
+        cache (LLMCache, optional): The cache, or any object with the `get(key)` and
+            `set(key, value)` methods of LLMCache. None disables caching.
+
+    Returns:
+        None
+    """
+    global _cache, _configured
+    with _lock:
+        _cache, _configured = cache, True
+
+
+def get_cache():
+    """
+    Return the response cache, or None when caching is disabled. Unless `configure` was called,
+    caching is enabled by setting the RAGAAI_CATALYST_LLM_CACHE environment variable to the
+    path of a SQLite file.
+    """
+    global _cache, _configured
+    with _lock:
+        if not _configured:
+            path = os.getenv("RAGAAI_CATALYST_LLM_CACHE")
+            _cache = LLMCache(path=path) if path else None
+            _configured = True
+        return _cache
+
+
+def cached_completion(request, compute, sample=None, encode=None, decode=None):
+    """
+    Return the cached response of a request, or compute and cache it.
+
+    Args:
+        request (dict): The request, see `request_key`.
+        compute (callable): Makes the request and returns its response.
+        sample (optional): See `request_key`. Defaults to None.
+        encode (callable, optional): Converts a response to a JSON-serializable value, or to
+            None for a response that must not be cached. Defaults to the response itself.
+        decode (callable, optional): Converts a cached value back to a response. Defaults to
+            the value itself.
+
+    Returns:
+        The response.
+    """
+    cache = get_cache()
+    if cache is None:
+        return compute()
+    key = request_key(request, sample)
+    value = cache.get(key)
+    if value is not None:
+        logger.debug(f"LLM cache hit {key}")
+        return decode(value) if decode else value
+    response = compute()
+    value = encode(response) if encode else response
+    if value is not None:
+        cache.set(key, value)
+    return response
@@ -0,0 +1,157 @@
+import io
+import os
+import json
+import hashlib
+import logging
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import PyPDF2
+
+logger = logging.getLogger(__name__)
+
+# Pages extracted by one task of the process pool
+PAGES_PER_TASK = 16
+
+# The reader of the file a worker process extracts, kept across its tasks so that the file is
+# parsed once per worker
+_worker_reader = (None, None)
+
+
+def _iter_page_texts(pdf_reader, start, stop):
+    for i in range(start, stop):
+        yield pdf_reader.pages[i].extract_text()
+
+
+def _extract_pages(file_path, start, stop):
+    """Extract the text of pages [start, stop) of a PDF. Runs in a worker process."""
+    global _worker_reader
+    if _worker_reader[0] != file_path:
+        with open(file_path, 'rb') as file:
+            _worker_reader = (file_path, PyPDF2.PdfReader(io.BytesIO(file.read())))
+    return list(_iter_page_texts(_worker_reader[1], start, stop))
+
+
+def _file_hash(file_path):
+    """Hash the content of a file and the PyPDF2 version, which both determine the extracted text."""
+    digest = hashlib.sha256(PyPDF2.__version__.encode())
+    with open(file_path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _cache_path(file_path, cache_dir):
+    cache_dir = cache_dir or os.getenv("RAGAAI_CATALYST_PDF_CACHE")
+    if not cache_dir:
+        return None
+    return os.path.join(cache_dir, f"{_file_hash(file_path)}.json")
+
+
+def _load_cached_pages(cache_path):
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable PDF text cache {cache_path}: {e}")
+        return None
+
+
+def _store_cached_pages(cache_path, pages):
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        # Write to a temporary file first, so that readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(cache_path), suffix=".tmp")
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(pages, f)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        logger.warning(f"Could not write PDF text cache {cache_path}: {e}")
+
+
+def _iter_extracted_pages(file_path, max_workers, pages_per_task):
+    with open(file_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        num_pages = len(pdf_reader.pages)
+        ranges = [(start, min(start + pages_per_task, num_pages)) for start in range(0, num_pages, pages_per_task)]
+        max_workers = min(max_workers or 1, len(ranges))
+        if max_workers <= 1:
+            yield from _iter_page_texts(pdf_reader, 0, num_pages)
+            return
+
+    next_page = 0
+    executor = ProcessPoolExecutor(max_workers=max_workers)
+    try:
+        # Keep a bounded number of ranges in flight, so that a slow consumer does not
+        # accumulate the text of the whole file
+        pending = deque()
+        ranges = deque(ranges)
+        while pending or ranges:
+            while ranges and len(pending) < 2 * max_workers:
+                pending.append(executor.submit(_extract_pages, file_path, *ranges.popleft()))
+            pages = pending.popleft().result()
+            next_page += len(pages)
+            yield from pages
+    except BrokenProcessPool as e:
+        # Worker processes cannot start, e.g. under the spawn start method when the main
+        # module has no `if __name__ == "__main__":` guard
+        logger.warning(f"PDF extraction worker processes failed ({e}), extracting {file_path} in-process")
+    else:
+        return
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    with open(file_path, 'rb') as file:
+        yield from _iter_page_texts(PyPDF2.PdfReader(file), next_page, num_pages)
+
+
+def iter_pdf_pages(file_path, max_workers=None, pages_per_task=PAGES_PER_TASK, cache_dir=None):
+    """
+    Yield the text of the pages of a PDF in order, optionally extracting them in parallel in a
+    process pool.
+
+    Args:
+        file_path (str): The path to the PDF file.
+        max_workers (int, optional): The number of worker processes, e.g. `os.cpu_count()`.
+            Defaults to None, which extracts the pages in the calling process, as does a PDF of
+            at most `pages_per_task` pages. Worker processes are started with the default start
+            method of the platform; under spawn (macOS, Windows), the main module must be guarded
+            by `if __name__ == "__main__":`, or the extraction falls back to the calling process.
+        pages_per_task (int, optional): The number of pages extracted by one task of the pool.
+            Defaults to 16.
+        cache_dir (str, optional): A directory the extracted text is cached in, by file hash.
+            Defaults to the RAGAAI_CATALYST_PDF_CACHE environment variable, or no cache. The
+            text is cached once all pages have been yielded.
+
+    Yields:
+        str: The text of each page.
+    """
+    cache_path = _cache_path(file_path, cache_dir)
+    if cache_path:
+        pages = _load_cached_pages(cache_path)
+        if pages is not None:
+            logger.debug(f"Using cached text of {file_path}")
+            yield from pages
+            return
+
+    pages = [] if cache_path else None
+    for page in _iter_extracted_pages(file_path, max_workers, pages_per_task):
+        if pages is not None:
+            pages.append(page)
+        yield page
+    if cache_path:
+        _store_cached_pages(cache_path, pages)
+
+
+def extract_pdf_text(file_path, max_workers=None, pages_per_task=PAGES_PER_TASK, cache_dir=None):
+    """
+    Extract the text of a PDF. See `iter_pdf_pages`.
+
+    Returns:
+        str: The text of all pages, concatenated.
+    """
+    return "".join(iter_pdf_pages(file_path, max_workers, pages_per_task, cache_dir))
@@ -1,5 +1,7 @@
-import os
 import requests
+from . import transport
+from .token_manager import token_manager
+from .resolution_cache import resolution_cache
 import json
 import re
 from .ragaai_catalyst import RagaAICatalyst
@@ -26,32 +28,18 @@ class PromptManager:
         self.size = 99999 #Number of projects to fetch
 
         try:
-            response = requests.get(
-                f"{RagaAICatalyst.BASE_URL}/v2/llm/projects?size={self.size}",
-                headers={
-                    "Authorization": f'Bearer {os.getenv("RAGAAI_CATALYST_TOKEN")}',
-                },
-                timeout=self.timeout,
+            self.project_id = resolution_cache.get_project_id(
+                RagaAICatalyst.BASE_URL, project_name
             )
-            response.raise_for_status()
-            # logger.debug("Projects list retrieved successfully")
-
-            project_list = [
-                project["name"] for project in response.json()["data"]["content"]
-            ]
-            self.project_id = [
-            project["id"] for project in response.json()["data"]["content"] if project["name"]==project_name
-            ][0]
-
         except (KeyError, json.JSONDecodeError) as e:
             raise ValueError(f"Error parsing project list: {str(e)}")
 
-        if self.project_name not in project_list:
+        if self.project_id is None:
             raise ValueError("Project not found. Please enter a valid project name")
 
 
         self.headers = {
-                "Authorization": f'Bearer {os.getenv("RAGAAI_CATALYST_TOKEN")}',
+                "Authorization": f'Bearer {token_manager.get_token()}',
                 "X-Project-Id": str(self.project_id)
             }
 
@@ -165,7 +153,7 @@ class Prompt:
             ValueError: If there's an error parsing the prompt list.
         """
         try:
-            response = requests.get(url, headers=headers, timeout=timeout)
+            response = transport.get(url, headers=headers, timeout=timeout)
             response.raise_for_status()
             prompt_list = [prompt["name"] for prompt in response.json()["data"]]                        
             return prompt_list
@@ -193,7 +181,7 @@ class Prompt:
             ValueError: If there's an error parsing the prompt version.
         """
         try:
-            response = requests.get(f"{base_url}/version/{prompt_name}?version={version}",
+            response = transport.get(f"{base_url}/version/{prompt_name}?version={version}",
                                     headers=headers, timeout=timeout)
             response.raise_for_status()
         except requests.RequestException as e:
@@ -220,7 +208,7 @@ class Prompt:
             ValueError: If there's an error parsing the prompt version.
         """
         try:
-            response = requests.get(f"{base_url}/version/{prompt_name}",
+            response = transport.get(f"{base_url}/version/{prompt_name}",
                                 headers=headers, timeout=timeout)
             response.raise_for_status()
         except requests.RequestException as e:
@@ -298,7 +286,7 @@ class Prompt:
             ValueError: If there's an error parsing the prompt versions.
         """
         try:
-            response = requests.get(f"{base_url}/{prompt_name}/version",
+            response = transport.get(f"{base_url}/{prompt_name}/version",
                                     headers=headers, timeout=timeout)
             response.raise_for_status()
             version_names = [version["name"] for version in response.json()["data"]]
@@ -1,4 +1,6 @@
-import requests
+from . import transport
+from . import llm_cache
+from .rate_limiter import estimate_request_tokens
 import json
 import subprocess
 import logging
@@ -7,7 +9,32 @@ import traceback
 logger = logging.getLogger(__name__)
 
 def api_completion(model,messages, api_base='http://127.0.0.1:8000',
-                    api_key='',model_config=dict()):
+                    api_key='',model_config=dict(), sample=None, rate_limiter=None, validate=None):
+    # `validate` parses an output the way the caller will, e.g. ast.literal_eval, and raises
+    # if it cannot: a response with such an output is not cached, so that it is not replayed
+    request = {"api_base": api_base, **convert_input(messages,model,model_config)}
+    return llm_cache.cached_completion(
+        request,
+        lambda: _api_completion(model, messages, api_base, api_key, model_config, rate_limiter),
+        sample=sample,
+        encode=lambda all_response: _cacheable_response(all_response, validate),
+    )
+
+def _cacheable_response(all_response, validate):
+    """Return the response to cache, or None if one of its outputs could not be parsed."""
+    if None in all_response:
+        return None
+    if validate is not None:
+        try:
+            for output in all_response:
+                validate(output)
+        except Exception:
+            return None
+    return all_response
+
+def _api_completion(model,messages, api_base, api_key, model_config, rate_limiter):
+    if rate_limiter is not None:
+        rate_limiter.acquire(estimate_request_tokens(messages, model_config.get('max_tokens')))
     whoami = get_username()
     all_response = list()
     job_id = model_config.get('job_id',-1)
@@ -19,7 +46,7 @@ def api_completion(model,messages, api_base='http://127.0.0.1:8000',
         'Wd-PCA-Feature-Key':f'your_feature_key, $(whoami)'
     }
     try:
-        response = requests.request("POST", api_base, headers=headers, data=payload, verify=False)
+        response = transport.request("POST", api_base, headers=headers, data=payload, verify=False)
         if model_config.get('log_level','')=='debug':
             logger.info(f'Model response Job ID {job_id} {response.text}')
         if response.status_code!=200:
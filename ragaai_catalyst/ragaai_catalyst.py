@@ -1,6 +1,9 @@
 import os
 import logging
 import requests
+from . import transport
+from .token_manager import token_manager
+from .resolution_cache import resolution_cache
 from typing import Dict, Optional, Union
 
 logger = logging.getLogger("RagaAICatalyst")
@@ -54,6 +57,8 @@ class RagaAICatalyst:
 
         self.api_keys = api_keys or {}
 
+        # A token cached for other credentials or another server is of no use
+        token_manager.clear()
         if base_url:
             RagaAICatalyst.BASE_URL = base_url
             try:
@@ -100,14 +105,14 @@ class RagaAICatalyst:
         """
         headers = {
             "Content-Type": "application/json",
-            "Authorization": f"Bearer {os.getenv('RAGAAI_CATALYST_TOKEN')}",
+            "Authorization": f"Bearer {token_manager.get_token()}",
         }
         secrets = [
             {"type": service, "key": service, "value": key}
             for service, key in self.api_keys.items()
         ]
         json_data = {"secrets": secrets}
-        response = requests.post(
+        response = transport.post(
             f"{RagaAICatalyst.BASE_URL}/v1/llm/secrets/upload",
             headers=headers,
             json=json_data,
@@ -129,7 +134,10 @@ class RagaAICatalyst:
     @staticmethod
     def get_token() -> Union[str, None]:
         """
-        Retrieves a token from the server using the provided access key and secret key.
+        Retrieves a new token from the server using the provided access key and secret key.
+
+        Concurrent calls share a single request: callers arriving while a refresh is in progress,
+        or right after one, get its token. See `token_manager` for the cached token.
 
         Returns:
             - A string representing the token if successful.
@@ -141,6 +149,11 @@ class RagaAICatalyst:
             - ValueError: If there is a JSON decoding error or if authentication fails.
             - Exception: If there is an unexpected error while retrieving the token.
         """
+        return token_manager.refresh()
+
+    @staticmethod
+    def _fetch_token() -> Union[str, None]:
+        """Requests a token from the server. Use `get_token`, which avoids concurrent requests."""
         access_key = os.getenv("RAGAAI_CATALYST_ACCESS_KEY")
         secret_key = os.getenv("RAGAAI_CATALYST_SECRET_KEY")
 
@@ -153,7 +166,7 @@ class RagaAICatalyst:
         headers = {"Content-Type": "application/json"}
         json_data = {"accessKey": access_key, "secretKey": secret_key}
 
-        response = requests.post(
+        response = transport.post(
             f"{ RagaAICatalyst.BASE_URL}/token",
             headers=headers,
             json=json_data,
@@ -181,7 +194,6 @@ class RagaAICatalyst:
 
         token = token_response.get("data", {}).get("token")
         if token:
-            os.environ["RAGAAI_CATALYST_TOKEN"] = token
             print("Token(s) set successfully")
             return token
         else:
@@ -191,9 +203,9 @@ class RagaAICatalyst:
     def project_use_cases(self):
         try:
             headers = {
-            "Authorization": f'Bearer {os.getenv("RAGAAI_CATALYST_TOKEN")}',
+            "Authorization": f'Bearer {token_manager.get_token()}',
             }
-            response = requests.get(
+            response = transport.get(
                 f"{RagaAICatalyst.BASE_URL}/v2/llm/usecase",
                 headers=headers,
                 timeout=self.TIMEOUT
@@ -229,16 +241,17 @@ class RagaAICatalyst:
         json_data = {"name": project_name, "type": type, "usecase": usecase}
         headers = {
             "Content-Type": "application/json",
-            "Authorization": f'Bearer {os.getenv("RAGAAI_CATALYST_TOKEN")}',
+            "Authorization": f'Bearer {token_manager.get_token()}',
         }
         try:
-            response = requests.post(
+            response = transport.post(
                 f"{RagaAICatalyst.BASE_URL}/v2/llm/project",
                 headers=headers,
                 json=json_data,
                 timeout=self.TIMEOUT,
             )
             response.raise_for_status()
+            resolution_cache.invalidate()
             print(
                 f"Project Created Successfully with name {response.json()['data']['name']} & usecase {usecase}"
             )
@@ -249,16 +262,17 @@ class RagaAICatalyst:
                 logger.warning("Received 401 error. Attempting to refresh token.")
                 self.get_token()
                 headers["Authorization"] = (
-                    f'Bearer {os.getenv("RAGAAI_CATALYST_TOKEN")}'
+                    f'Bearer {token_manager.get_token()}'
                 )
                 try:
-                    response = requests.post(
+                    response = transport.post(
                         f"{RagaAICatalyst.BASE_URL}/v2/llm/project",
                         headers=headers,
                         json=json_data,
                         timeout=self.TIMEOUT,
                     )
                     response.raise_for_status()
+                    resolution_cache.invalidate()
                     print(
                         "Project Created Successfully with name %s after token refresh",
                         response.json()["data"]["name"],
@@ -298,10 +312,10 @@ class RagaAICatalyst:
             list: A list of project names retrieved successfully.
         """
         headers = {
-            "Authorization": f'Bearer {os.getenv("RAGAAI_CATALYST_TOKEN")}',
+            "Authorization": f'Bearer {token_manager.get_token()}',
         }
         try:
-            response = requests.get(
+            response = transport.get(
                 f"{RagaAICatalyst.BASE_URL}/v2/llm/projects?size={num_projects}",
                 headers=headers,
                 timeout=self.TIMEOUT,
@@ -319,10 +333,10 @@ class RagaAICatalyst:
                 logger.warning("Received 401 error. Attempting to refresh token.")
                 self.get_token()
                 headers["Authorization"] = (
-                    f'Bearer {os.getenv("RAGAAI_CATALYST_TOKEN")}'
+                    f'Bearer {token_manager.get_token()}'
                 )
                 try:
-                    response = requests.get(
+                    response = transport.get(
                         f"{RagaAICatalyst.BASE_URL}/v2/llm/projects",
                         headers=headers,
                         timeout=self.TIMEOUT,
@@ -366,10 +380,10 @@ class RagaAICatalyst:
     def list_metrics():
         headers = {
             "Content-Type": "application/json",
-            "Authorization": f'Bearer {os.getenv("RAGAAI_CATALYST_TOKEN")}',
+            "Authorization": f'Bearer {token_manager.get_token()}',
         }
         try:
-            response = requests.get(
+            response = transport.get(
                 f"{RagaAICatalyst.BASE_URL}/v1/llm/llm-metrics",
                 headers=headers,
                 timeout=RagaAICatalyst.TIMEOUT,
@@ -387,10 +401,10 @@ class RagaAICatalyst:
                 logger.warning("Received 401 error. Attempting to refresh token.")
                 self.get_token()
                 headers["Authorization"] = (
-                    f'Bearer {os.getenv("RAGAAI_CATALYST_TOKEN")}'
+                    f'Bearer {token_manager.get_token()}'
                 )
                 try:
-                    response = requests.get(
+                    response = transport.get(
                         f"{RagaAICatalyst.BASE_URL}/v1/llm/llm-metrics",
                         headers=headers,
                         timeout=self.TIMEOUT,
@@ -0,0 +1,93 @@
+import time
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Rough number of characters per token of English text, used to estimate the
+# tokens of a request before it is sent
+CHARS_PER_TOKEN = 4
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def estimate_tokens(*texts):
+    """Estimate the number of tokens of the given texts."""
+    return sum(len(text) for text in texts if text) // CHARS_PER_TOKEN + 1
+
+
+def estimate_request_tokens(messages, max_tokens=None):
+    """Estimate the tokens a request counts against the tokens per minute: its messages and at most max_tokens of output."""
+    return estimate_tokens(*(str(message.get("content", "")) for message in messages)) + (max_tokens or 0)
+
+
+class RateLimiter:
+    """
+    A thread-safe limit on the requests and tokens per minute sent to a provider.
+
+    Both limits are token buckets that refill continuously, so that up to a minute's worth of
+    requests can start at once and the rate then settles at the limit.
+    """
+
+    def __init__(self, rpm=None, tpm=None):
+        """
+        Args:
+            rpm (int, optional): The maximum number of requests per minute. Defaults to None (no limit).
+            tpm (int, optional): The maximum number of tokens per minute. Defaults to None (no limit).
+        """
+        if rpm is not None and rpm <= 0 or tpm is not None and tpm <= 0:
+            raise ValueError("rpm and tpm must be positive.")
+        self.rpm = rpm
+        self.tpm = tpm
+        self._requests = float(rpm or 0)
+        self._tokens = float(tpm or 0)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self._updated
+        self._updated = now
+        if self.rpm:
+            self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+        if self.tpm:
+            self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+
+    def acquire(self, tokens=0):
+        """
+        Block until a request of `tokens` tokens is within the limits, and count it.
+
+        A request larger than the tokens per minute waits for a full bucket instead of forever.
+        """
+        if self.tpm:
+            tokens = min(tokens, self.tpm)
+        while True:
+            with self._lock:
+                self._refill(time.monotonic())
+                wait = 0.0
+                if self.rpm and self._requests < 1:
+                    wait = (1 - self._requests) * 60 / self.rpm
+                if self.tpm and self._tokens < tokens:
+                    wait = max(wait, (tokens - self._tokens) * 60 / self.tpm)
+                if not wait:
+                    if self.rpm:
+                        self._requests -= 1
+                    if self.tpm:
+                        self._tokens -= tokens
+                    return
+            logger.debug(f"Rate limited, waiting {wait:.2f}s")
+            time.sleep(wait)
+
+
+def get_rate_limiter(key, rpm=None, tpm=None):
+    """
+    Return the rate limiter shared by every caller of the process with the same key, e.g. a
+    provider, or None without limits. A limiter with other limits is replaced.
+    """
+    if rpm is None and tpm is None:
+        return None
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None or (limiter.rpm, limiter.tpm) != (rpm, tpm):
+            limiter = _limiters[key] = RateLimiter(rpm=rpm, tpm=tpm)
+        return limiter
@@ -0,0 +1,230 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+
+from . import transport
+from .token_manager import token_manager
+
+logger = logging.getLogger(__name__)
+
+NUM_PROJECTS = 99999
+NUM_DATASETS = 12
+TIMEOUT = 10
+
+
+class ResolutionCache:
+    """
+    Process-wide cache of project and dataset name to ID resolutions.
+
+    Every client needs the ID of its project, which takes a listing of all projects. With the
+    cache, constructing several clients for the same project costs one listing. Entries expire
+    after `ttl` seconds, and a name that is not found triggers one fresh listing before it is
+    reported missing, so projects and datasets created elsewhere are picked up.
+
+    Setting the RAGAAI_CATALYST_RESOLUTION_CACHE environment variable to a file path keeps the
+    resolutions on disk, so that new processes start warm.
+    """
+
+    def __init__(self, ttl=300, cache_path=None):
+        """
+        Initializes the ResolutionCache.
+
+        Args:
+            ttl (float, optional): How long a listing is reused, in seconds. Defaults to 300.
+            cache_path (str, optional): A file the resolutions are persisted in. Defaults to the
+                RAGAAI_CATALYST_RESOLUTION_CACHE environment variable, or no file.
+
+        Returns:
+            None
+        """
+        self.ttl = ttl
+        self.cache_path = cache_path or os.getenv("RAGAAI_CATALYST_RESOLUTION_CACHE")
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._loaded = False
+
+    @staticmethod
+    def _scope(base_url):
+        # Projects visible to one set of credentials on one server
+        access_key = os.getenv("RAGAAI_CATALYST_ACCESS_KEY") or ""
+        return hashlib.sha256(f"{base_url}|{access_key}".encode()).hexdigest()
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self.cache_path:
+            return
+        try:
+            with open(self.cache_path, "r") as f:
+                self._entries = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.debug(f"Ignoring unreadable resolution cache {self.cache_path}: {e}")
+
+    def _save(self):
+        if not self.cache_path:
+            return
+        tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(self._entries, f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            logger.debug(f"Failed to write resolution cache {self.cache_path}: {e}")
+
+    def _fresh(self, entry):
+        return entry is not None and time.time() - entry["fetched_at"] < self.ttl
+
+    @staticmethod
+    def _send(method, url, headers, **kwargs):
+        token = token_manager.get_token()
+        headers = dict(headers, Authorization=f"Bearer {token}")
+        response = transport.request(method, url, headers=headers, timeout=TIMEOUT, **kwargs)
+        if response.status_code == 401:
+            token = token_manager.refresh(stale_token=token)
+            headers["Authorization"] = f"Bearer {token}"
+            response = transport.request(
+                method, url, headers=headers, timeout=TIMEOUT, **kwargs
+            )
+        response.raise_for_status()
+        logger.debug(f"Retrieved {url}")
+        return response
+
+    def _fetch_projects(self, base_url):
+        response = self._send(
+            "GET", f"{base_url}/v2/llm/projects?size={NUM_PROJECTS}", headers={}
+        )
+        return {
+            project["name"]: project["id"]
+            for project in response.json()["data"]["content"]
+        }
+
+    def _fetch_datasets(self, base_url, project_id):
+        response = self._send(
+            "POST",
+            f"{base_url}/v2/llm/dataset",
+            headers={
+                "Content-Type": "application/json",
+                "X-Project-Id": str(project_id),
+            },
+            json={
+                "size": NUM_DATASETS,
+                "page": "0",
+                "projectId": str(project_id),
+                "search": "",
+            },
+        )
+        return {
+            dataset["name"]: dataset["id"]
+            for dataset in response.json()["data"]["content"]
+        }
+
+    def _lookup(self, key, name, fetch, refresh):
+        with self._lock:
+            self._load()
+            entry = self._entries.get(key)
+            if not refresh and self._fresh(entry) and name in entry["ids"]:
+                return entry["ids"][name]
+            # Expired, missing, or the name is not known yet: list once more
+            entry = {"fetched_at": time.time(), "ids": fetch()}
+            self._entries[key] = entry
+            self._save()
+            return entry["ids"].get(name)
+
+    def get_projects(self, base_url, refresh=False):
+        """
+        Get the projects visible to the current credentials.
+
+        Args:
+            base_url (str): The base URL of the RagaAI Catalyst API.
+            refresh (bool, optional): Ignore the cached listing. Defaults to False.
+
+        Returns:
+            dict: The project IDs by project name.
+
+        Raises:
+            requests.exceptions.RequestException: If the projects could not be listed.
+        """
+        key = f"{self._scope(base_url)}:projects"
+        with self._lock:
+            self._load()
+            entry = self._entries.get(key)
+            if refresh or not self._fresh(entry):
+                entry = {"fetched_at": time.time(), "ids": self._fetch_projects(base_url)}
+                self._entries[key] = entry
+                self._save()
+            return dict(entry["ids"])
+
+    def get_project_id(self, base_url, project_name, refresh=False):
+        """
+        Resolve a project name to its ID.
+
+        Args:
+            base_url (str): The base URL of the RagaAI Catalyst API.
+            project_name (str): The name of the project.
+            refresh (bool, optional): Ignore the cached listing. Defaults to False.
+
+        Returns:
+            The ID of the project, or None if there is no such project.
+
+        Raises:
+            requests.exceptions.RequestException: If the projects could not be listed.
+        """
+        return self._lookup(
+            f"{self._scope(base_url)}:projects",
+            project_name,
+            lambda: self._fetch_projects(base_url),
+            refresh,
+        )
+
+    def get_dataset_id(self, base_url, project_id, dataset_name, refresh=False):
+        """
+        Resolve a dataset name to its ID.
+
+        Args:
+            base_url (str): The base URL of the RagaAI Catalyst API.
+            project_id: The ID of the project the dataset belongs to.
+            dataset_name (str): The name of the dataset.
+            refresh (bool, optional): Ignore the cached listing. Defaults to False.
+
+        Returns:
+            The ID of the dataset, or None if there is no such dataset.
+
+        Raises:
+            requests.exceptions.RequestException: If the datasets could not be listed.
+        """
+        return self._lookup(
+            f"{self._scope(base_url)}:datasets:{project_id}",
+            dataset_name,
+            lambda: self._fetch_datasets(base_url, project_id),
+            refresh,
+        )
+
+    def invalidate(self, project_id=None):
+        """
+        Drop cached resolutions, e.g. after creating a project or a dataset.
+
+        Args:
+            project_id (optional): Only drop the datasets of this project. Defaults to None,
+                which drops everything.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._load()
+            if project_id is None:
+                self._entries.clear()
+            else:
+                suffix = f":datasets:{project_id}"
+                for key in [key for key in self._entries if key.endswith(suffix)]:
+                    del self._entries[key]
+            self._save()
+
+
+resolution_cache = ResolutionCache()
@@ -0,0 +1,398 @@
+import re
+import json
+import time
+import uuid
+import base64
+import random
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+
+def _make_token(ttl):
+    """Return an unsigned JWT that expires in `ttl` seconds, so that token expiry is exercised."""
+
+    def encode(obj):
+        return base64.urlsafe_b64encode(json.dumps(obj).encode()).rstrip(b"=").decode()
+
+    header = encode({"alg": "none", "typ": "JWT"})
+    # A unique ID, so that tokens issued within the same second differ like real ones
+    payload = encode({"sub": "stub", "exp": int(time.time() + ttl), "jti": uuid.uuid4().hex})
+    return f"{header}.{payload}.stub"
+
+
+class StubCatalystServer:
+    """
+    A local stand-in for the RagaAI Catalyst API, for benchmarks and offline testing.
+
+    The server implements the endpoints the SDK uses to authenticate, construct its clients,
+    upload traces and CSV datasets, poll jobs and run guardrail deployments, and answers them
+    from memory. Uploaded files are counted and discarded. It runs on a background thread of the
+    calling process. Point the SDK at it through `base_url`:
+
+        with StubCatalystServer(projects={"my-project": 1}) as server:
+            catalyst = RagaAICatalyst(access_key="key", secret_key="secret", base_url=server.base_url)
+            tracer = Tracer(project_name="my-project", dataset_name="traces", tracer_type="langchain")
+
+    Latency and errors can be injected for every endpoint, or for some endpoints with `inject`, to
+    measure how the SDK behaves against a slow or unreliable server.
+    """
+
+    def __init__(
+        self,
+        host="127.0.0.1",
+        port=0,
+        projects=None,
+        datasets=None,
+        token_ttl=3600,
+        latency=0.0,
+        error_rate=0.0,
+        error_status=500,
+        seed=None,
+    ):
+        """
+        Initializes the StubCatalystServer. The server is started by `start`.
+
+        Args:
+            host (str, optional): The address to listen on. Defaults to "127.0.0.1".
+            port (int, optional): The port to listen on. Defaults to 0, which picks a free port.
+            projects (dict, optional): The project IDs by project name. Defaults to one project
+                named "stub-project".
+            datasets (dict, optional): The dataset IDs by dataset name, for every project.
+                Defaults to one dataset named "stub-dataset".
+            token_ttl (float, optional): The lifetime in seconds of the issued tokens. Defaults to 3600.
+            latency (float or tuple, optional): The delay in seconds before every response, or a
+                (min, max) range to draw it from uniformly. Defaults to 0.
+            error_rate (float, optional): The fraction of requests answered with `error_status`
+                instead of being served. Defaults to 0.
+            error_status (int, optional): The status code of injected errors. Defaults to 500.
+            seed (int, optional): Seeds the random draws of latency and errors. Defaults to None.
+
+        Returns:
+            None
+        """
+        self.host = host
+        self.port = port
+        self.projects = dict(projects) if projects is not None else {"stub-project": 1}
+        self.datasets = dict(datasets) if datasets is not None else {"stub-dataset": 1}
+        self.token_ttl = token_ttl
+        self.jobs = {}
+        self.deployments = {}
+        self.uploads = {}
+        self.traces = []
+        self.guardrail_requests = []
+        self.request_counts = {}
+        self._counts_lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        self._faults = []
+        self._random = random.Random(seed)
+        self.inject(r".*", latency=latency, error_rate=error_rate, error_status=error_status)
+        self._routes = []
+        self._server = None
+        self._thread = None
+        self._register_routes()
+
+    def route(self, method, pattern, handler):
+        """
+        Add an endpoint, or replace the endpoint with the same method and pattern.
+
+        Args:
+            method (str): The HTTP method.
+            pattern (str): A regular expression matched against the whole request path,
+                without the query string.
+            handler (callable): Called with the `StubRequest`. Returns the status code and the
+                JSON body of the response.
+
+        Returns:
+            None
+        """
+        compiled = re.compile(pattern)
+        self._routes = [
+            route for route in self._routes
+            if not (route[0] == method and route[1].pattern == pattern)
+        ]
+        self._routes.append((method, compiled, handler))
+
+    def inject(self, pattern, latency=0.0, error_rate=0.0, error_status=500):
+        """
+        Set the latency and errors of the endpoints whose path matches a pattern.
+
+        The most recently injected pattern that matches a path applies, so specific patterns
+        injected after the default `.*` override it.
+
+        Args:
+            pattern (str): A regular expression matched against the whole request path.
+            latency (float or tuple, optional): The delay in seconds before the response, or a
+                (min, max) range to draw it from uniformly. Defaults to 0.
+            error_rate (float, optional): The fraction of requests answered with `error_status`.
+                Defaults to 0.
+            error_status (int, optional): The status code of injected errors. Defaults to 500.
+
+        Returns:
+            None
+        """
+        if not 0.0 <= error_rate <= 1.0:
+            raise ValueError("error_rate must be between 0 and 1.")
+        compiled = re.compile(pattern)
+        fault = (compiled, latency, error_rate, error_status)
+        with self._state_lock:
+            self._faults = [f for f in self._faults if f[0].pattern != pattern]
+            self._faults.insert(0, fault)
+
+    def _fault(self, path):
+        with self._state_lock:
+            for pattern, latency, error_rate, error_status in self._faults:
+                if pattern.fullmatch(path):
+                    break
+            else:
+                return 0.0, None
+            if isinstance(latency, (tuple, list)):
+                latency = self._random.uniform(*latency)
+            error = error_status if self._random.random() < error_rate else None
+        return latency, error
+
+    def add_job(self, status="Completed"):
+        """
+        Add a job to the job status listing.
+
+        Args:
+            status (str, optional): The status of the job, e.g. "In Progress", "Completed" or
+                "Failed". Defaults to "Completed".
+
+        Returns:
+            int: The ID of the job.
+        """
+        with self._state_lock:
+            job_id = len(self.jobs) + 1
+            self.jobs[job_id] = status
+        return job_id
+
+    def add_deployment(self, deployment_id=1, status="PASS", alternate_response=None):
+        """
+        Add a guardrail deployment.
+
+        Args:
+            deployment_id (int, optional): The ID of the deployment. Defaults to 1.
+            status (str, optional): The status returned by every run of the deployment, "PASS"
+                or "FAIL". Defaults to "PASS".
+            alternate_response (str, optional): The response returned with a "FAIL" status.
+                Defaults to None.
+
+        Returns:
+            None
+        """
+        with self._state_lock:
+            self.deployments[str(deployment_id)] = {
+                "status": status,
+                "alternateResponse": alternate_response,
+            }
+
+    def _register_routes(self):
+        self.route("POST", r"/token", self._token)
+        self.route("GET", r"/v2/llm/projects", self._list_projects)
+        self.route("POST", r"/v2/llm/dataset", self._list_datasets)
+        self.route("POST", r"/v1/llm/dataset/logs", self._ok)
+        self.route("GET", r"/v1/llm/master-dataset/schema/[^/]+", self._ok)
+        self.route("GET", r"/v1/llm/presigned-url", self._trace_presigned_urls)
+        self.route("POST", r"/v1/llm/insert/trace", self._insert_trace)
+        self.route("GET", r"/v2/llm/dataset/csv/presigned-url", self._csv_presigned_url)
+        self.route("POST", r"/v2/llm/dataset/csv", self._insert_csv)
+        self.route("PUT", r"/_upload/[^/]+", self._upload)
+        self.route("GET", r"/job/status", self._job_status)
+        self.route("GET", r"/guardrail/deployment/[^/]+", self._get_deployment)
+        self.route("POST", r"/guardrail/deployment/[^/]+/ingest", self._ingest)
+
+    @staticmethod
+    def _ok(request):
+        return 200, {"success": True, "data": {}}
+
+    def _token(self, request):
+        body = request.json() or {}
+        if not body.get("accessKey") or not body.get("secretKey"):
+            return 400, {"success": False, "message": "Please enter valid credentials"}
+        return 200, {"success": True, "data": {"token": _make_token(self.token_ttl)}}
+
+    def _list_projects(self, request):
+        content = [{"id": id, "name": name} for name, id in self.projects.items()]
+        return 200, {"success": True, "data": {"content": content}}
+
+    def _list_datasets(self, request):
+        content = [{"id": id, "name": name} for name, id in self.datasets.items()]
+        return 200, {"success": True, "data": {"content": content}}
+
+    def _presigned_url(self):
+        return f"{self.base_url}/_upload/{uuid.uuid4().hex}"
+
+    def _trace_presigned_urls(self, request):
+        num_files = int((request.json() or {}).get("numFiles", 1))
+        urls = [self._presigned_url() for _ in range(num_files)]
+        return 200, {"success": True, "data": {"presignedUrls": urls}}
+
+    def _insert_trace(self, request):
+        body = request.json() or {}
+        with self._state_lock:
+            self.traces.append(body)
+        return 200, {"success": True, "data": {}}
+
+    def _csv_presigned_url(self, request):
+        url = self._presigned_url()
+        file_name = f"{url.rsplit('/', 1)[1]}.csv"
+        return 200, {"success": True, "data": {"presignedUrl": url, "fileName": file_name}}
+
+    def _insert_csv(self, request):
+        body = request.json() or {}
+        name = body.get("datasetName")
+        with self._state_lock:
+            if name in self.datasets:
+                return 400, {"success": False, "message": f"Dataset {name} already exists"}
+            self.datasets[name] = max(self.datasets.values(), default=0) + 1
+        return 200, {"success": True, "message": f"Dataset {name} uploaded successfully"}
+
+    def _upload(self, request):
+        with self._state_lock:
+            self.uploads[request.path] = len(request.body)
+        return 201, {}
+
+    def _job_status(self, request):
+        with self._state_lock:
+            content = [{"id": id, "status": status} for id, status in self.jobs.items()]
+        return 200, {"success": True, "message": "Jobs retrieved", "data": {"content": content}}
+
+    def _deployment(self, path):
+        deployment_id = path.split("/")[3]
+        with self._state_lock:
+            return deployment_id, self.deployments.get(deployment_id)
+
+    def _get_deployment(self, request):
+        deployment_id, deployment = self._deployment(request.path)
+        if deployment is None:
+            return 404, {"success": False, "message": f"Deployment {deployment_id} not found"}
+        data = {"id": deployment_id, "name": f"stub-deployment-{deployment_id}", "guardrailsResponse": []}
+        return 200, {"success": True, "data": data}
+
+    def _ingest(self, request):
+        deployment_id, deployment = self._deployment(request.path)
+        if deployment is None:
+            return 404, {"success": False, "message": f"Deployment {deployment_id} not found"}
+        with self._state_lock:
+            self.guardrail_requests.append(request.json())
+        return 200, {"success": True, "data": dict(deployment, results=[])}
+
+    def _dispatch(self, request):
+        with self._counts_lock:
+            key = f"{request.method} {request.path}"
+            self.request_counts[key] = self.request_counts.get(key, 0) + 1
+        latency, error = self._fault(request.path)
+        if latency:
+            time.sleep(latency)
+        if error is not None:
+            return error, {"success": False, "message": "Injected error"}
+        for method, pattern, handler in self._routes:
+            if method == request.method and pattern.fullmatch(request.path):
+                return handler(request)
+        return 404, {"success": False, "message": f"No stub for {request.method} {request.path}"}
+
+    @property
+    def base_url(self):
+        """The base URL to pass to the SDK, e.g. "http://127.0.0.1:54321"."""
+        if self._server is None:
+            raise RuntimeError("The stub server is not running.")
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """
+        Start serving on a background thread.
+
+        Returns:
+            StubCatalystServer: The server itself.
+        """
+        if self._server is not None:
+            return self
+        self._server = ThreadingHTTPServer((self.host, self.port), _make_handler(self))
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(
+            name="StubCatalystServer", target=self._server.serve_forever, daemon=True
+        )
+        self._thread.start()
+        logger.debug(f"Stub Catalyst server listening on {self.base_url}")
+        return self
+
+    def stop(self):
+        """Stop serving and close the listening socket."""
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        self._server = None
+        self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+class StubRequest:
+    """A request received by the StubCatalystServer."""
+
+    def __init__(self, method, path, query, headers, body):
+        self.method = method
+        self.path = path
+        self.query = query
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        """Return the parsed JSON body, or None if the body is empty or not JSON."""
+        try:
+            return json.loads(self.body) if self.body else None
+        except ValueError:
+            return None
+
+
+def _make_handler(server):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body are written separately, do not let Nagle's algorithm delay the body
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):
+            logger.debug(format % args)
+
+        def _handle(self):
+            path, _, query = self.path.partition("?")
+            body = self._read_body()
+            request = StubRequest(self.command, path, query, self.headers, body)
+            try:
+                status, payload = server._dispatch(request)
+            except Exception as e:
+                logger.exception(f"Stub handler for {self.command} {path} failed")
+                status, payload = 500, {"success": False, "message": str(e)}
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _read_body(self):
+            if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+                chunks = []
+                while True:
+                    size = int(self.rfile.readline().split(b";")[0], 16)
+                    if size == 0:
+                        self.rfile.readline()
+                        return b"".join(chunks)
+                    chunks.append(self.rfile.read(size))
+                    self.rfile.readline()
+            length = int(self.headers.get("Content-Length") or 0)
+            return self.rfile.read(length) if length else b""
+
+        do_GET = do_POST = do_PUT = do_DELETE = _handle
+
+    return Handler
@@ -2,7 +2,6 @@ import os
 from groq import Groq
 import google.generativeai as genai
 import openai
-import PyPDF2
 import csv
 import markdown
 import pandas as pd
@@ -16,23 +15,63 @@ from .proxy_call import api_completion as proxy_api_completion
 # from ragaai_catalyst import internal_api_completion
 # from ragaai_catalyst import proxy_call
 import ast
+import re
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .pdf_extraction import extract_pdf_text
+from . import llm_cache
+from .dedup import DedupIndex, SIMILARITY_THRESHOLD
+from .rate_limiter import get_rate_limiter, estimate_request_tokens, CHARS_PER_TOKEN
+
+logger = logging.getLogger(__name__)
 
 # dotenv.load_dotenv()
 
+
+def _strip_list_prefix(content):
+    """Remove any prefix before the JSON list of an LLM response."""
+    list_start_index = content.find('[')
+    return content[list_start_index:] if list_start_index != -1 else content
+
+
+def _cacheable_content(content):
+    """Return the content of a response to cache, or None if it is not valid JSON."""
+    try:
+        json.loads(_strip_list_prefix(content))
+    except (json.JSONDecodeError, AttributeError):
+        return None
+    return content
+
+
 class SyntheticDataGeneration:
     """
     A class for generating synthetic data using various AI models and processing different document types.
     """
 
+    FAILURE_CASES = [
+        "Invalid API key provided",
+        "No connection adapters",
+        "Required API Keys are not set",
+        "litellm.BadRequestError",
+        "litellm.AuthenticationError"]
+
+    SUPPORTED_EXTENSIONS = ('.pdf', '.txt', '.md', '.csv')
+
+    # Replenishments in a row without a new question after which generation stops short
+    MAX_IDLE_ROUNDS = 5
+
     def __init__(self):
         """
         Initialize the SyntheticDataGeneration class with API clients for Groq, Gemini, and OpenAI.
         """
 
-    def generate_qna(self, text, question_type="simple", n=5, model_config=dict(), api_key=None, **kwargs):
+    def generate_qna(self, text, question_type="simple", n=5, model_config=dict(), api_key=None,
+                     max_workers=4, rpm=None, tpm=None, similarity_threshold=SIMILARITY_THRESHOLD, **kwargs):
         """
         Generate questions based on the given text using the specified model and provider.
-        Uses batch processing for larger values of n to maintain response quality.
+        Uses batch processing for larger values of n to maintain response quality, and generates
+        up to `max_workers` batches concurrently.
 
         Args:
             text (str): The input text to generate questions from.
@@ -40,6 +79,14 @@ class SyntheticDataGeneration:
             n (int): The number of question/answer pairs to generate.
             model_config (dict): Configuration for the model including provider and model name.
             api_key (str, optional): The API key for the selected provider.
+            max_workers (int): The maximum number of batches generated concurrently. Defaults to 4.
+            rpm (int, optional): The maximum number of requests per minute to the provider, shared
+                by every generation of the process. Defaults to None (no limit).
+            tpm (int, optional): The maximum number of tokens per minute to the provider, shared
+                by every generation of the process. Defaults to None (no limit).
+            similarity_threshold (float, optional): The similarity from which two questions are
+                duplicates, see `DedupIndex`. None drops exact duplicates only, ignoring case,
+                punctuation and whitespace. Defaults to SIMILARITY_THRESHOLD (0.9).
             **kwargs: Additional keyword arguments.
 
         Returns:
@@ -48,96 +95,167 @@ class SyntheticDataGeneration:
         Raises:
             ValueError: If an invalid provider is specified or API key is missing.
         """
+        records = self._generate_qna_records(
+            [(text, n)], question_type, model_config, api_key, max_workers, rpm, tpm, similarity_threshold, kwargs
+        )
+        final_df = pd.DataFrame([record for _, record in records])
+        # Reset index starting from 1
+        final_df.index = range(1, len(final_df) + 1)
+        return final_df
+
+    def generate_qna_from_corpus(self, input_data, question_type="simple", n=5, model_config=dict(), api_key=None,
+                                 chunk_tokens=1000, max_workers=4, rpm=None, tpm=None, similarity_threshold=SIMILARITY_THRESHOLD,
+                                 pdf_workers=None, **kwargs):
+        """
+        Generate questions from a corpus of documents, split into chunks of at most `chunk_tokens`
+        tokens. The n questions are spread across the chunks in proportion to their length, and
+        every batch is sent with its chunk only, so the input tokens per question depend on the
+        chunk size instead of the document size.
+
+        Args:
+            input_data (str or list): A directory, a file path, or a list of file paths or texts.
+            question_type (str): The type of questions to generate ('simple', 'mcq', or 'complex').
+            n (int): The number of question/answer pairs to generate.
+            model_config (dict): Configuration for the model including provider and model name.
+            api_key (str, optional): The API key for the selected provider.
+            chunk_tokens (int): The maximum number of tokens of a chunk. Defaults to 1000.
+            max_workers (int): The maximum number of batches generated concurrently. Defaults to 4.
+            rpm (int, optional): The maximum number of requests per minute to the provider.
+            tpm (int, optional): The maximum number of tokens per minute to the provider.
+            similarity_threshold (float, optional): The similarity from which two questions are
+                duplicates, across the whole corpus. Defaults to SIMILARITY_THRESHOLD (0.9).
+            pdf_workers (int, optional): The number of worker processes that extract the pages of
+                a PDF, see `process_document`. Defaults to None (in-process).
+            **kwargs: Additional keyword arguments.
+
+        Returns:
+            pandas.DataFrame: A DataFrame containing exactly n generated questions and answers, with
+                the document each question was generated from in a Source column.
+
+        Raises:
+            ValueError: If the corpus has no text, or if an invalid provider is specified or API key is missing.
+        """
+        chunks = [
+            (source, chunk)
+            for source, text in self.process_corpus(input_data, pdf_workers=pdf_workers).items()
+            for chunk in self.chunk_text(text, chunk_tokens)
+        ]
+        if not chunks:
+            raise ValueError("The corpus has no text to generate questions from.")
+        counts = self._allocate(n, [len(chunk) for _, chunk in chunks])
+        targets = [(chunk, count) for (_, chunk), count in zip(chunks, counts) if count]
+        sources = [source for (source, _), count in zip(chunks, counts) if count]
+
+        records = self._generate_qna_records(
+            targets, question_type, model_config, api_key, max_workers, rpm, tpm, similarity_threshold, kwargs
+        )
+        final_df = pd.DataFrame([dict(record, Source=sources[target]) for target, record in records])
+        final_df.index = range(1, len(final_df) + 1)
+        return final_df
+
+    def _generate_qna_records(self, targets, question_type, model_config, api_key, max_workers, rpm, tpm,
+                              similarity_threshold, kwargs):
+        """
+        Generate the given number of unique questions from each text of `targets`.
+
+        The texts are split into batches generated concurrently. Duplicates of questions already
+        generated are dropped, and texts that came short are replenished, until every text has its
+        count, nothing was generated at all, or MAX_IDLE_ROUNDS replenishments in a row added no
+        question, e.g. because a short text has no more distinct questions to ask.
+
+        Args:
+            targets (list): (text, count) pairs.
+
+        Returns:
+            list: (target index, record) pairs, in the order of `targets` and of the batches.
+        """
         BATCH_SIZE = 5  # Optimal batch size for maintaining response quality
         provider = model_config.get("provider")
-        model = model_config.get("model")
         api_base = model_config.get("api_base")
 
         # Initialize the appropriate client based on provider
         self._initialize_client(provider, api_key, api_base, internal_llm_proxy=kwargs.get("internal_llm_proxy", None))
+        rate_limiter = get_rate_limiter(provider, rpm=rpm, tpm=tpm)
+
+        def generate_batch(task):
+            target, batch_size, sample = task
+            text = targets[target][0]
+            system_message = self._get_system_message(question_type, batch_size)
+            if "internal_llm_proxy" in kwargs:
+                return self._generate_internal_response(text, system_message, model_config, kwargs, rate_limiter, sample)
+            return self._generate_batch_response(text, system_message, provider, model_config, api_key, api_base, rate_limiter, sample)
+
+        needed = [count for _, count in targets]
+        accepted = []  # ((round, batch index), target, record)
+        dedup_index = DedupIndex(threshold=similarity_threshold)
 
         # Initialize progress bar
-        pbar = tqdm(total=n, desc="Generating QA pairs")
-        
-        # Initial generation phase
-        num_batches = (n + BATCH_SIZE - 1) // BATCH_SIZE
-        all_responses = []
-
-        FAILURE_CASES = [
-            "Invalid API key provided",
-            "No connection adapters", 
-            "Required API Keys are not set",
-            "litellm.BadRequestError",
-            "litellm.AuthenticationError"]
-        
-        for _ in range(num_batches):
-            current_batch_size = min(BATCH_SIZE, n - len(all_responses))
-            if current_batch_size <= 0:
-                break
-                
-            try:
-                system_message = self._get_system_message(question_type, current_batch_size)
-                
-                if "internal_llm_proxy" in kwargs:
-                    batch_df = self._generate_internal_response(text, system_message, model_config, kwargs)
-                else:
-                    batch_df = self._generate_batch_response(text, system_message, provider, model_config, api_key, api_base)
-                
-                if not batch_df.empty and len(batch_df) > 0:
-                    all_responses.extend(batch_df.to_dict('records'))
-                    pbar.update(len(batch_df))
-                    
-            except Exception as e:
-                print(f"Batch generation failed.")
+        pbar = tqdm(total=sum(needed), desc="Generating QA pairs")
+
+        def add_batch(key, task, batch_df):
+            target = task[0]
+            for record in batch_df.to_dict('records'):
+                if not needed[target]:
+                    break
+                if dedup_index.add(record['Question']):
+                    needed[target] -= 1
+                    accepted.append((key, target, record))
+                    pbar.update(1)
+
+        # The initial generation, then replenishment of the questions dropped as duplicates
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            round_number = 0
+            idle_rounds = 0
+            while sum(needed) and (round_number == 0 or accepted) and idle_rounds < self.MAX_IDLE_ROUNDS:
+                num_accepted = len(accepted)
+                # The sample of a batch tells apart the cached responses of identical batches
+                tasks = [
+                    (target, min(BATCH_SIZE, count - start), [round_number, start])
+                    for target, count in enumerate(needed)
+                    for start in range(0, count, BATCH_SIZE)
+                ]
+                self._generate_batches(
+                    executor, generate_batch, tasks,
+                    lambda index, task, batch_df: add_batch((round_number, index), task, batch_df),
+                    "Batch generation failed." if round_number == 0 else "Replenishment generation failed",
+                )
+                round_number += 1
+                idle_rounds = idle_rounds + 1 if len(accepted) == num_accepted else 0
 
-                if any(error in str(e) for error in FAILURE_CASES):
-                    raise Exception(f"{e}")
+        pbar.close()
+        if sum(needed) and accepted:
+            logger.warning(f"Stopped after {idle_rounds} replenishments without a new question, "
+                           f"{sum(needed)} questions short.")
 
-                else:
-                    print(f"Retrying...")
-                    continue
-        
-        
-        # Convert to DataFrame and remove duplicates
-        result_df = pd.DataFrame(all_responses)
-        result_df = result_df.drop_duplicates(subset=['Question'])
-        
-        # Replenish phase - generate additional questions if needed due to duplicates
-        while (len(result_df) < n) and ((len(result_df) >= 1)):
-            questions_needed = n - len(result_df)
-            try:
-                system_message = self._get_system_message(question_type, questions_needed)
-                
-                if "internal_llm_proxy" in kwargs:
-                    additional_df = self._generate_internal_response(text, system_message, model_config, kwargs)
-                else:
-                    additional_df = self._generate_batch_response(text, system_message, provider, model_config, api_key, api_base)
-                
-                if not additional_df.empty and len(additional_df) > 0:
-                    # Only add questions that aren't already in result_df
-                    new_questions = additional_df[~additional_df['Question'].isin(result_df['Question'])]
-                    if not new_questions.empty:
-                        result_df = pd.concat([result_df, new_questions], ignore_index=True)
-                        result_df = result_df.drop_duplicates(subset=['Question'])
-                        pbar.update(len(new_questions))
-                    
-            except Exception as e:
-                print(f"Replenishment generation failed")
+        accepted.sort(key=lambda item: (item[1], item[0]))
+        return [(target, record) for _, target, record in accepted]
 
-                if any(error in str(e) for error in FAILURE_CASES):
-                    raise Exception(f"{e}")
-                
-                else:
-                    print("An unexpected error occurred. Retrying...")
+    def _generate_batches(self, executor, generate_batch, tasks, on_batch, failure_message):
+        """
+        Generate a batch for every task concurrently, calling `on_batch(index, task, batch_df)` in
+        the calling thread as each batch arrives.
+
+        A batch that fails is skipped, unless the failure is one of FAILURE_CASES, which no retry
+        would fix: then the pending batches are cancelled and the failure is raised.
+        """
+        futures = {executor.submit(generate_batch, task): index for index, task in enumerate(tasks)}
+        try:
+            for future in as_completed(futures):
+                try:
+                    batch_df = future.result()
+                except Exception as e:
+                    print(failure_message)
+                    if any(error in str(e) for error in self.FAILURE_CASES):
+                        raise Exception(f"{e}")
+                    print("Retrying...")
                     continue
-        
-        pbar.close()
-        
-        # Ensure exactly n rows and reset index starting from 1
-        final_df = result_df.head(n)
-        final_df.index = range(1, len(final_df) + 1)
-        
-        return final_df
+                if batch_df is not None and not batch_df.empty:
+                    index = futures[future]
+                    on_batch(index, tasks[index], batch_df)
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
 
     def _initialize_client(self, provider, api_key, api_base=None, internal_llm_proxy=None):
         """Initialize the appropriate client based on provider."""
@@ -162,36 +280,41 @@ class SyntheticDataGeneration:
         else:
             raise ValueError(f"Provider is not recognized.")
 
-    def _generate_batch_response(self, text, system_message, provider, model_config, api_key, api_base):
-        """Generate a batch of responses using the specified provider."""
+    def _generate_batch_response(self, text, system_message, provider, model_config, api_key, api_base, rate_limiter=None, sample=None):
+        """
+        Generate a batch of responses using the specified provider. `sample` tells apart the
+        cached responses of identical batches, and each attempt is cached separately.
+        """
         MAX_RETRIES = 3
         
         for attempt in range(MAX_RETRIES):
             try:
                 if provider == "gemini" and api_base:
                     messages = [{'role': 'user', 'content': system_message + text}]
-                    response = proxy_api_completion(messages=messages, model=model_config["model"], api_base=api_base)
+                    response = proxy_api_completion(messages=messages, model=model_config["model"], api_base=api_base,
+                                                    sample=[sample, attempt], rate_limiter=rate_limiter,
+                                                    validate=ast.literal_eval)
                     # response = proxy_call.api_completion(messages=messages, model=model_config["model"], api_base=api_base)
                     return pd.DataFrame(ast.literal_eval(response[0]))
                 else:
-                    return self._generate_llm_response(text, system_message, model_config, api_key)
-            except (json.JSONDecodeError, ValueError) as e:
+                    return self._generate_llm_response(text, system_message, model_config, api_key,
+                                                       sample=[sample, attempt], rate_limiter=rate_limiter)
+            except (json.JSONDecodeError, ValueError, SyntaxError) as e:
                 if attempt == MAX_RETRIES - 1:
                     raise Exception(f"Failed to generate valid response after {MAX_RETRIES} attempts: {str(e)}")
                 continue
 
-    def _generate_internal_response(self, text, system_message, model_config, kwargs):
+    def _generate_internal_response(self, text, system_message, model_config, kwargs, rate_limiter=None, sample=None):
         """Generate response using internal API."""
         messages = [{'role': 'user', 'content': system_message + text}]
         return internal_api_completion(
             messages=messages,
             model_config=model_config,
-            kwargs=kwargs
+            kwargs=kwargs,
+            sample=sample,
+            rate_limiter=rate_limiter,
         )
 
-
-        
-          
     def _get_system_message(self, question_type, n):
         """
         Get the appropriate system message for the specified question type.
@@ -235,7 +358,7 @@ class SyntheticDataGeneration:
         else:
             raise ValueError("Invalid question type")
 
-    def _generate_llm_response(self, text, system_message, model_config, api_key=None):
+    def _generate_llm_response(self, text, system_message, model_config, api_key=None, sample=None, rate_limiter=None):
         """
         Generate questions using LiteLLM which supports multiple providers (OpenAI, Groq, Gemini, etc.).
 
@@ -250,6 +373,8 @@ class SyntheticDataGeneration:
                 - max_tokens: Maximum tokens in response
                 - temperature: Temperature for response generation
             api_key (str, optional): The API key for the model provider.
+            sample (optional): Tells apart the cached responses of identical requests.
+            rate_limiter (RateLimiter, optional): Acquired before the request is sent.
 
         Returns:
             pandas.DataFrame: A DataFrame containing the generated questions and answers.
@@ -279,23 +404,25 @@ class SyntheticDataGeneration:
         if "temperature" in model_config:
             completion_params["temperature"] = model_config["temperature"]
 
-        # Make the API call using LiteLLM
-        try:
-            response = completion(**completion_params)
-        except Exception as e:
-            if any(error in str(e).lower() for error in ["invalid api key", "incorrect api key", "unauthorized", "authentication"]):
-                raise ValueError(f"Invalid API key provided for {model_config.get('provider', 'the specified')} provider")
-            raise Exception(f"Error calling LLM API: {str(e)}")
-
-        # Extract the content from the response
-        content = response.choices[0].message.content
+        # Make the API call using LiteLLM, unless the response is cached
+        def request_content():
+            if rate_limiter is not None:
+                rate_limiter.acquire(estimate_request_tokens(messages, model_config.get("max_tokens")))
+            try:
+                response = completion(**completion_params)
+            except Exception as e:
+                if any(error in str(e).lower() for error in ["invalid api key", "incorrect api key", "unauthorized", "authentication"]):
+                    raise ValueError(f"Invalid API key provided for {model_config.get('provider', 'the specified')} provider")
+                raise Exception(f"Error calling LLM API: {str(e)}")
 
-        # Clean the response if needed (remove any prefix before the JSON list)
-        list_start_index = content.find('[')
-        if list_start_index != -1:
-            content = content[list_start_index:]
+            # Extract the content from the response
+            return response.choices[0].message.content
 
-        json_data = json.loads(content)
+        # Only content that parses is cached, so that a retry or a re-run sends the request again
+        content = llm_cache.cached_completion(
+            completion_params, request_content, sample=sample, encode=_cacheable_content
+        )
+        json_data = json.loads(_strip_list_prefix(content))
         return pd.DataFrame(json_data)
 
     def _parse_response(self, response, provider):
@@ -327,12 +454,16 @@ class SyntheticDataGeneration:
             # If JSON parsing fails, return a DataFrame with a single column
             return pd.DataFrame({'content': [data]})
 
-    def process_document(self, input_data):
+    def process_document(self, input_data, pdf_workers=None):
         """
         Process the input document and extract its content.
 
         Args:
             input_data (str): Either a file path or a string of text.
+            pdf_workers (int, optional): The number of worker processes that extract the pages of
+                a PDF, e.g. `os.cpu_count()` for a large PDF. Under the spawn start method (macOS,
+                Windows), the main module must be guarded by `if __name__ == "__main__":`.
+                Defaults to None, which extracts the pages in the calling process.
 
         Returns:
             str: The extracted text content from the document.
@@ -346,7 +477,7 @@ class SyntheticDataGeneration:
                 _, file_extension = os.path.splitext(input_data)
                 try:
                     if file_extension.lower() == '.pdf':
-                        return self._read_pdf(input_data)
+                        return self._read_pdf(input_data, pdf_workers)
                     elif file_extension.lower() == '.txt':
                         return self._read_text(input_data)
                     elif file_extension.lower() == '.md':
@@ -363,22 +494,111 @@ class SyntheticDataGeneration:
         else:
             raise ValueError("Input must be either a file path or a string of text")
 
-    def _read_pdf(self, file_path):
+    def process_corpus(self, input_data, pdf_workers=None):
+        """
+        Process the documents of a corpus and extract their content.
+
+        Args:
+            input_data (str or list): A directory, whose supported files are processed recursively,
+                a file path, or a list of file paths or texts.
+            pdf_workers (int, optional): See `process_document`. Defaults to None.
+
+        Returns:
+            dict: The extracted text content by file path, or by "text <i>" for a text.
+
+        Raises:
+            ValueError: If a document cannot be processed.
+        """
+        if isinstance(input_data, str) and os.path.isdir(input_data):
+            input_data = [
+                os.path.join(directory, file_name)
+                for directory, _, file_names in sorted(os.walk(input_data))
+                for file_name in sorted(file_names)
+                if os.path.splitext(file_name)[1].lower() in self.SUPPORTED_EXTENSIONS
+            ]
+        elif isinstance(input_data, str):
+            input_data = [input_data]
+
+        corpus = {}
+        for i, item in enumerate(input_data):
+            source = item if isinstance(item, str) and os.path.isfile(item) else f"text {i}"
+            corpus[source] = self.process_document(item, pdf_workers=pdf_workers)
+        return corpus
+
+    def chunk_text(self, text, chunk_tokens=1000):
+        """
+        Split text into chunks of at most `chunk_tokens` tokens, at paragraph boundaries where
+        possible, then at sentence boundaries, then at whitespace.
+
+        Args:
+            text (str): The text to split.
+            chunk_tokens (int): The maximum number of tokens of a chunk, estimated from its length.
+
+        Returns:
+            list: The chunks, in the order of the text.
+        """
+        max_chars = chunk_tokens * CHARS_PER_TOKEN
+        chunks = []
+        current = []
+        current_length = 0
+        for piece, separator in self._split_text(text, max_chars):
+            if current and current_length + len(separator) + len(piece) > max_chars:
+                chunks.append("".join(current[1:]))
+                current, current_length = [], 0
+            current.extend((separator, piece))
+            current_length += len(separator) + len(piece)
+        if current:
+            chunks.append("".join(current[1:]))
+        return chunks
+
+    @staticmethod
+    def _split_text(text, max_chars):
+        """Yield the pieces of text of at most max_chars, each with the separator before it."""
+        for paragraph in re.split(r"\n\s*\n", text):
+            paragraph = paragraph.strip()
+            if not paragraph:
+                continue
+            pieces = [paragraph]
+            if len(paragraph) > max_chars:
+                pieces = re.split(r"(?<=[.!?])\s+", paragraph)
+            if any(len(piece) > max_chars for piece in pieces):
+                pieces = [word for piece in pieces for word in piece.split()]
+            separator = "\n\n"
+            for piece in pieces:
+                # A single word longer than a chunk is cut
+                for start in range(0, len(piece), max_chars):
+                    yield piece[start:start + max_chars], separator
+                    separator = " "
+
+    @staticmethod
+    def _allocate(n, weights):
+        """
+        Spread n over the weights in proportion to them, as the number of multiples of total/n
+        each weight's span of the cumulative total contains, so that with fewer than one each
+        the counts are spread evenly.
+        """
+        total = sum(weights)
+        counts = []
+        cumulative = 0
+        for weight in weights:
+            start = n * cumulative // total
+            cumulative += weight
+            counts.append(n * cumulative // total - start)
+        return counts
+
+    def _read_pdf(self, file_path, max_workers=None):
         """
         Read and extract text from a PDF file.
 
         Args:
             file_path (str): The path to the PDF file.
+            max_workers (int, optional): The number of worker processes that extract the pages.
+                Defaults to None (in-process).
 
         Returns:
             str: The extracted text content from the PDF.
         """
-        text = ""
-        with open(file_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            for page in pdf_reader.pages:
-                text += page.extract_text()
-        return text
+        return extract_pdf_text(file_path, max_workers=max_workers)
 
     def _read_text(self, file_path):
         """
@@ -0,0 +1,151 @@
+import os
+import json
+import time
+import base64
+import asyncio
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+TOKEN_ENV = "RAGAAI_CATALYST_TOKEN"
+
+
+def _token_expiry(token):
+    """Return the expiry of a JWT as a Unix timestamp, or None if it cannot be read."""
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        exp = json.loads(base64.urlsafe_b64decode(payload)).get("exp")
+        return float(exp) if exp is not None else None
+    except (IndexError, ValueError, TypeError, AttributeError):
+        return None
+
+
+def _fetch_token():
+    from .ragaai_catalyst import RagaAICatalyst
+
+    return RagaAICatalyst._fetch_token()
+
+
+class TokenManager:
+    """
+    Caches the RagaAI Catalyst token together with its expiry.
+
+    The token is refreshed shortly before it expires, and only one refresh runs at a time:
+    callers that need a new token while a refresh is in progress wait for it and reuse its
+    result instead of requesting a token of their own. The token is also kept in the
+    RAGAAI_CATALYST_TOKEN environment variable, and a token set there by other code is adopted.
+    """
+
+    def __init__(self, fetch_token=_fetch_token, refresh_margin=60, reuse_window=5):
+        """
+        Initializes the TokenManager.
+
+        Args:
+            fetch_token (callable, optional): Requests a new token from the server and returns it,
+                or None. Defaults to `RagaAICatalyst._fetch_token`.
+            refresh_margin (float, optional): How many seconds before its expiry a token is
+                refreshed. Defaults to 60.
+            reuse_window (float, optional): A refresh requested within this many seconds of the
+                previous one reuses its token, so that a burst of 401 responses to requests sent
+                with the old token triggers a single refresh. Defaults to 5.
+
+        Returns:
+            None
+        """
+        self.fetch_token = fetch_token
+        self.refresh_margin = refresh_margin
+        self.reuse_window = reuse_window
+        self._lock = threading.Lock()
+        self._token = None
+        self._expires_at = None
+        self._refreshed_at = None
+
+    def _sync_from_env(self):
+        env_token = os.getenv(TOKEN_ENV)
+        if env_token != self._token:
+            # Set or cleared outside the manager
+            self._token = env_token
+            self._expires_at = _token_expiry(env_token) if env_token else None
+        return self._token
+
+    def _needs_refresh(self):
+        if self._token is None:
+            return True
+        if self._expires_at is None:
+            return False
+        return time.time() >= self._expires_at - self.refresh_margin
+
+    def get_token(self):
+        """
+        Get a valid token, refreshing it first if it is missing or about to expire.
+
+        Returns:
+            str: The token, or None if no token could be obtained.
+        """
+        token = self._sync_from_env()
+        if not self._needs_refresh():
+            return token
+        return self._refresh(stale_token=token, force=False)
+
+    def refresh(self, stale_token=None):
+        """
+        Request a new token, e.g. after a request was rejected with a 401.
+
+        Args:
+            stale_token (str, optional): The token that was rejected. If another caller has
+                already replaced it, that token is returned without a new request.
+
+        Returns:
+            str: The new token, or None if no token could be obtained.
+        """
+        return self._refresh(stale_token=stale_token, force=True)
+
+    def _refresh(self, stale_token, force):
+        with self._lock:
+            token = self._sync_from_env()
+            if token is not None and not self._needs_refresh():
+                if not force:
+                    # Refreshed by another caller while we were waiting
+                    return token
+                if stale_token is not None:
+                    if token != stale_token:
+                        return token
+                elif (
+                    self._refreshed_at is not None
+                    and time.monotonic() - self._refreshed_at < self.reuse_window
+                ):
+                    return token
+
+            token = self.fetch_token()
+            self._refreshed_at = time.monotonic()
+            if token:
+                os.environ[TOKEN_ENV] = token
+                self._token = token
+                self._expires_at = _token_expiry(token)
+            return token
+
+    async def aget_token(self):
+        """Async version of `get_token`. Waits for a refresh without blocking the event loop."""
+        token = self._sync_from_env()
+        if not self._needs_refresh():
+            return token
+        return await asyncio.get_running_loop().run_in_executor(None, self.get_token)
+
+    async def arefresh(self, stale_token=None):
+        """Async version of `refresh`. Waits for a refresh without blocking the event loop."""
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self.refresh, stale_token
+        )
+
+    def clear(self):
+        """Forget the cached token."""
+        with self._lock:
+            self._token = None
+            self._expires_at = None
+            self._refreshed_at = None
+            os.environ.pop(TOKEN_ENV, None)
+
+
+token_manager = TokenManager()
@@ -1,3 +1,27 @@
-from .tracer import Tracer
+import importlib
+from typing import TYPE_CHECKING
+
+# Imported on first access, so that the exporters and utilities can be imported without
+# the instrumentors of the Tracer
+_LAZY_ATTRIBUTES = {
+    "Tracer": ".tracer",
+}
+
+if TYPE_CHECKING:
+    from .tracer import Tracer
+
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
+
 
 __all__ = ["Tracer"]
@@ -1,5 +1,6 @@
 from .file_span_exporter import FileSpanExporter
 from .raga_exporter import RagaExporter
+from .trace_spool import TraceSpool
 
 
-__all__ = ["FileSpanExporter", "RagaExporter"]
+__all__ = ["FileSpanExporter", "RagaExporter", "TraceSpool"]
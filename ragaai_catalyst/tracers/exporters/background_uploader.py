@@ -0,0 +1,216 @@
+import atexit
+import asyncio
+import logging
+import threading
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from ... import transport
+
+logger = logging.getLogger(__name__)
+
+# Uploaders still running at interpreter exit, drained so that queued traces are not lost
+_live_uploaders = weakref.WeakSet()
+
+# The threads of the executor of an uploader, which reads trace files and refreshes tokens
+IO_WORKERS = 4
+
+
+def describe_upload_result(upload_stat):
+    """
+    Summarize the result of `RagaExporter.check_and_upload_files` in a sentence.
+
+    Args:
+        upload_stat (dict): The per-file upload results, or None.
+
+    Returns:
+        str: The summary.
+    """
+    if not upload_stat:
+        return "No files to upload"
+    failed = [path for path, result in upload_stat.items() if not result["success"]]
+    if failed:
+        return f"Failed to upload {len(failed)} of {len(upload_stat)} files"
+    return "Files uploaded successfully"
+
+
+class BackgroundUploader:
+    """
+    Uploads trace files from a single long-lived thread.
+
+    The thread runs a persistent event loop with one shared `aiohttp.ClientSession`, and takes upload
+    requests from a queue one at a time. The files of a request are uploaded concurrently by
+    `RagaExporter.check_and_upload_files`. Submitting a request never blocks the caller, so
+    uploads overlap with the work of the application.
+
+    The default executor of the loop, which reads and compresses the files and refreshes tokens, is
+    owned by the uploader, and queued uploads are drained before the interpreter shuts executors
+    down, so that uploads submitted just before the program ends are not lost.
+    """
+
+    def __init__(self, raga_client, drain_timeout=30):
+        """
+        Initializes the BackgroundUploader. The thread is started on the first submit.
+
+        Args:
+            raga_client (RagaExporter): The client that uploads the files.
+            drain_timeout (float, optional): The maximum time in seconds to wait for queued uploads
+                when the interpreter exits. Defaults to 30.
+
+        Returns:
+            None
+        """
+        self.raga_client = raga_client
+        self.drain_timeout = drain_timeout
+        self._lock = threading.Lock()
+        self._loop = None
+        self._executor = None
+        self._queue = None
+        self._thread = None
+        self._pending = set()
+        self._closed = False
+
+    def _start(self):
+        ready = threading.Event()
+        self._thread = threading.Thread(
+            name="RagaBackgroundUploader",
+            target=self._run,
+            args=(ready,),
+            daemon=True,
+        )
+        self._thread.start()
+        ready.wait()
+        _live_uploaders.add(self)
+
+    def _run(self, ready):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._executor = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="RagaUploadIO")
+        self._loop.set_default_executor(self._executor)
+        self._queue = asyncio.Queue()
+        ready.set()
+        try:
+            self._loop.run_until_complete(self._consume())
+        finally:
+            self._loop.close()
+            self._executor.shutdown(wait=False)
+
+    async def _consume(self):
+        session = transport.get_async_session()
+        try:
+            while True:
+                request = await self._queue.get()
+                if request is None:
+                    return
+                file_paths, timeout, future = request
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    upload_stat = await asyncio.wait_for(
+                        self.raga_client.check_and_upload_files(
+                            session=session, file_paths=file_paths
+                        ),
+                        timeout=timeout,
+                    )
+                except BaseException as e:
+                    future.set_exception(e)
+                    if not isinstance(e, Exception):
+                        raise
+                else:
+                    future.set_result(upload_stat)
+        finally:
+            await transport.close_async_session()
+
+    def submit(self, file_paths, timeout=None):
+        """
+        Queue trace files for upload and return immediately.
+
+        Args:
+            file_paths (list): The trace files to upload.
+            timeout (float, optional): The maximum time in seconds the upload may take once it has
+                started. Defaults to None (no limit).
+
+        Returns:
+            concurrent.futures.Future: Resolves to the per-file results of
+                `RagaExporter.check_and_upload_files`.
+
+        Raises:
+            RuntimeError: If the uploader was shut down.
+        """
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Cannot submit uploads after the uploader was shut down.")
+            if self._thread is None:
+                self._start()
+            self._pending.add(future)
+        future.add_done_callback(self._pending.discard)
+        self._loop.call_soon_threadsafe(
+            self._queue.put_nowait, (list(file_paths), timeout, future)
+        )
+        return future
+
+    def drain(self, timeout=None):
+        """
+        Wait for every queued upload to finish.
+
+        Args:
+            timeout (float, optional): The maximum time in seconds to wait. Defaults to None.
+
+        Returns:
+            bool: True if all uploads finished within the timeout, False otherwise.
+        """
+        with self._lock:
+            pending = list(self._pending)
+        if not pending:
+            return True
+        done = threading.Event()
+        remaining = [len(pending)]
+        counter_lock = threading.Lock()
+
+        def on_done(_):
+            with counter_lock:
+                remaining[0] -= 1
+                if remaining[0] == 0:
+                    done.set()
+
+        for future in pending:
+            future.add_done_callback(on_done)
+        return done.wait(timeout)
+
+    def shutdown(self, timeout=None):
+        """
+        Finish the queued uploads, then close the session and stop the thread.
+
+        Args:
+            timeout (float, optional): The maximum time in seconds to wait for queued uploads.
+                Defaults to None.
+
+        Returns:
+            bool: True if all uploads finished within the timeout, False otherwise.
+        """
+        with self._lock:
+            if self._closed:
+                return True
+            self._closed = True
+        if self._thread is None:
+            return True
+        drained = self.drain(timeout)
+        if drained:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, None)
+            self._thread.join(timeout)
+        else:
+            logger.warning("Some trace uploads did not finish before shutdown.")
+        _live_uploaders.discard(self)
+        return drained
+
+
+def _drain_uploaders_at_exit():
+    for uploader in list(_live_uploaders):
+        uploader.shutdown(uploader.drain_timeout)
+
+
+# Drain at threading shutdown, before concurrent.futures stops accepting work at the same point:
+# callbacks run in the reverse order of registration, and concurrent.futures.thread is imported
+# above. A regular atexit callback would run too late for the executor.
+getattr(threading, "_register_atexit", atexit.register)(_drain_uploaders_at_exit)
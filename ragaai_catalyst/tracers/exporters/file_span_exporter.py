@@ -1,15 +1,14 @@
 import tempfile
-import json
 import os
 import uuid
 import logging
-import aiohttp
-import asyncio
-
-from concurrent.futures import ThreadPoolExecutor
+import threading
 from opentelemetry.sdk.trace.export import SpanExporter
-from ..utils import get_unique_key
+from ..utils import get_unique_key, get_cached_unique_key
+from ..utils.compression import get_codec, open_trace_file
+from ..utils.serializer import dumps, loads, span_to_dict
 from .raga_exporter import RagaExporter
+from .background_uploader import BackgroundUploader, describe_upload_result
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -24,6 +23,10 @@ class FileSpanExporter(SpanExporter):
         metadata=None,
         pipeline=None,
         raga_client=None,
+        storage_mode="json",
+        spool=None,
+        compression=None,
+        uploader=None,
     ):
         """
         Initializes the FileSpanExporter.
@@ -33,40 +36,86 @@ class FileSpanExporter(SpanExporter):
             session_id (str, optional): The session ID. Defaults to None.
             metadata (dict, optional): Metadata information. Defaults to None.
             pipeline (dict, optional): The pipeline configuration. Defaults to None.
+            storage_mode (str, optional): How traces are stored on disk. "json" keeps a JSON array per trace
+                that is rewritten on every export, "jsonl" only ever appends one record per line to the
+                trace file, so the cost of an export does not grow with the length of the trace.
+                Defaults to "json".
+            spool (TraceSpool, optional): The spool that tracks the upload state of trace files. Trace files
+                are written to its directory. Defaults to None.
+            compression (str, optional): Compress trace files on disk with "gzip" or "zstd". Compressed files
+                get a ".gz" or ".zst" suffix. A ".jsonl" trace file keeps one compressor open until its
+                trace is synced, flushed after every export, so that records compress against each
+                other. In "json" mode, the JSON array is still decompressed and recompressed on every
+                export, so compression pays off with "jsonl" and large batches. Defaults to None.
+            uploader (BackgroundUploader, optional): The uploader finished trace files are queued on.
+                Defaults to a new uploader for `raga_client`, if there is one.
 
         Returns:
             None
         """
+        if storage_mode not in ("json", "jsonl"):
+            raise ValueError("storage_mode must be either 'json' or 'jsonl'.")
         self.project_name = project_name
+        self.storage_mode = storage_mode
+        self.codec = get_codec(compression)
+        self.suffix = self.codec.suffix if self.codec else ""
         self.session_id = session_id if session_id is not None else str(uuid.uuid4())
         self.metadata = metadata
         self.pipeline = pipeline
         self.sync_file = None
-        # Set the temp directory to be output dir
-        os.makedirs(
-            os.path.join(tempfile.gettempdir(), "raga_temp", "backup"), exist_ok=True
-        )
-        self.dir_name = os.path.join(tempfile.gettempdir(), "raga_temp")
+        self.spool = spool
+        if spool is not None:
+            self.dir_name = spool.spool_dir
+        else:
+            # Set the temp directory to be output dir
+            os.makedirs(
+                os.path.join(tempfile.gettempdir(), "raga_temp", "backup"), exist_ok=True
+            )
+            self.dir_name = os.path.join(tempfile.gettempdir(), "raga_temp")
         self.raga_client = raga_client
+        # The open compressed .jsonl files by path, closed once their trace is synced
+        self._writers = {}
+        self._writers_lock = threading.Lock()
+        if uploader is None and raga_client is not None:
+            uploader = BackgroundUploader(raga_client)
+        self.uploader = uploader
 
     def export(self, spans):
         """
         Export spans to a JSON file with additional metadata and pipeline information.
 
+        Spans are grouped by trace, so a batch may contain spans of several traces.
+
         Args:
             spans (list): List of spans to be exported.
 
         Returns:
             None
         """
-        traces_list = [json.loads(span.to_json()) for span in spans]
-        trace_id = traces_list[0]["context"]["trace_id"]
+        traces_by_id = {}
+        for span in spans:
+            trace = span_to_dict(span)
+            traces_by_id.setdefault(trace["context"]["trace_id"], []).append(trace)
+
+        for trace_id, traces_list in traces_by_id.items():
+            self._export_trace(trace_id, traces_list)
+
+    def _export_trace(self, trace_id, traces_list):
+        """
+        Write the spans of a single trace to its trace files.
 
-        self.filename = os.path.join(self.dir_name, trace_id + ".jsonl")
+        Args:
+            trace_id (str): The ID of the trace the spans belong to.
+            traces_list (list): The spans of the trace, as dictionaries.
+
+        Returns:
+            None
+        """
+        self.filename = os.path.join(self.dir_name, trace_id + ".jsonl" + self.suffix)
 
-        # add the ids
-        self.metadata["id"] = get_unique_key(self.metadata)
-        self.pipeline["id"] = get_unique_key(self.pipeline)
+        # add the ids, which only have to be recomputed when the metadata or pipeline change
+        self.metadata["id"] = get_cached_unique_key(self.metadata, exclude_keys=("id",))
+        self.pipeline["id"] = get_cached_unique_key(self.pipeline, exclude_keys=("id",))
 
         # add prompt id to each trace in trace_list
         for t in traces_list:
@@ -81,79 +130,90 @@ class FileSpanExporter(SpanExporter):
             "pipeline": self.pipeline,
         }
 
-        json_file_path = os.path.join(self.dir_name, trace_id + ".json")
-        with open(self.filename, "a", encoding="utf-8") as f:
-            logger.debug(f"Writing jsonl file: {self.filename}")
-            f.write(json.dumps(export_data) + "\n")
+        new_trace = not os.path.exists(self.filename)
+        logger.debug(f"Writing jsonl file: {self.filename}")
+        self._append_record(self.filename, dumps(export_data) + "\n")
 
+        if self.storage_mode == "jsonl":
+            if new_trace:
+                self._track_new_trace(self.filename)
+                self._sync_previous_trace(self.filename)
+            return
+
+        json_file_path = os.path.join(self.dir_name, trace_id + ".json" + self.suffix)
 
         tracer_json_file_path = os.path.join(os.getcwd(), "tracer_debug.json")
         if os.path.exists(json_file_path):
-            with open(json_file_path, "r") as f:
-                data = json.load(f)
+            with open_trace_file(json_file_path, "rt") as f:
+                data = loads(f.read())
                 data.append(export_data)
-            with open(json_file_path, "w") as f:
+            with open_trace_file(json_file_path, "wt") as f:
                 logger.debug(f"Appending to json file: {json_file_path}")
-                json.dump(data, f)    
+                f.write(dumps(data))
         else:
-            with open(json_file_path, "w") as f:
+            with open_trace_file(json_file_path, "wt") as f:
                 logger.debug(f"Writing json  file: {json_file_path}")
                 json_data = [export_data]
-                json.dump(json_data, f)
-                if self.sync_file is not None:
-                    # self._upload_task = self._run_async(self._upload_traces(json_file_path= self.sync_file))
-                    self._run_async(self._upload_traces(json_file_path=self.sync_file))
-                self.sync_file = json_file_path
+                f.write(dumps(json_data))
+            self._track_new_trace(json_file_path)
+            self._sync_previous_trace(json_file_path)
         # asyncio.run(self.server_upload(json_file_path)
 
-
-    def _run_async(self, coroutine):
-        """Run an asynchronous coroutine in a separate thread."""
-        loop = asyncio.new_event_loop()
-        with ThreadPoolExecutor() as executor:
-            future = executor.submit(lambda: loop.run_until_complete(coroutine))
-        return future.result()
-
-    async def _upload_traces(self, json_file_path=None):
+    def _append_record(self, file_path, record):
+        """Append a record to a .jsonl trace file, through its open compressor if it is compressed."""
+        if self.codec is None:
+            with open_trace_file(file_path, "at") as f:
+                f.write(record)
+            return
+        with self._writers_lock:
+            f = self._writers.get(file_path)
+            if f is None:
+                f = self._writers[file_path] = open_trace_file(file_path, "at")
+            f.write(record)
+            # A sync flush makes the records written so far readable, e.g. after a crash,
+            # and keeps the compression state for the next records
+            f.flush()
+
+    def _close_writers(self, keep=None):
+        """Finish the compressed .jsonl trace files, except `keep`, so that they can be uploaded."""
+        with self._writers_lock:
+            for file_path in [path for path in self._writers if path != keep]:
+                self._writers.pop(file_path).close()
+
+    def _track_new_trace(self, file_path):
+        """Start tracking a new trace file in the spool, if there is one."""
+        if self.spool is not None and self.raga_client is not None:
+            self.spool.register(
+                file_path, self.project_name, self.raga_client.dataset_name
+            )
+
+    def _sync_previous_trace(self, file_path):
         """
-        Asynchronously uploads traces to the RagaAICatalyst server.
-
-        This function uploads the traces generated by the RagaAICatalyst client to the RagaAICatalyst server. It uses the `aiohttp` library to make an asynchronous HTTP request to the server. The function first checks if the `RAGAAI_CATALYST_TOKEN` environment variable is set. If not, it raises a `ValueError` with the message "RAGAAI_CATALYST_TOKEN not found. Cannot upload traces.".
-
-        The function then uses the `asyncio.wait_for` function to wait for the `check_and_upload_files` method of the `raga_client` object to complete. The `check_and_upload_files` method is called with the `session` object and a list of file paths to be uploaded. The `timeout` parameter is set to the value of the `upload_timeout` attribute of the `Tracer` object.
-
-        If the upload is successful, the function returns the string "Files uploaded successfully" if the `upload_stat` variable is truthy, otherwise it returns the string "No files to upload".
+        Upload the trace file of the previous trace and remember the file of the new one.
 
-        If the upload times out, the function returns a string with the message "Upload timed out after {self.upload_timeout} seconds".
-
-        If any other exception occurs during the upload, the function returns a string with the message "Upload failed: {str(e)}", where `{str(e)}` is the string representation of the exception.
-
-        Parameters:
-            None
+        Args:
+            file_path (str): The trace file of the trace that has just started.
 
         Returns:
-            A string indicating the status of the upload.
+            None
         """
-        async with aiohttp.ClientSession() as session:
-            if not os.getenv("RAGAAI_CATALYST_TOKEN"):
-                raise ValueError(
-                    "RAGAAI_CATALYST_TOKEN not found. Cannot upload traces."
-                )
-
-            try:
-                upload_stat = await self.raga_client.check_and_upload_files(
-                    session=session,
-                    file_paths=[json_file_path],
-                )
-                return (
-                    "Files uploaded successfully"
-                    if upload_stat
-                    else "No files to upload"
-                )
-            except asyncio.TimeoutError:
-                return f"Upload timed out after {self.upload_timeout} seconds"
-            except Exception as e:
-                return f"Upload failed: {str(e)}"
+        # Finish the files of the previous trace, keeping the .jsonl file of the new one open
+        self._close_writers(keep=self.filename)
+        if self.sync_file is not None:
+            if self.spool is not None:
+                self.spool.mark_pending(self.sync_file)
+            # Upload in the background, so the span-ending thread does not wait for the network
+            if self.uploader is not None:
+                future = self.uploader.submit([self.sync_file])
+                future.add_done_callback(self._log_upload_result)
+        self.sync_file = file_path
+
+
+    def _log_upload_result(self, future):
+        try:
+            logger.debug(describe_upload_result(future.result()))
+        except Exception as e:
+            logger.error(f"Upload failed: {str(e)}")
 
     def shutdown(self):
-        pass
+        self._close_writers()
@@ -4,15 +4,15 @@ import asyncio
 import aiohttp
 import logging
 from tqdm import tqdm
-import requests
-from ...ragaai_catalyst import RagaAICatalyst
+from ... import transport
+from ...token_manager import token_manager
+from ..utils.compression import get_codec
+from ..utils.upload_body import TraceFileBody
 import shutil
 import pdb
 
 logger = logging.getLogger(__name__)
 
-get_token = RagaAICatalyst.get_token
-
 
 class RagaExporter:
     BASE_URL = None
@@ -43,12 +43,17 @@ class RagaExporter:
     }
     TIMEOUT = 10
 
-    def __init__(self, project_name, dataset_name):
+    def __init__(self, project_name, dataset_name, spool=None, max_concurrency=8, compression=None):
         """
         Initializes a new instance of the RagaExporter class.
 
         Args:
             project_name (str): The name of the project.
+            dataset_name (str): The name of the dataset the traces are uploaded to.
+            spool (TraceSpool, optional): The spool that tracks the upload state of trace files. Defaults to None.
+            max_concurrency (int, optional): The maximum number of trace files uploaded concurrently. Defaults to 8.
+            compression (str, optional): Compress the uploaded trace files with "gzip" or "zstd" and send them
+                with a matching Content-Encoding header. Defaults to None.
 
         Raises:
             ValueError: If the environment variables RAGAAI_CATALYST_ACCESS_KEY and RAGAAI_CATALYST_SECRET_KEY are not set.
@@ -56,6 +61,7 @@ class RagaExporter:
         """
         self.project_name = project_name
         self.dataset_name = dataset_name
+        self.spool = spool
         RagaExporter.BASE_URL = (
             os.getenv("RAGAAI_CATALYST_BASE_URL")
             if os.getenv("RAGAAI_CATALYST_BASE_URL")
@@ -64,12 +70,15 @@ class RagaExporter:
         self.access_key = os.getenv("RAGAAI_CATALYST_ACCESS_KEY")
         self.secret_key = os.getenv("RAGAAI_CATALYST_SECRET_KEY")
         self.max_urls = 20
+        self.max_concurrency = max_concurrency
+        # Fail early if the codec is unknown or its package is missing
+        get_codec(compression)
+        self.compression = compression
         if not self.access_key or not self.secret_key:
             raise ValueError(
                 "RAGAAI_CATALYST_ACCESS_KEY and RAGAAI_CATALYST_SECRET_KEY environment variables must be set"
             )
-        if not os.getenv("RAGAAI_CATALYST_TOKEN"):
-            get_token()
+        token_manager.get_token()
 
         create_status_code = self._create_schema()
         if create_status_code != 200:
@@ -95,12 +104,12 @@ class RagaExporter:
             None
         """
 
-        def make_request():
+        def make_request(token):
             headers = {
-                "authorization": f"Bearer {os.getenv('RAGAAI_CATALYST_TOKEN')}",
+                "authorization": f"Bearer {token}",
                 "X-Project-Name": self.project_name,
             }
-            response = requests.get(
+            response = transport.get(
                 f"{RagaExporter.BASE_URL}/v1/llm/master-dataset/schema/{self.project_name}",
                 headers=headers,
                 timeout=RagaExporter.TIMEOUT,
@@ -125,10 +134,12 @@ class RagaExporter:
             return True, []
 
 
-        response = make_request()
+        token = token_manager.get_token()
+        response = make_request(token)
         if response.status_code == 401:
-            get_token()  # Fetch a new token and set it in the environment
-            response = make_request()  # Retry the request
+            # Fetch a new token, unless a concurrent request already did
+            token = token_manager.refresh(stale_token=token)
+            response = make_request(token)  # Retry the request
         if response.status_code != 200:
             return response.status_code
         if response.status_code == 200:
@@ -161,10 +172,10 @@ class RagaExporter:
             None
         """
 
-        def make_request():
+        def make_request(token):
             headers = {
                 "Content-Type": "application/json",
-                "Authorization": f"Bearer {os.getenv('RAGAAI_CATALYST_TOKEN')}",
+                "Authorization": f"Bearer {token}",
                 "X-Project-Name": self.project_name,
             }
             json_data = {
@@ -172,7 +183,7 @@ class RagaExporter:
                 "schemaMapping": RagaExporter.SCHEMA_MAPPING_NEW,
                 "traceFolderUrl": None,
             }
-            response = requests.post(
+            response = transport.post(
                 f"{RagaExporter.BASE_URL}/v1/llm/dataset/logs",
                 headers=headers,
                 json=json_data,
@@ -181,11 +192,13 @@ class RagaExporter:
 
             return response
 
-        response = make_request()
+        token = token_manager.get_token()
+        response = make_request(token)
 
         if response.status_code == 401:
-            get_token()  # Fetch a new token and set it in the environment
-            response = make_request()  # Retry the request
+            # Fetch a new token, unless a concurrent request already did
+            token = token_manager.refresh(stale_token=token)
+            response = make_request(token)  # Retry the request
         if response.status_code != 200:
             return response.status_code
         return response.status_code
@@ -212,7 +225,7 @@ class RagaExporter:
 
         """
 
-        async def make_request():
+        async def make_request(token):
             # pdb.set_trace()
 
             json_data = {
@@ -221,7 +234,7 @@ class RagaExporter:
             }
             headers = {
                 "Content-Type": "application/json",
-                "Authorization": f"Bearer {os.getenv('RAGAAI_CATALYST_TOKEN')}",
+                "Authorization": f"Bearer {token}",
                 "X-Project-Name": self.project_name,
             }
             async with session.get(
@@ -234,11 +247,13 @@ class RagaExporter:
                 json_data = await response.json()
 
                 return response, json_data
-        response, json_data = await make_request()
+        token = await token_manager.aget_token()
+        response, json_data = await make_request(token)
         await self.response_checker_async(response, "RagaExporter.get_presigned_url")
         if response.status == 401:
-            await get_token()  # Fetch a new token and set it in the environment
-            response, json_data = await make_request()  # Retry the request
+            # Fetch a new token, unless a concurrent request already did
+            token = await token_manager.arefresh(stale_token=token)
+            response, json_data = await make_request(token)  # Retry the request
 
         if response.status != 200:
             return {"status": response.status, "message": "Failed to get presigned URL"}
@@ -261,10 +276,10 @@ class RagaExporter:
 
         """
 
-        async def make_request():
+        async def make_request(token):
 
             headers = {
-                "Authorization": f"Bearer {os.getenv('RAGAAI_CATALYST_TOKEN')}",
+                "Authorization": f"Bearer {token}",
                 "Content-Type": "application/json",
                 "X-Project-Name": self.project_name,
             }
@@ -284,11 +299,13 @@ class RagaExporter:
                 status = response.status
                 return response, status
 
-        response, status = await make_request()
+        token = await token_manager.aget_token()
+        response, status = await make_request(token)
         await self.response_checker_async(response, "RagaExporter.upload_file")
         if response.status == 401:
-            await get_token()  # Fetch a new token and set it in the environment
-            response, status = await make_request()  # Retry the request
+            # Fetch a new token, unless a concurrent request already did
+            token = await token_manager.arefresh(stale_token=token)
+            response, status = await make_request(token)  # Retry the request
 
         if response.status != 200:
             return response.status
@@ -322,11 +339,14 @@ class RagaExporter:
             print(f"Uploading traces...")
             logger.debug(f"Uploading file:{file_path} with url {url}")
 
-            with open(file_path) as f:
-                data = f.read().replace("\n", "").replace("\r", "").encode()
+            # Stream the file from disk instead of loading it into memory
+            body = TraceFileBody(file_path, compression=self.compression)
+            headers["Content-Length"] = str(await body.alength())
+            if body.content_encoding:
+                headers["Content-Encoding"] = body.content_encoding
 
             async with session.put(
-                    url, headers=headers, data=data, timeout=RagaExporter.TIMEOUT
+                    url, headers=headers, data=body, timeout=RagaExporter.TIMEOUT
             ) as response:
                 status = response.status
                 return response, status
@@ -335,7 +355,7 @@ class RagaExporter:
         await self.response_checker_async(response, "RagaExporter.upload_file")
 
         if response.status == 401:
-            await get_token()  # Fetch a new token and set it in the environment
+            await token_manager.arefresh()  # Fetch a new token and set it in the environment
             response, status = await make_request()  # Retry the request
 
         if response.status != 200 or response.status != 201:
@@ -344,119 +364,171 @@ class RagaExporter:
 
         return response.status
 
-    async def check_and_upload_files(self, session, file_paths):
+    async def check_and_upload_files(self, session, file_paths, max_concurrency=None):
         # print(file_paths)
         # pdb.set_trace()
         """
         Checks if there are files to upload, gets presigned URLs, uploads files, and streams them if successful.
 
+        Files are uploaded concurrently, with at most `max_concurrency` uploads in flight at a time.
+
         Args:
             self: The object instance.
             session (aiohttp.ClientSession): The aiohttp session to use for the request.
             file_paths (list): List of file paths to upload.
+            max_concurrency (int, optional): The maximum number of concurrent uploads.
+                Defaults to the `max_concurrency` of the exporter.
 
         Returns:
-            str: The status of the upload process.
-        """ """
-        Asynchronously uploads a file using the given session, url, and file path.
-
-        Args:
-            self: The RagaExporter instance.
-            session (aiohttp.ClientSession): The aiohttp session to use for the request.
-            url (str): The URL to upload the file to.
-            file_path (str): The path to the file to upload.
-
-        Returns:
-            int: The status code of the response.
+            dict: A mapping of each file path to its upload result, a dictionary with the keys
+                `success`, `upload_status`, `stream_status` and `error`.
+                None if there is nothing to upload or no presigned URLs could be obtained.
         """
         # Check if there are no files to upload
         if len(file_paths) == 0:
             print("No files to be uploaded.")
             return None
 
-        # Ensure a required environment token is available; if not, attempt to obtain it.
-        if os.getenv("RAGAAI_CATALYST_TOKEN") is None:
-            await get_token()
-            if os.getenv("RAGAAI_CATALYST_TOKEN") is None:
-                print("Failed to obtain token.")
-                return None
+        # Ensure a valid token is available; if not, attempt to obtain it.
+        if await token_manager.aget_token() is None:
+            print("Failed to obtain token.")
+            return None
 
-        # Initialize lists for URLs and tasks
-        presigned_urls = []
-        trace_folder_urls = []
-        tasks_json = []
-        tasks_stream = []
         # Determine the number of files to process
         num_files = len(file_paths)
 
-        # If number of files exceeds the maximum allowed URLs, fetch URLs in batches
-        if num_files > self.max_urls:
-            for i in range(
-                (num_files // self.max_urls) + 1
-            ):  # Correct integer division
-                presigned_url_response = await self.get_presigned_url(
-                    session, self.max_urls
-                )
-                if presigned_url_response.get("success") == True:
-                    data = presigned_url_response.get("data", {})
-                    presigned_urls += data.get("presignedUrls", [])
-                    trace_folder_urls.append(data.get("traceFolderUrl", []))
-        else:
-            # Fetch URLs for all files if under the limit
-            presigned_url_response = await self.get_presigned_url(session, num_files)
+        # Fetch URLs in batches of at most max_urls, all batches at once
+        batch_sizes = [
+            min(self.max_urls, num_files - start)
+            for start in range(0, num_files, self.max_urls)
+        ]
+        presigned_url_responses = await asyncio.gather(
+            *(self.get_presigned_url(session, batch_size) for batch_size in batch_sizes)
+        )
+        presigned_urls = []
+        for presigned_url_response in presigned_url_responses:
             if presigned_url_response.get("success") == True:
                 data = presigned_url_response.get("data", {})
                 presigned_urls += data.get("presignedUrls", [])
-                trace_folder_urls.append(data.get("traceFolderUrl", []))
 
         # If URLs were successfully obtained, start the upload process
         if presigned_urls != []:
-            for file_path, presigned_url in tqdm(
-                zip(file_paths, presigned_urls), desc="Uploading traces"
-            ):
-                if not os.path.isfile(file_path):
-                    print(f"The file '{file_path}' does not exist.")
-                    continue
-
-                # Upload each file and collect the future tasks
-                upload_status = await self.upload_file(
-                    session, presigned_url, file_path
+            semaphore = asyncio.Semaphore(max_concurrency or self.max_concurrency)
+            progress = tqdm(total=min(num_files, len(presigned_urls)), desc="Uploading traces")
+
+            async def upload(file_path, presigned_url):
+                async with semaphore:
+                    result = await self._upload_trace_file(session, file_path, presigned_url)
+                progress.update(1)
+                return result
+
+            results = {
+                file_path: {
+                    "success": False,
+                    "upload_status": None,
+                    "stream_status": None,
+                    "error": "No presigned URL available",
+                }
+                for file_path in file_paths[len(presigned_urls):]
+            }
+            pairs = [
+                (file_path, presigned_url)
+                for file_path, presigned_url in zip(file_paths, presigned_urls)
+            ]
+            try:
+                uploaded = await asyncio.gather(
+                    *(upload(file_path, presigned_url) for file_path, presigned_url in pairs)
                 )
-                if upload_status == 200 or upload_status == 201:
+            finally:
+                progress.close()
+            for (file_path, _), result in zip(pairs, uploaded):
+                results[file_path] = result
+            return results
+
+        else:
+            # Log failure if no presigned URLs could be obtained
+            print(f"Failed to get presigned URLs.")
+            return None
+
+    async def _upload_trace_file(self, session, file_path, presigned_url):
+        """
+        Uploads one trace file to its presigned URL, streams it into the dataset and moves it to the backup directory.
+
+        The state of the file in the spool, if there is one, follows the outcome, so failed uploads are retried later.
+
+        Args:
+            session (aiohttp.ClientSession): The aiohttp session to use for the request.
+            file_path (str): The path to the trace file.
+            presigned_url (str): The presigned URL to upload the file to.
+
+        Returns:
+            dict: The upload result, with the keys `success`, `upload_status`, `stream_status` and `error`.
+        """
+        result = {
+            "success": False,
+            "upload_status": None,
+            "stream_status": None,
+            "error": None,
+        }
+        if not os.path.isfile(file_path):
+            print(f"The file '{file_path}' does not exist.")
+            result["error"] = "File does not exist"
+            return result
+
+        if self.spool is not None:
+            self.spool.mark_in_flight(file_path)
+        try:
+            # Upload each file and collect the future tasks
+            upload_status = await self.upload_file(session, presigned_url, file_path)
+            result["upload_status"] = upload_status
+            if upload_status == 200 or upload_status == 201:
+                logger.debug(
+                    f"File '{os.path.basename(file_path)}' uploaded successfully."
+                )
+                stream_status = await self.stream_trace(
+                    session, trace_uri=presigned_url
+                )
+                result["stream_status"] = stream_status
+                if stream_status == 200 or stream_status == 201:
                     logger.debug(
-                        f"File '{os.path.basename(file_path)}' uploaded successfully."
+                        f"File '{os.path.basename(file_path)}' streamed successfully."
                     )
-                    stream_status = await self.stream_trace(
-                        session, trace_uri=presigned_url
+                    shutil.move(
+                        file_path,
+                        os.path.join(
+                            os.path.dirname(file_path),
+                            "backup",
+                            "_backup.".join(os.path.basename(file_path).split(".", 1)),
+                        ),
                     )
-                    if stream_status == 200 or stream_status == 201:
-                        logger.debug(
-                            f"File '{os.path.basename(file_path)}' streamed successfully."
-                        )
-                        shutil.move(
-                            file_path,
-                            os.path.join(
-                                os.path.dirname(file_path),
-                                "backup",
-                                os.path.basename(file_path).split(".")[0]
-                                + "_backup.json",
-                            ),
-                        )
-                    else:
-                        logger.error(
-                            f"Failed to stream the file '{os.path.basename(file_path)}'."
-                        )
+                    if self.spool is not None:
+                        self.spool.mark_done(file_path)
+                    result["success"] = True
+                    return result
                 else:
+                    result["error"] = "Failed to stream the file"
                     logger.error(
-                        f"Failed to upload the file '{os.path.basename(file_path)}'."
+                        f"Failed to stream the file '{os.path.basename(file_path)}'."
                     )
+            else:
+                result["error"] = "Failed to upload the file"
+                logger.error(
+                    f"Failed to upload the file '{os.path.basename(file_path)}'."
+                )
+        except asyncio.CancelledError:
+            # e.g. the upload timed out, leave the file to be retried
+            if self.spool is not None:
+                self.spool.mark_failed(file_path)
+            raise
+        except Exception as e:
+            result["error"] = str(e)
+            logger.error(
+                f"Failed to upload the file '{os.path.basename(file_path)}': {str(e)}"
+            )
 
-            return "upload successful"
-
-        else:
-            # Log failure if no presigned URLs could be obtained
-            print(f"Failed to get presigned URLs.")
-            return None
+        if self.spool is not None:
+            self.spool.mark_failed(file_path)
+        return result
 
     async def tracer_stopsession(self, file_names):
         """
@@ -470,7 +542,7 @@ class RagaExporter:
             None
         """
         async with aiohttp.ClientSession() as session:
-            if os.getenv("RAGAAI_CATALYST_TOKEN"):
+            if await token_manager.aget_token():
                 print("Token obtained successfully.")
                 await self.check_and_upload_files(session, file_paths=file_names)
             else:
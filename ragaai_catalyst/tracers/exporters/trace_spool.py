@@ -0,0 +1,209 @@
+import os
+import json
+import time
+import uuid
+import errno
+import logging
+import tempfile
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Distinguishes this process from an earlier one that had the same pid
+_PROCESS_TOKEN = uuid.uuid4().hex
+
+
+class TraceSpool:
+    """
+    A durable spool directory for trace files waiting to be uploaded.
+
+    Every trace file written to the spool is tracked in a manifest with one of the states
+    below, so that traces left behind by a crash, a timeout or a failed upload can be
+    found and uploaded again the next time a Tracer starts.
+
+        open       the trace is still being written by the process that owns it
+        pending    the trace is complete and waiting to be uploaded
+        in_flight  an upload of the trace is in progress
+        done       the trace was uploaded and moved to the backup directory
+    """
+
+    MANIFEST_NAME = "manifest.json"
+    OPEN = "open"
+    PENDING = "pending"
+    IN_FLIGHT = "in_flight"
+    DONE = "done"
+
+    def __init__(self, spool_dir=None):
+        """
+        Initializes the TraceSpool.
+
+        Args:
+            spool_dir (str, optional): The spool directory. Point it at a persistent volume for
+                traces to survive a pod restart. Defaults to the RAGAAI_CATALYST_SPOOL_DIR environment
+                variable, or "raga_temp" in the system temp directory.
+
+        Returns:
+            None
+        """
+        self.spool_dir = (
+            spool_dir
+            or os.getenv("RAGAAI_CATALYST_SPOOL_DIR")
+            or os.path.join(tempfile.gettempdir(), "raga_temp")
+        )
+        os.makedirs(os.path.join(self.spool_dir, "backup"), exist_ok=True)
+        self.manifest_path = os.path.join(self.spool_dir, self.MANIFEST_NAME)
+        self._lock_path = self.manifest_path + ".lock"
+        self._thread_lock = threading.Lock()
+
+    @contextmanager
+    def _locked(self):
+        """Hold the manifest lock, across threads and, where supported, across processes."""
+        with self._thread_lock:
+            with open(self._lock_path, "a") as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_manifest(self):
+        try:
+            with open(self.manifest_path, "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except json.JSONDecodeError:
+            logger.error(f"Corrupt spool manifest {self.manifest_path}, starting a new one")
+            return {}
+
+    def _write_manifest(self, manifest):
+        # Write to a temporary file and rename it, so a crash never leaves a half-written manifest
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.manifest_path)
+
+    def _update(self, file_path, **fields):
+        with self._locked():
+            manifest = self._read_manifest()
+            entry = manifest.setdefault(os.path.basename(file_path), {})
+            entry.update(fields, updated_at=time.time())
+            self._write_manifest(manifest)
+
+    def register(self, file_path, project_name, dataset_name):
+        """
+        Start tracking a trace file that is being written by this process.
+
+        Args:
+            file_path (str): The trace file.
+            project_name (str): The project the trace belongs to.
+            dataset_name (str): The dataset the trace is uploaded to.
+
+        Returns:
+            None
+        """
+        self._update(
+            file_path,
+            state=self.OPEN,
+            project_name=project_name,
+            dataset_name=dataset_name,
+            pid=os.getpid(),
+            owner=_PROCESS_TOKEN,
+            attempts=0,
+        )
+
+    def mark_pending(self, file_path):
+        """Mark a trace file as complete and waiting to be uploaded."""
+        self._update(file_path, state=self.PENDING)
+
+    def mark_in_flight(self, file_path):
+        """Mark a trace file as being uploaded by this process."""
+        self._update(
+            file_path, state=self.IN_FLIGHT, pid=os.getpid(), owner=_PROCESS_TOKEN
+        )
+
+    def mark_done(self, file_path):
+        """Mark a trace file as uploaded."""
+        self._update(file_path, state=self.DONE)
+
+    def mark_failed(self, file_path):
+        """Return a trace file whose upload failed to the pending state, so it is retried."""
+        with self._locked():
+            manifest = self._read_manifest()
+            entry = manifest.setdefault(os.path.basename(file_path), {})
+            entry.update(
+                state=self.PENDING,
+                attempts=entry.get("attempts", 0) + 1,
+                updated_at=time.time(),
+            )
+            self._write_manifest(manifest)
+
+    def state(self, file_path):
+        """Return the state of a trace file, or None if it is not tracked."""
+        with self._locked():
+            entry = self._read_manifest().get(os.path.basename(file_path))
+        return entry.get("state") if entry else None
+
+    @staticmethod
+    def _is_alive(entry):
+        if entry.get("owner") == _PROCESS_TOKEN:
+            return True
+        pid = entry.get("pid")
+        if pid is None or pid == os.getpid():
+            # An earlier incarnation of this process (e.g. pid 1 in a container)
+            return False
+        try:
+            os.kill(pid, 0)
+        except OSError as e:
+            return e.errno == errno.EPERM
+        return True
+
+    def recover(self, project_name, dataset_name):
+        """
+        Find the trace files of a project and dataset that still have to be uploaded.
+
+        Traces owned by a running process are left alone. Traces that were open or in flight in a
+        process that no longer runs are returned to the pending state, and entries of uploaded or
+        vanished files are pruned. The returned traces are owned by this process from then on.
+
+        Args:
+            project_name (str): The project the traces belong to.
+            dataset_name (str): The dataset the traces are uploaded to.
+
+        Returns:
+            list: The paths of the pending trace files.
+        """
+        pending = []
+        with self._locked():
+            manifest = self._read_manifest()
+            for file_name, entry in list(manifest.items()):
+                file_path = os.path.join(self.spool_dir, file_name)
+                if entry.get("state") == self.DONE or not os.path.isfile(file_path):
+                    del manifest[file_name]
+                    continue
+                if (
+                    entry.get("project_name") != project_name
+                    or entry.get("dataset_name") != dataset_name
+                ):
+                    continue
+                if self._is_alive(entry):
+                    # Owned by a running process, possibly this one, which uploads it itself
+                    continue
+                if entry.get("state") in (self.OPEN, self.IN_FLIGHT):
+                    logger.debug(f"Recovering interrupted trace file {file_path}")
+                    entry.update(state=self.PENDING, updated_at=time.time())
+                if entry.get("state") == self.PENDING:
+                    entry.update(pid=os.getpid(), owner=_PROCESS_TOKEN)
+                    pending.append(file_path)
+            self._write_manifest(manifest)
+        return pending
@@ -6,10 +6,13 @@ from enum import Enum
 import json
 import uuid
 import os
-import requests
+from .. import transport
+from ..token_manager import token_manager
 import tempfile
 
 from ..ragaai_catalyst import RagaAICatalyst
+from .utils.serializer import dumps
+from .utils.upload_body import TraceFileBody
 
 class CustomEncoder(json.JSONEncoder):
     def default(self, obj):
@@ -121,7 +124,7 @@ class LlamaIndexTracer:
         temp_file_path = f"{temp_dir}/{filename}"
 
         with open(temp_file_path, "w") as f:
-            json.dump([traces], f, indent=2, cls=CustomEncoder)
+            f.write(dumps([traces], indent=2, default=CustomEncoder().default))
         # print(f"Query traces saved to {temp_file_path}")
 
         # Upload the traces
@@ -252,7 +255,7 @@ class LlamaIndexTracer:
         def make_request():
             headers = {
                 "Content-Type": "application/json",
-                "Authorization": f"Bearer {os.getenv('RAGAAI_CATALYST_TOKEN')}",
+                "Authorization": f"Bearer {token_manager.get_token()}",
                 "X-Project-Name": self.project_name,
             }
             payload = json.dumps({
@@ -260,7 +263,7 @@ class LlamaIndexTracer:
                 "schemaMapping": SCHEMA_MAPPING_NEW,
                 "traceFolderUrl": None,
             })
-            response = requests.request("POST",
+            response = transport.request("POST",
                 f"{self.base_url}/v1/llm/dataset/logs",
                 headers=headers,
                 data=payload,
@@ -285,11 +288,11 @@ class LlamaIndexTracer:
             })
         headers = {
             "Content-Type": "application/json",
-            "Authorization": f"Bearer {os.getenv('RAGAAI_CATALYST_TOKEN')}",
+            "Authorization": f"Bearer {token_manager.get_token()}",
             "X-Project-Name": self.project_name,
         }
 
-        response = requests.request("GET", 
+        response = transport.request("GET", 
                                     f"{self.base_url}/v1/llm/presigned-url", 
                                     headers=headers, 
                                     data=payload,
@@ -306,11 +309,11 @@ class LlamaIndexTracer:
         if "blob.core.windows.net" in presignedUrl:  # Azure
             headers["x-ms-blob-type"] = "BlockBlob"
         print(f"Uploading traces...")
-        with open(filename) as f:
-            payload = f.read().replace("\n", "").replace("\r", "").encode()
+        # Stream the file from disk instead of loading it into memory
+        payload = TraceFileBody(filename)
+        headers["Content-Length"] = str(len(payload))
 
-
-        response = requests.request("PUT", 
+        response = transport.request("PUT", 
                                     presignedUrl, 
                                     headers=headers, 
                                     data=payload,
@@ -320,7 +323,7 @@ class LlamaIndexTracer:
     
     def _insert_traces(self, presignedUrl):
         headers = {
-                "Authorization": f"Bearer {os.getenv('RAGAAI_CATALYST_TOKEN')}",
+                "Authorization": f"Bearer {token_manager.get_token()}",
                 "Content-Type": "application/json",
                 "X-Project-Name": self.project_name,
             }
@@ -328,7 +331,7 @@ class LlamaIndexTracer:
                 "datasetName": self.dataset_name,
                 "presignedUrl": presignedUrl,
             })
-        response = requests.request("POST", 
+        response = transport.request("POST", 
                                     f"{self.base_url}/v1/llm/insert/trace", 
                                     headers=headers, 
                                     data=payload,
@@ -344,7 +347,7 @@ class LlamaIndexTracer:
 
         if save_json_to_pwd:
             with open(filename, "w") as f:
-                json.dump([traces], f, indent=2, cls=CustomEncoder)
+                f.write(dumps([traces], indent=2, default=CustomEncoder().default))
         print(f"tracer is saved to {filename}")
 
         self._create_dataset_schema_with_trace()
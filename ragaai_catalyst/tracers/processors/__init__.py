@@ -0,0 +1,4 @@
+from .batch_span_processor import BatchingSpanProcessor
+
+
+__all__ = ["BatchingSpanProcessor"]
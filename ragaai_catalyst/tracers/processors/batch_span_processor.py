@@ -0,0 +1,189 @@
+import collections
+import logging
+import threading
+import time
+
+from opentelemetry.context import (
+    _SUPPRESS_INSTRUMENTATION_KEY,
+    attach,
+    detach,
+    set_value,
+)
+from opentelemetry.sdk.trace import SpanProcessor
+
+logger = logging.getLogger(__name__)
+
+
+class BatchingSpanProcessor(SpanProcessor):
+    """
+    Span processor that queues finished spans in memory and hands them to the
+    exporter from a background thread, in batches bounded by size and by time.
+
+    Spans are never exported on the thread that ended them, so the latency of
+    the instrumented application does not depend on how fast the exporter can
+    write to disk.
+    """
+
+    QUEUE_FULL_POLICIES = ("drop", "block")
+
+    def __init__(
+        self,
+        span_exporter,
+        max_queue_size=2048,
+        max_export_batch_size=512,
+        schedule_delay=5.0,
+        queue_full_policy="drop",
+        block_timeout=None,
+    ):
+        """
+        Initializes the BatchingSpanProcessor and starts its flush thread.
+
+        Args:
+            span_exporter (SpanExporter): The exporter the batches are handed to.
+            max_queue_size (int, optional): Maximum number of spans held in memory. Defaults to 2048.
+            max_export_batch_size (int, optional): Maximum number of spans per export call. Defaults to 512.
+            schedule_delay (float, optional): Maximum time in seconds a span waits before being exported. Defaults to 5.0.
+            queue_full_policy (str, optional): What to do when the queue is full. "drop" discards the span,
+                "block" makes the caller wait for free space (backpressure). Defaults to "drop".
+            block_timeout (float, optional): With the "block" policy, the maximum time in seconds to wait for
+                free space before dropping the span. Defaults to None (wait indefinitely).
+
+        Raises:
+            ValueError: If any of the size or time limits is invalid or the policy is unknown.
+        """
+        if max_queue_size <= 0:
+            raise ValueError("max_queue_size must be a positive integer.")
+        if max_export_batch_size <= 0:
+            raise ValueError("max_export_batch_size must be a positive integer.")
+        if max_export_batch_size > max_queue_size:
+            raise ValueError(
+                "max_export_batch_size must be less than or equal to max_queue_size."
+            )
+        if schedule_delay <= 0:
+            raise ValueError("schedule_delay must be greater than 0.")
+        if queue_full_policy not in self.QUEUE_FULL_POLICIES:
+            raise ValueError(
+                f"queue_full_policy must be one of {self.QUEUE_FULL_POLICIES}."
+            )
+
+        self.span_exporter = span_exporter
+        self.max_queue_size = max_queue_size
+        self.max_export_batch_size = max_export_batch_size
+        self.schedule_delay = schedule_delay
+        self.queue_full_policy = queue_full_policy
+        self.block_timeout = block_timeout
+        self.dropped_spans = 0
+
+        self._queue = collections.deque()
+        self._condition = threading.Condition(threading.Lock())
+        self._flush_requests = []
+        self._shutdown = False
+        self._worker = threading.Thread(
+            name="RagaBatchingSpanProcessor", target=self._run, daemon=True
+        )
+        self._worker.start()
+
+    def on_start(self, span, parent_context=None):
+        pass
+
+    def on_end(self, span):
+        if self._shutdown:
+            logger.warning("Span ended after the span processor was shut down.")
+            return
+        if not span.context.trace_flags.sampled:
+            return
+
+        with self._condition:
+            if len(self._queue) >= self.max_queue_size:
+                if self.queue_full_policy == "block":
+                    self._condition.wait_for(
+                        lambda: len(self._queue) < self.max_queue_size
+                        or self._shutdown,
+                        timeout=self.block_timeout,
+                    )
+                if len(self._queue) >= self.max_queue_size or self._shutdown:
+                    self.dropped_spans += 1
+                    if self.dropped_spans == 1:
+                        logger.warning(
+                            "Span queue is full, dropping spans. "
+                            "Consider increasing max_queue_size."
+                        )
+                    return
+
+            self._queue.append(span)
+            if len(self._queue) >= self.max_export_batch_size:
+                self._condition.notify_all()
+
+    def _run(self):
+        deadline = time.monotonic() + self.schedule_delay
+        while True:
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: self._shutdown
+                    or self._flush_requests
+                    or len(self._queue) >= self.max_export_batch_size,
+                    timeout=max(deadline - time.monotonic(), 0),
+                )
+                shutdown = self._shutdown
+                flush_requests, self._flush_requests = self._flush_requests, []
+
+            # On a time-based wakeup export one batch, on flush or shutdown drain the queue
+            self._export_batches(drain=shutdown or bool(flush_requests))
+            deadline = time.monotonic() + self.schedule_delay
+
+            for flush_request in flush_requests:
+                flush_request.set()
+            if shutdown:
+                break
+
+    def _export_batches(self, drain=False):
+        while True:
+            with self._condition:
+                if not self._queue:
+                    return
+                batch = [
+                    self._queue.popleft()
+                    for _ in range(min(self.max_export_batch_size, len(self._queue)))
+                ]
+                # Wake up callers blocked on a full queue
+                self._condition.notify_all()
+
+            token = attach(set_value(_SUPPRESS_INSTRUMENTATION_KEY, True))
+            try:
+                self.span_exporter.export(batch)
+            except Exception as e:
+                logger.error(f"Exception while exporting spans: {str(e)}")
+            finally:
+                detach(token)
+
+            if not drain and len(self._queue) < self.max_export_batch_size:
+                return
+
+    def force_flush(self, timeout_millis=30000):
+        """
+        Exports every span currently in the queue.
+
+        Args:
+            timeout_millis (int, optional): The maximum time to wait for the export in milliseconds.
+                Defaults to 30000.
+
+        Returns:
+            bool: True if the queue was flushed within the timeout, False otherwise.
+        """
+        if self._shutdown:
+            return True
+        flush_request = threading.Event()
+        with self._condition:
+            self._flush_requests.append(flush_request)
+            self._condition.notify_all()
+        return flush_request.wait(timeout_millis / 1e3)
+
+    def shutdown(self):
+        """Exports the remaining spans, stops the flush thread and shuts the exporter down."""
+        if self._shutdown:
+            return
+        with self._condition:
+            self._shutdown = True
+            self._condition.notify_all()
+        self._worker.join()
+        self.span_exporter.shutdown()
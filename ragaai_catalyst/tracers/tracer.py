@@ -1,16 +1,17 @@
-import os
 import datetime
 import logging
 import asyncio
-import aiohttp
 import requests
+from ..resolution_cache import resolution_cache
 from contextlib import contextmanager
-from concurrent.futures import ThreadPoolExecutor
 
 from opentelemetry.sdk import trace as trace_sdk
 from opentelemetry.sdk.trace.export import SimpleSpanProcessor
 from .exporters.file_span_exporter import FileSpanExporter
 from .exporters.raga_exporter import RagaExporter
+from .exporters.trace_spool import TraceSpool
+from .exporters.background_uploader import BackgroundUploader, describe_upload_result
+from .processors import BatchingSpanProcessor
 from .instrumentators import (
     LangchainInstrumentor,
     OpenAIInstrumentor,
@@ -35,6 +36,12 @@ class Tracer:
         metadata=None,
         description=None,
         upload_timeout=30,  # Default timeout of 30 seconds
+        span_processor="simple",
+        batch_options=None,
+        storage_mode="json",
+        spool_dir=None,
+        upload_concurrency=8,
+        compression=None,
     ):
         """
         Initializes a Tracer object.
@@ -46,6 +53,23 @@ class Tracer:
             metadata (dict, optional): The metadata. Defaults to None.
             description (str, optional): The description. Defaults to None.
             upload_timeout (int, optional): The upload timeout in seconds. Defaults to 30.
+            span_processor (str, optional): How finished spans reach the exporter. "simple" exports each
+                span synchronously on the thread that ended it, "batch" queues spans in memory and exports
+                them in batches from a background thread. Defaults to "simple".
+            batch_options (dict, optional): Options for the "batch" span processor: max_queue_size,
+                max_export_batch_size, schedule_delay, queue_full_policy ("drop" or "block") and
+                block_timeout. Defaults to None.
+            storage_mode (str, optional): How traces are stored on disk before upload. "json" rewrites a
+                JSON array on every export, "jsonl" only appends one record per line. Defaults to "json".
+            spool_dir (str, optional): The directory trace files are spooled in until they are uploaded.
+                Traces left behind by an earlier session are uploaded in the background when the tracer
+                starts. Defaults to the RAGAAI_CATALYST_SPOOL_DIR environment variable, or "raga_temp"
+                in the system temp directory.
+            upload_concurrency (int, optional): The maximum number of trace files uploaded concurrently. Defaults to 8.
+            compression (str, optional): Compress trace files on disk and on upload with "gzip" or "zstd".
+                "zstd" requires the `zstandard` package. Worthwhile with storage_mode="jsonl" and
+                large batches: in "json" mode, every export recompresses the whole trace file.
+                Defaults to None.
 
         Returns:
             None
@@ -57,42 +81,37 @@ class Tracer:
         self.pipeline = pipeline
         self.description = description
         self.upload_timeout = upload_timeout
+        if span_processor not in ("simple", "batch"):
+            raise ValueError("span_processor must be either 'simple' or 'batch'.")
+        self.span_processor = span_processor
+        self.batch_options = batch_options or {}
+        self.storage_mode = storage_mode
+        self.spool_dir = spool_dir
+        self.upload_concurrency = upload_concurrency
+        self.compression = compression
         self.base_url = f"{RagaAICatalyst.BASE_URL}"
         self.timeout = 10
         self.num_projects = 100
 
         try:
-            response = requests.get(
-                f"{self.base_url}/v2/llm/projects?size={self.num_projects}",
-                headers={
-                    "Authorization": f'Bearer {os.getenv("RAGAAI_CATALYST_TOKEN")}',
-                },
-                timeout=self.timeout,
-            )
-            response.raise_for_status()
-            logger.debug("Projects list retrieved successfully")
-
-            project_list = [
-                project["name"] for project in response.json()["data"]["content"]
-            ]
-            if project_name not in project_list:
-                raise ValueError("Project not found. Please enter a valid project name")
-            
-            self.project_id = [
-                project["id"] for project in response.json()["data"]["content"] if project["name"] == project_name
-            ][0]
-
+            self.project_id = resolution_cache.get_project_id(self.base_url, project_name)
         except requests.exceptions.RequestException as e:
             logger.error(f"Failed to retrieve projects list: {e}")
             raise
+        if self.project_id is None:
+            raise ValueError("Project not found. Please enter a valid project name")
 
         if tracer_type == "langchain":
-            self.raga_client = RagaExporter(project_name=self.project_name, dataset_name=self.dataset_name)
+            self.spool = TraceSpool(spool_dir=self.spool_dir)
+            self.raga_client = RagaExporter(project_name=self.project_name, dataset_name=self.dataset_name, spool=self.spool, max_concurrency=self.upload_concurrency, compression=self.compression)
+            self.uploader = BackgroundUploader(self.raga_client, drain_timeout=self.upload_timeout)
 
             self._tracer_provider = self._setup_provider()
             self._instrumentor = self._setup_instrumentor(tracer_type)
             self.is_instrumented = False
             self._upload_task = None
+            self._spool_recovered = False
+            self._recovery_task = None
         elif tracer_type == "llamaindex":
             self._upload_task = None
             from .llamaindex_callback import LlamaIndexTracer
@@ -117,9 +136,17 @@ class Tracer:
             metadata=self.metadata,
             pipeline=self.pipeline,
             raga_client=self.raga_client,
+            storage_mode=self.storage_mode,
+            spool=self.spool,
+            compression=self.compression,
+            uploader=self.uploader,
         )
         tracer_provider = trace_sdk.TracerProvider()
-        tracer_provider.add_span_processor(SimpleSpanProcessor(self.filespanx))
+        if self.span_processor == "batch":
+            span_processor = BatchingSpanProcessor(self.filespanx, **self.batch_options)
+        else:
+            span_processor = SimpleSpanProcessor(self.filespanx)
+        tracer_provider.add_span_processor(span_processor)
         return tracer_provider
 
     def _setup_instrumentor(self, tracer_type):
@@ -152,6 +179,9 @@ class Tracer:
             if not self.is_instrumented:
                 self._instrumentor().instrument(tracer_provider=self._tracer_provider)
                 self.is_instrumented = True
+            if not self._spool_recovered:
+                self._spool_recovered = True
+                self._recover_spooled_traces()
             print(f"Tracer started for project: {self.project_name}")
             return self
         elif self.tracer_type == "llamaindex":
@@ -160,7 +190,10 @@ class Tracer:
             
 
     def stop(self):
-        """Stop the tracer and initiate trace upload."""
+        """
+        Stop the tracer and initiate trace upload. The upload runs in the background; if the
+        program ends first, it waits up to `upload_timeout` seconds for the upload to finish.
+        """
         if self.tracer_type == "langchain":
             if not self.is_instrumented:
                 logger.warning("Tracer was not started. No traces to upload.")
@@ -168,7 +201,11 @@ class Tracer:
 
             print("Stopping tracer and initiating trace upload...")
             self._cleanup()
-            self._upload_task = self._run_async(self._upload_traces())
+            file_paths = []
+            if self.filespanx.sync_file is not None:
+                self.spool.mark_pending(self.filespanx.sync_file)
+                file_paths.append(self.filespanx.sync_file)
+            self._upload_task = self.uploader.submit(file_paths, timeout=self.upload_timeout)
             return "Trace upload initiated. Use get_upload_status() to check the status."
         elif self.tracer_type == "llamaindex":
             from .llamaindex_callback import LlamaIndexTracer
@@ -181,62 +218,29 @@ class Tracer:
                 return "No upload task in progress."
             if self._upload_task.done():
                 try:
-                    result = self._upload_task.result()
+                    result = describe_upload_result(self._upload_task.result())
                     return f"Upload completed: {result}"
+                except asyncio.TimeoutError:
+                    return f"Upload timed out after {self.upload_timeout} seconds"
                 except Exception as e:
                     return f"Upload failed: {str(e)}"
             return "Upload in progress..."
 
-    def _run_async(self, coroutine):
-        """Run an asynchronous coroutine in a separate thread."""
-        loop = asyncio.new_event_loop()
-        with ThreadPoolExecutor() as executor:
-            future = executor.submit(lambda: loop.run_until_complete(coroutine))
-        return future
-
-    async def _upload_traces(self):
+    def _recover_spooled_traces(self):
         """
-        Asynchronously uploads traces to the RagaAICatalyst server.
-
-        This function uploads the traces generated by the RagaAICatalyst client to the RagaAICatalyst server. It uses the `aiohttp` library to make an asynchronous HTTP request to the server. The function first checks if the `RAGAAI_CATALYST_TOKEN` environment variable is set. If not, it raises a `ValueError` with the message "RAGAAI_CATALYST_TOKEN not found. Cannot upload traces.".
-
-        The function then uses the `asyncio.wait_for` function to wait for the `check_and_upload_files` method of the `raga_client` object to complete. The `check_and_upload_files` method is called with the `session` object and a list of file paths to be uploaded. The `timeout` parameter is set to the value of the `upload_timeout` attribute of the `Tracer` object.
-
-        If the upload is successful, the function returns the string "Files uploaded successfully" if the `upload_stat` variable is truthy, otherwise it returns the string "No files to upload".
-
-        If the upload times out, the function returns a string with the message "Upload timed out after {self.upload_timeout} seconds".
-
-        If any other exception occurs during the upload, the function returns a string with the message "Upload failed: {str(e)}", where `{str(e)}` is the string representation of the exception.
-
-        Parameters:
-            None
+        Queues for upload the trace files of this project and dataset that an earlier session left
+        behind in the spool after a crash, a timeout or a failed upload.
 
         Returns:
-            A string indicating the status of the upload.
+            None
         """
-        async with aiohttp.ClientSession() as session:
-            if not os.getenv("RAGAAI_CATALYST_TOKEN"):
-                raise ValueError(
-                    "RAGAAI_CATALYST_TOKEN not found. Cannot upload traces."
-                )
-
-            try:
-                upload_stat = await asyncio.wait_for(
-                    self.raga_client.check_and_upload_files(
-                        session=session,
-                        file_paths=[self.filespanx.sync_file],
-                    ),
-                    timeout=self.upload_timeout,
-                )
-                return (
-                    "Files uploaded successfully"
-                    if upload_stat
-                    else "No files to upload"
-                )
-            except asyncio.TimeoutError:
-                return f"Upload timed out after {self.upload_timeout} seconds"
-            except Exception as e:
-                return f"Upload failed: {str(e)}"
+        file_paths = self.spool.recover(self.project_name, self.dataset_name)
+        if not file_paths:
+            return
+        logger.info(
+            f"Uploading {len(file_paths)} trace file(s) left over from an earlier session"
+        )
+        self._recovery_task = self.uploader.submit(file_paths)
 
     def _cleanup(self):
         """
@@ -1,3 +1,3 @@
-from .utils import get_unique_key
+from .utils import get_unique_key, get_cached_unique_key, UniqueKeyCache
 
-__all__ = ["get_unique_key"]
+__all__ = ["get_unique_key", "get_cached_unique_key", "UniqueKeyCache"]
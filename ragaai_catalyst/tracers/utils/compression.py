@@ -0,0 +1,192 @@
+import gzip
+import io
+import zlib
+from importlib.util import find_spec
+
+COMPRESSIONS = ("gzip", "zstd")
+
+
+class GzipCodec:
+    """Gzip compression, always available."""
+
+    name = "gzip"
+    suffix = ".gz"
+    content_encoding = "gzip"
+
+    def __init__(self, level=6):
+        self.level = level
+
+    def open(self, path, mode="rt"):
+        """
+        Open a compressed file. Every file opened for appending adds a new gzip member,
+        and reading transparently continues across members.
+
+        Args:
+            path (str): The path to the file.
+            mode (str, optional): The file mode, as for the built-in `open`. Defaults to "rt".
+
+        Returns:
+            file object: The (de)compressing file object.
+        """
+        if "t" in mode:
+            return gzip.open(path, mode, compresslevel=self.level, encoding="utf-8")
+        return gzip.open(path, mode, compresslevel=self.level)
+
+    def compressor(self):
+        """Return a streaming compressor with `compress(data)` and `flush()`."""
+        # wbits=31 writes a gzip header with a zero mtime, so the output is deterministic
+        return zlib.compressobj(self.level, zlib.DEFLATED, 31)
+
+    def decompressor(self):
+        """Return a streaming decompressor of one gzip member, with `decompress(data)`, `eof` and `unused_data`."""
+        return zlib.decompressobj(31)
+
+
+class ZstdCodec:
+    """Zstandard compression, requires the optional `zstandard` package."""
+
+    name = "zstd"
+    suffix = ".zst"
+    content_encoding = "zstd"
+
+    def __init__(self, level=3):
+        if find_spec("zstandard") is None:
+            raise ModuleNotFoundError(
+                "Missing `zstandard` package. Install with `pip install zstandard`."
+            )
+        import zstandard
+
+        self._zstd = zstandard
+        self.level = level
+
+    def open(self, path, mode="rt"):
+        """
+        Open a compressed file. Every file opened for appending adds a new zstd frame,
+        and reading transparently continues across frames.
+
+        Args:
+            path (str): The path to the file.
+            mode (str, optional): The file mode, as for the built-in `open`. Defaults to "rt".
+
+        Returns:
+            file object: The (de)compressing file object.
+        """
+        binary_mode = mode.replace("t", "")
+        if "b" not in binary_mode:
+            binary_mode += "b"
+        fh = open(path, binary_mode)
+        if binary_mode.startswith("r"):
+            stream = self._zstd.ZstdDecompressor().stream_reader(
+                fh, read_across_frames=True, closefd=True
+            )
+        else:
+            stream = self._zstd.ZstdCompressor(level=self.level).stream_writer(
+                fh, closefd=True
+            )
+        if "b" in mode:
+            return stream
+        return io.TextIOWrapper(stream, encoding="utf-8")
+
+    def compressor(self):
+        """Return a streaming compressor with `compress(data)` and `flush()`."""
+        return self._zstd.ZstdCompressor(level=self.level).compressobj()
+
+    def decompressor(self):
+        """Return a streaming decompressor of one zstd frame, with `decompress(data)`, `eof` and `unused_data`."""
+        return self._zstd.ZstdDecompressor().decompressobj()
+
+
+_CODECS = {"gzip": GzipCodec, "zstd": ZstdCodec}
+
+
+def get_codec(compression):
+    """
+    Get the codec for a compression mode.
+
+    Args:
+        compression (str): The compression mode, "gzip" or "zstd". None means no compression.
+
+    Returns:
+        GzipCodec or ZstdCodec: The codec, or None if compression is None.
+
+    Raises:
+        ValueError: If the compression mode is unknown.
+        ModuleNotFoundError: If the package required by the compression mode is not installed.
+    """
+    if compression is None:
+        return None
+    if compression not in _CODECS:
+        raise ValueError(f"compression must be one of {COMPRESSIONS} or None.")
+    return _CODECS[compression]()
+
+
+def codec_for_path(path):
+    """Get the codec a file was written with from its suffix, or None if it is not compressed."""
+    for codec_class in _CODECS.values():
+        if path.endswith(codec_class.suffix):
+            return get_codec(codec_class.name)
+    return None
+
+
+def strip_codec_suffix(path):
+    """Remove the compression suffix from a file path, if it has one."""
+    for codec_class in _CODECS.values():
+        if path.endswith(codec_class.suffix):
+            return path[: -len(codec_class.suffix)]
+    return path
+
+
+def open_trace_file(path, mode="rt"):
+    """
+    Open a trace file, decompressing or compressing it according to its suffix.
+
+    Args:
+        path (str): The path to the trace file.
+        mode (str, optional): The file mode, as for the built-in `open`. Defaults to "rt".
+
+    Returns:
+        file object: The file object.
+    """
+    codec = codec_for_path(path)
+    if codec is not None:
+        return codec.open(path, mode)
+    if "b" in mode:
+        return open(path, mode)
+    return open(path, mode, encoding="utf-8")
+
+
+def iter_trace_file(path, chunk_size=1024 * 1024):
+    """
+    Yield the content of a trace file in chunks, decompressing it according to its suffix.
+
+    A compressed trace file is flushed after every export but only finished when its trace is
+    synced, so the file a crashed process was writing ends in an unfinished member or frame.
+    Its content is read up to the last flush instead of failing.
+
+    Args:
+        path (str): The path to the trace file.
+        chunk_size (int, optional): The number of bytes read from the file at a time. Defaults
+            to 1 MiB.
+
+    Yields:
+        bytes: The decompressed content.
+    """
+    codec = codec_for_path(path)
+    with open(path, "rb") as f:
+        decompressor = codec.decompressor() if codec is not None else None
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            if decompressor is None:
+                yield chunk
+                continue
+            # A file appended to in several sessions holds one member or frame per session
+            while chunk:
+                data = decompressor.decompress(chunk)
+                if data:
+                    yield data
+                if not decompressor.eof:
+                    break
+                chunk = decompressor.unused_data
+                decompressor = codec.decompressor()
@@ -0,0 +1,133 @@
+import json
+
+from opentelemetry import trace as trace_api
+from opentelemetry.sdk import util
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS if orjson is not None else 0
+# Leave datetimes and dataclasses to `default`, like the stdlib encoder does
+_ORJSON_DEFAULT_OPTIONS = (
+    orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+    if orjson is not None
+    else 0
+)
+
+_resource_cache = {}
+
+
+def dumps(obj, indent=None, default=None):
+    """
+    Serialize an object to a JSON string, using orjson when it is installed.
+
+    Args:
+        obj: The object to serialize.
+        indent (int, optional): Pretty-print with this indentation. orjson only supports an
+            indentation of 2, other values fall back to the stdlib encoder. Defaults to None.
+        default (callable, optional): Called for objects that cannot be serialized otherwise,
+            and should return a serializable version of them. Defaults to None.
+
+    Returns:
+        str: The JSON document.
+    """
+    if orjson is not None and indent in (None, 2):
+        option = _ORJSON_OPTIONS
+        if indent == 2:
+            option |= orjson.OPT_INDENT_2
+        if default is not None:
+            option |= _ORJSON_DEFAULT_OPTIONS
+        try:
+            return orjson.dumps(obj, default=default, option=option).decode()
+        except TypeError:
+            # e.g. integers wider than 64 bits, which the stdlib encoder handles
+            pass
+    return json.dumps(obj, indent=indent, default=default)
+
+
+def loads(data):
+    """Parse a JSON document, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _format_context(context):
+    return {
+        "trace_id": f"0x{trace_api.format_trace_id(context.trace_id)}",
+        "span_id": f"0x{trace_api.format_span_id(context.span_id)}",
+        "trace_state": repr(context.trace_state),
+    }
+
+
+def _format_attributes(attributes):
+    if attributes is not None and not isinstance(attributes, dict):
+        return dict(attributes)
+    return attributes
+
+
+def _format_resource(resource):
+    # Every span of a tracer provider shares the same resource, format it only once
+    cached = _resource_cache.get(id(resource))
+    if cached is None or cached[0] is not resource:
+        cached = (
+            resource,
+            {
+                "attributes": dict(resource.attributes),
+                "schema_url": resource.schema_url,
+            },
+        )
+        _resource_cache.clear()
+        _resource_cache[id(resource)] = cached
+    return cached[1]
+
+
+def span_to_dict(span):
+    """
+    Convert a finished span to a dictionary.
+
+    The dictionary has the same content as `json.loads(span.to_json())`, without serializing
+    the span to JSON and parsing it back.
+
+    Args:
+        span (ReadableSpan): The span to convert.
+
+    Returns:
+        dict: The span as a dictionary.
+    """
+    status = {"status_code": str(span.status.status_code.name)}
+    if span.status.description:
+        status["description"] = span.status.description
+
+    return {
+        "name": span.name,
+        "context": _format_context(span.context) if span.context else None,
+        "kind": str(span.kind),
+        "parent_id": (
+            f"0x{trace_api.format_span_id(span.parent.span_id)}"
+            if span.parent is not None
+            else None
+        ),
+        "start_time": util.ns_to_iso_str(span.start_time) if span.start_time else None,
+        "end_time": util.ns_to_iso_str(span.end_time) if span.end_time else None,
+        "status": status,
+        "attributes": _format_attributes(span.attributes),
+        "events": [
+            {
+                "name": event.name,
+                "timestamp": util.ns_to_iso_str(event.timestamp),
+                "attributes": _format_attributes(event.attributes),
+            }
+            for event in span.events
+        ],
+        "links": [
+            {
+                "context": _format_context(link.context),
+                "attributes": _format_attributes(link.attributes),
+            }
+            for link in span.links
+        ],
+        "resource": _format_resource(span.resource),
+    }
@@ -0,0 +1,118 @@
+import os
+import asyncio
+
+from .compression import get_codec, iter_trace_file, strip_codec_suffix
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class TraceFileBody:
+    """
+    Request body that streams a trace file from disk in fixed-size chunks.
+
+    The server expects a single-line JSON document, so newlines are removed on the fly and
+    append-only ".jsonl" trace files are turned into a JSON array, one record per line. Only
+    one chunk of the file is held in memory at a time.
+
+    Compressed trace files (".gz", ".zst") are decompressed while reading, and the body itself
+    can be compressed for a Content-Encoding header.
+
+    The body has a length, so it is sent with a Content-Length header: presigned S3 and Azure
+    URLs reject chunked transfer encoding. The same body can be iterated more than once, e.g.
+    to retry a request. For a compressed body this means the file is compressed once to
+    measure it and once more while sending, which keeps memory and disk usage flat. In async
+    code, use `alength()` instead of `len()`; both it and async iteration read the file off the
+    event loop.
+    """
+
+    def __init__(self, file_path, chunk_size=CHUNK_SIZE, compression=None):
+        """
+        Initializes the TraceFileBody.
+
+        Args:
+            file_path (str): The trace file to upload.
+            chunk_size (int, optional): The number of bytes read from the file at a time.
+                Defaults to 1 MiB.
+            compression (str, optional): Compress the body with "gzip" or "zstd". Defaults to None.
+
+        Raises:
+            FileNotFoundError: If the trace file does not exist.
+            ValueError: If the compression mode is unknown.
+        """
+        if not os.path.isfile(file_path):
+            raise FileNotFoundError(f"Trace file {file_path} does not exist")
+        self.file_path = file_path
+        self.chunk_size = chunk_size
+        self.is_jsonl = strip_codec_suffix(file_path).endswith(".jsonl")
+        self.codec = get_codec(compression)
+        self.content_encoding = self.codec.content_encoding if self.codec else None
+        self._length = None
+
+    def _read_chunks(self):
+        for chunk in iter_trace_file(self.file_path, self.chunk_size):
+            yield chunk.replace(b"\r", b"")
+
+    def _json_chunks(self):
+        for chunk in self._read_chunks():
+            chunk = chunk.replace(b"\n", b"")
+            if chunk:
+                yield chunk
+
+    def _jsonl_chunks(self):
+        # A record may span several chunks, so track whether we are inside one
+        yield b"["
+        in_record = False
+        records = 0
+        for chunk in self._read_chunks():
+            parts = chunk.split(b"\n")
+            for i, part in enumerate(parts):
+                if not in_record:
+                    part = part.lstrip()
+                    if part:
+                        yield (b"," + part) if records else part
+                        in_record = True
+                        records += 1
+                elif part:
+                    yield part
+                if i < len(parts) - 1:
+                    in_record = False
+        yield b"]"
+
+    def _compressed_chunks(self, chunks):
+        compressor = self.codec.compressor()
+        for chunk in chunks:
+            chunk = compressor.compress(chunk)
+            if chunk:
+                yield chunk
+        yield compressor.flush()
+
+    def __iter__(self):
+        chunks = self._jsonl_chunks() if self.is_jsonl else self._json_chunks()
+        if self.codec is not None:
+            return self._compressed_chunks(chunks)
+        return chunks
+
+    async def __aiter__(self):
+        # Reading and compressing a chunk blocks, so it runs in the default executor to keep the
+        # event loop free for the other uploads
+        loop = asyncio.get_running_loop()
+        chunks = iter(self)
+        try:
+            while True:
+                chunk = await loop.run_in_executor(None, next, chunks, None)
+                if chunk is None:
+                    return
+                yield chunk
+        finally:
+            chunks.close()
+
+    def __len__(self):
+        if self._length is None:
+            self._length = sum(len(chunk) for chunk in self)
+        return self._length
+
+    async def alength(self):
+        """Return the length of the body, measured in the default executor."""
+        if self._length is None:
+            await asyncio.get_running_loop().run_in_executor(None, len, self)
+        return self._length
@@ -1,6 +1,9 @@
+import copy
 import hashlib
 import json
+import threading
 import unicodedata
+from collections import OrderedDict
 
 
 def normalize_string(input_str):
@@ -60,3 +63,110 @@ def get_unique_key(input_data):
     unique_key = hash_object.hexdigest()
 
     return unique_key
+
+
+_CONTAINER_TYPES = {dict, list, tuple}
+
+
+def _same_content(a, b):
+    # Stricter than ==, which treats 1, 1.0 and True as equal although they serialize differently
+    if type(a) is not type(b) or a != b:
+        return False
+    if isinstance(a, dict):
+        if list(a) != list(b):
+            return False
+        a, b = a.values(), b.values()
+    elif not isinstance(a, (list, tuple)):
+        return True
+    types = list(map(type, a))
+    if types != list(map(type, b)):
+        return False
+    if _CONTAINER_TYPES.isdisjoint(types):
+        return True
+    return all(
+        _same_content(x, y)
+        for x, y in zip(a, b)
+        if isinstance(x, (dict, list, tuple))
+    )
+
+
+class UniqueKeyCache:
+    """
+    A bounded LRU cache of unique keys for dictionaries that are hashed over and over.
+
+    Entries are looked up by the identity of the dictionary and validated against a snapshot of
+    its content, so a dictionary that was changed in place since it was last hashed is hashed
+    again. Comparing against the snapshot is much cheaper than normalizing, serializing and
+    hashing the dictionary.
+    """
+
+    def __init__(self, maxsize=128):
+        """
+        Initializes the UniqueKeyCache.
+
+        Args:
+            maxsize (int, optional): The maximum number of cached keys. Defaults to 128.
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, input_data, exclude_keys=()):
+        """
+        Get the unique key of a dictionary, computing it only if the dictionary changed.
+
+        Args:
+            input_data (dict): The dictionary to get the unique key for.
+            exclude_keys (tuple, optional): Keys left out of the key, e.g. a key the result is
+                stored under. Defaults to ().
+
+        Returns:
+            str: The unique key, as returned by `get_unique_key`.
+        """
+        if exclude_keys:
+            content = {k: v for k, v in input_data.items() if k not in exclude_keys}
+        else:
+            content = input_data
+        cache_key = (id(input_data), tuple(exclude_keys))
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None and _same_content(entry[0], content):
+                self._entries.move_to_end(cache_key)
+                self.hits += 1
+                return entry[1]
+
+        unique_key = get_unique_key(content)
+        with self._lock:
+            self.misses += 1
+            self._entries[cache_key] = (copy.deepcopy(content), unique_key)
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return unique_key
+
+    def clear(self):
+        """Remove every cached key."""
+        with self._lock:
+            self._entries.clear()
+
+
+_unique_key_cache = UniqueKeyCache()
+
+
+def get_cached_unique_key(input_data, exclude_keys=()):
+    """
+    Generate the unique key of a dictionary that is hashed repeatedly, e.g. the metadata of a session.
+
+    The key is the same as `get_unique_key` of the dictionary without `exclude_keys`, but it is only
+    recomputed when the content of the dictionary changed since the previous call.
+
+    Args:
+        input_data (dict): The dictionary to generate the unique key from.
+        exclude_keys (tuple, optional): Keys left out of the key. Defaults to ().
+
+    Returns:
+        str: The unique key.
+    """
+    return _unique_key_cache.get(input_data, exclude_keys)
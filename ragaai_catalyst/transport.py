@@ -0,0 +1,122 @@
+import asyncio
+import threading
+import weakref
+from http.cookiejar import DefaultCookiePolicy
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 32
+
+_lock = threading.Lock()
+_session = None
+_pool_connections = DEFAULT_POOL_CONNECTIONS
+_pool_maxsize = DEFAULT_POOL_MAXSIZE
+_async_sessions = weakref.WeakKeyDictionary()
+
+
+def configure(pool_connections=DEFAULT_POOL_CONNECTIONS, pool_maxsize=DEFAULT_POOL_MAXSIZE):
+    """
+    Configure the connection pools shared by all clients of the SDK.
+
+    Connections opened with the previous configuration are closed.
+
+    Args:
+        pool_connections (int, optional): The number of hosts connections are kept open to.
+            Defaults to 10.
+        pool_maxsize (int, optional): The maximum number of connections kept open per host, and
+            the connection limit of the async sessions. Defaults to 32.
+
+    Returns:
+        None
+    """
+    global _session, _pool_connections, _pool_maxsize
+    with _lock:
+        _pool_connections = pool_connections
+        _pool_maxsize = pool_maxsize
+        session, _session = _session, None
+    if session is not None:
+        session.close()
+
+
+def _create_session():
+    session = requests.Session()
+    # Behave like the module-level requests functions, which do not carry cookies between calls
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    adapter = HTTPAdapter(
+        pool_connections=_pool_connections, pool_maxsize=_pool_maxsize
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session():
+    """
+    Get the shared `requests.Session`, whose keep-alive connections are reused by every call.
+
+    Returns:
+        requests.Session: The shared session.
+    """
+    global _session
+    session = _session
+    if session is None:
+        with _lock:
+            if _session is None:
+                _session = _create_session()
+            session = _session
+    return session
+
+
+def request(method, url, **kwargs):
+    """Send a request through the shared session. Takes the arguments of `requests.request`."""
+    return get_session().request(method, url, **kwargs)
+
+
+def get(url, **kwargs):
+    """Send a GET request through the shared session. Takes the arguments of `requests.get`."""
+    return request("GET", url, **kwargs)
+
+
+def post(url, **kwargs):
+    """Send a POST request through the shared session. Takes the arguments of `requests.post`."""
+    return request("POST", url, **kwargs)
+
+
+def put(url, **kwargs):
+    """Send a PUT request through the shared session. Takes the arguments of `requests.put`."""
+    return request("PUT", url, **kwargs)
+
+
+def get_async_session():
+    """
+    Get the `aiohttp.ClientSession` shared by the coroutines of the running event loop.
+
+    An aiohttp session can only be used on the loop it was created on, so there is one session
+    per event loop. Close it with `close_async_session` before the loop is closed.
+
+    Returns:
+        aiohttp.ClientSession: The shared session.
+
+    Raises:
+        RuntimeError: If there is no running event loop.
+    """
+    # Imported here so that the synchronous clients do not pay for importing aiohttp
+    import aiohttp
+
+    loop = asyncio.get_running_loop()
+    session = _async_sessions.get(loop)
+    if session is None or session.closed:
+        session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=_pool_maxsize)
+        )
+        _async_sessions[loop] = session
+    return session
+
+
+async def close_async_session():
+    """Close the shared `aiohttp.ClientSession` of the running event loop, if there is one."""
+    session = _async_sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None:
+        await session.close()
@@ -0,0 +1,39 @@
+import subprocess
+import sys
+import textwrap
+
+from ragaai_catalyst.stub_server import StubCatalystServer
+
+# Stops the tracer and lets the interpreter exit without waiting for the upload
+EXIT_AFTER_STOP = textwrap.dedent("""
+    import sys
+    from ragaai_catalyst import RagaAICatalyst, Tracer
+
+    RagaAICatalyst(access_key="key", secret_key="secret", base_url=sys.argv[1])
+    tracer = Tracer(
+        project_name="stub-project",
+        dataset_name="stub-dataset",
+        tracer_type="langchain",
+        pipeline={"llm_model": "gpt-4"},
+        spool_dir=sys.argv[2],
+    )
+    tracer.start()
+    with tracer._tracer_provider.get_tracer(__name__).start_as_current_span("span"):
+        pass
+    tracer.stop()
+""")
+
+
+def test_upload_finishes_when_the_program_exits_after_stop(tmp_path):
+    with StubCatalystServer() as server:
+        result = subprocess.run(
+            [sys.executable, "-c", EXIT_AFTER_STOP, server.base_url, str(tmp_path)],
+            capture_output=True,
+            text=True,
+            timeout=60,
+        )
+        counts = dict(server.request_counts)
+
+    assert result.returncode == 0, result.stderr
+    assert sum(count for key, count in counts.items() if key.startswith("PUT /_upload/")) == 1
+    assert counts.get("POST /v1/llm/insert/trace") == 1
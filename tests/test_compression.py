@@ -0,0 +1,251 @@
+import gzip
+import json
+from importlib.util import find_spec
+
+import pytest
+
+from ragaai_catalyst.tracers.exporters.file_span_exporter import FileSpanExporter
+from ragaai_catalyst.tracers.utils.compression import (
+    codec_for_path,
+    get_codec,
+    iter_trace_file,
+    open_trace_file,
+    strip_codec_suffix,
+)
+from ragaai_catalyst.tracers.utils.upload_body import TraceFileBody
+
+requires_zstd = pytest.mark.skipif(find_spec("zstandard") is None, reason="zstandard is not installed")
+
+CODECS = [None, "gzip", pytest.param("zstd", marks=requires_zstd)]
+SUFFIXES = {None: "", "gzip": ".gz", "zstd": ".zst"}
+
+RECORDS = [{"name": f"span {i}", "attributes": {"prompt": "x" * 100, "index": i}} for i in range(50)]
+
+
+def decompress(data, compression):
+    if compression == "gzip":
+        return gzip.decompress(data)
+    if compression == "zstd":
+        import zstandard
+
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    return data
+
+
+def write_records(path, records):
+    with open_trace_file(path, "wt") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+
+
+@pytest.mark.parametrize("compression", CODECS)
+def test_open_trace_file_round_trip(tmp_path, compression):
+    path = str(tmp_path / f"trace.jsonl{SUFFIXES[compression]}")
+    write_records(path, RECORDS)
+
+    with open_trace_file(path, "rt") as f:
+        assert [json.loads(line) for line in f] == RECORDS
+
+
+@pytest.mark.parametrize("compression", CODECS)
+def test_open_trace_file_append_continues_across_members(tmp_path, compression):
+    path = str(tmp_path / f"trace.jsonl{SUFFIXES[compression]}")
+    write_records(path, RECORDS[:20])
+    for record in RECORDS[20:]:
+        with open_trace_file(path, "at") as f:
+            f.write(json.dumps(record) + "\n")
+
+    with open_trace_file(path, "rb") as f:
+        assert f.read().decode().splitlines() == [json.dumps(record) for record in RECORDS]
+
+
+@pytest.mark.parametrize("compression", ["gzip", pytest.param("zstd", marks=requires_zstd)])
+def test_compressed_file_is_smaller(tmp_path, compression):
+    path = str(tmp_path / f"trace.jsonl{SUFFIXES[compression]}")
+    write_records(path, RECORDS)
+
+    raw = "".join(json.dumps(record) + "\n" for record in RECORDS).encode()
+    with open(path, "rb") as f:
+        assert len(f.read()) < len(raw)
+
+
+def test_codec_for_path_and_suffix():
+    assert codec_for_path("trace.json") is None
+    assert codec_for_path("trace.json.gz").name == "gzip"
+    assert strip_codec_suffix("trace.jsonl.gz") == "trace.jsonl"
+    assert strip_codec_suffix("trace.jsonl.zst") == "trace.jsonl"
+    assert strip_codec_suffix("trace.json") == "trace.json"
+
+
+def test_get_codec_rejects_unknown_compression():
+    assert get_codec(None) is None
+    with pytest.raises(ValueError):
+        get_codec("lzma")
+
+
+@pytest.mark.parametrize("compression", CODECS)
+def test_codec_compressor_round_trip(compression):
+    if compression is None:
+        pytest.skip("no compressor without compression")
+    compressor = get_codec(compression).compressor()
+    data = json.dumps(RECORDS).encode()
+    compressed = b"".join(compressor.compress(data[i:i + 100]) for i in range(0, len(data), 100))
+    compressed += compressor.flush()
+    assert decompress(compressed, compression) == data
+
+
+@pytest.mark.parametrize("file_compression", CODECS)
+@pytest.mark.parametrize("body_compression", CODECS)
+@pytest.mark.parametrize("chunk_size", [7, 1024 * 1024])
+def test_trace_file_body_jsonl(tmp_path, file_compression, body_compression, chunk_size):
+    path = str(tmp_path / f"trace.jsonl{SUFFIXES[file_compression]}")
+    write_records(path, RECORDS)
+
+    body = TraceFileBody(path, chunk_size=chunk_size, compression=body_compression)
+    data = b"".join(body)
+
+    assert len(body) == len(data)
+    assert body.content_encoding == (get_codec(body_compression).content_encoding if body_compression else None)
+    assert json.loads(decompress(data, body_compression)) == RECORDS
+    # The body can be sent again, e.g. on a retry
+    assert b"".join(body) == data
+
+
+@pytest.mark.parametrize("body_compression", CODECS)
+def test_trace_file_body_json_removes_newlines(tmp_path, body_compression):
+    path = str(tmp_path / "trace.json")
+    with open(path, "w") as f:
+        json.dump(RECORDS, f, indent=2)
+
+    body = TraceFileBody(path, chunk_size=64, compression=body_compression)
+    data = decompress(b"".join(body), body_compression)
+
+    assert len(body) == len(b"".join(body))
+    assert b"\n" not in data
+    assert json.loads(data) == RECORDS
+
+
+@pytest.mark.parametrize("body_compression", CODECS)
+def test_trace_file_body_async(tmp_path, body_compression):
+    import asyncio
+
+    path = str(tmp_path / "trace.jsonl")
+    write_records(path, RECORDS)
+    body = TraceFileBody(path, chunk_size=100, compression=body_compression)
+
+    async def read():
+        length = await body.alength()
+        return length, b"".join([chunk async for chunk in body])
+
+    length, data = asyncio.run(read())
+    assert length == len(data) == len(body)
+    assert data == b"".join(body)
+
+
+def test_trace_file_body_empty_jsonl(tmp_path):
+    path = str(tmp_path / "trace.jsonl")
+    open(path, "w").close()
+
+    body = TraceFileBody(path)
+    assert b"".join(body) == b"[]"
+    assert len(body) == 2
+
+
+@pytest.mark.parametrize("compression", CODECS)
+def test_iter_trace_file_reads_every_session(tmp_path, compression):
+    path = str(tmp_path / f"trace.jsonl{SUFFIXES[compression]}")
+    for start in range(0, len(RECORDS), 10):
+        write_records_appending(path, RECORDS[start:start + 10])
+
+    data = b"".join(iter_trace_file(path, chunk_size=50))
+    assert [json.loads(line) for line in data.splitlines()] == RECORDS
+
+
+@pytest.mark.parametrize("compression", ["gzip", pytest.param("zstd", marks=requires_zstd)])
+def test_iter_trace_file_reads_unfinished_file(tmp_path, compression):
+    path = str(tmp_path / f"trace.jsonl{SUFFIXES[compression]}")
+    write_records_appending(path, RECORDS[:10])
+    f = open_trace_file(path, "at")
+    for record in RECORDS[10:20]:
+        f.write(json.dumps(record) + "\n")
+        f.flush()
+    # The content of a crashed writer, which never finished its member or frame
+    with open(path, "rb") as unfinished:
+        crashed_path = str(tmp_path / f"crashed.jsonl{SUFFIXES[compression]}")
+        with open(crashed_path, "wb") as crashed:
+            crashed.write(unfinished.read())
+    f.close()
+
+    data = b"".join(iter_trace_file(crashed_path, chunk_size=50))
+    assert [json.loads(line) for line in data.splitlines()] == RECORDS[:20]
+    assert json.loads(b"".join(TraceFileBody(crashed_path))) == RECORDS[:20]
+
+
+def write_records_appending(path, records):
+    with open_trace_file(path, "at") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+
+
+def make_exporter(tmp_path, compression, storage_mode="jsonl"):
+    exporter = FileSpanExporter(
+        project_name="project",
+        metadata={"log_source": "test"},
+        pipeline={"llm_model": "gpt-4"},
+        storage_mode=storage_mode,
+        compression=compression,
+    )
+    exporter.dir_name = str(tmp_path)
+    return exporter
+
+
+def export_records(exporter, trace_id, records):
+    for record in records:
+        exporter._export_trace(trace_id, [dict(record)])
+
+
+@pytest.mark.parametrize("compression", ["gzip", pytest.param("zstd", marks=requires_zstd)])
+def test_exporter_keeps_one_compressor_per_trace_file(tmp_path, compression):
+    exporter = make_exporter(tmp_path, compression)
+    export_records(exporter, "trace", RECORDS)
+    path = exporter.filename
+
+    # Readable while the trace is still being written
+    lines = b"".join(iter_trace_file(path)).splitlines()
+    assert [json.loads(line)["traces"][0]["name"] for line in lines] == [r["name"] for r in RECORDS]
+
+    exporter.shutdown()
+    with open_trace_file(path, "rb") as f:
+        assert f.read().splitlines() == lines
+
+    # Smaller than one member or frame per export
+    member_path = str(tmp_path / f"members.jsonl{SUFFIXES[compression]}")
+    for line in lines:
+        with open_trace_file(member_path, "ab") as f:
+            f.write(line + b"\n")
+    with open(path, "rb") as shared, open(member_path, "rb") as members:
+        assert len(shared.read()) < len(members.read()) / 2
+
+
+@pytest.mark.parametrize("compression", ["gzip", pytest.param("zstd", marks=requires_zstd)])
+@pytest.mark.parametrize("storage_mode", ["json", "jsonl"])
+def test_exporter_finishes_the_file_of_the_previous_trace(tmp_path, compression, storage_mode):
+    exporter = make_exporter(tmp_path, compression, storage_mode)
+    export_records(exporter, "first", RECORDS[:5])
+    first_file = exporter.filename
+    export_records(exporter, "second", RECORDS[5:10])
+
+    assert list(exporter._writers) == [exporter.filename]
+    with open_trace_file(first_file, "rb") as f:
+        assert len(f.read().splitlines()) == 5
+    if storage_mode == "json":
+        with open_trace_file(first_file.replace(".jsonl", ".json"), "rt") as f:
+            assert len(json.load(f)) == 5
+
+    exporter.shutdown()
+    assert not exporter._writers
+
+
+def test_trace_file_body_missing_file(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        TraceFileBody(str(tmp_path / "missing.json"))
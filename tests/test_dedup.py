@@ -0,0 +1,55 @@
+import pytest
+
+from ragaai_catalyst.dedup import SIMILARITY_THRESHOLD, DedupIndex, normalize_text
+
+REVENUE = "What was the total revenue of the company in the third quarter of {} according to the report?"
+
+
+def test_normalize_text():
+    assert normalize_text("  What's the   CAPITAL of France?! ") == "whats the capital of france"
+
+
+@pytest.mark.parametrize("threshold", [None, SIMILARITY_THRESHOLD])
+def test_exact_duplicates_are_dropped(threshold):
+    index = DedupIndex(threshold=threshold)
+    assert index.add("What is the capital of France?")
+    assert not index.add("what is the capital of france")
+    assert not index.add("What is the  capital of France!")
+    assert len(index) == 1
+
+
+@pytest.mark.parametrize("paraphrase", [
+    "Tell me the capital of France.",
+    "What's the capital of France?",
+    "Please name the capital of France",
+])
+def test_paraphrase_is_dropped(paraphrase):
+    index = DedupIndex()
+    assert index.add("What is the capital of France?")
+    assert index.is_duplicate(paraphrase)
+    assert not index.add(paraphrase)
+
+
+@pytest.mark.parametrize("question, other", [
+    ("What is the capital of France?", "What is the capital of Spain?"),
+    (REVENUE.format(2021), REVENUE.format(2022)),
+    (REVENUE.format(2021), REVENUE.format(2021).replace("company", "subsidiary")),
+    ("How many employees did the company have in 2020?", "How many employees did the company have in 2020 and 2021?"),
+])
+def test_different_entity_or_number_is_kept(question, other):
+    index = DedupIndex()
+    assert index.add(question)
+    assert not index.is_duplicate(other)
+    assert index.add(other)
+    assert len(index) == 2
+
+
+def test_exact_only_keeps_paraphrases():
+    index = DedupIndex(threshold=None)
+    assert index.add("What is the capital of France?")
+    assert index.add("Tell me the capital of France.")
+
+
+def test_bands_must_divide_num_perm():
+    with pytest.raises(ValueError):
+        DedupIndex(num_perm=100, bands=30)
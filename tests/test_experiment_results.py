@@ -0,0 +1,78 @@
+import pandas as pd
+import pytest
+
+from ragaai_catalyst.experiment import Experiment
+
+COLUMNS = [
+    {"columnName": "prompt", "displayName": "prompt"},
+    {"columnName": "faithfulness", "displayName": "Faithfulness"},
+]
+
+
+def result(score):
+    return {"reason": f"score {score}", "metric_config": {"threshold": 0.5}, "status": "PASS"}
+
+
+def make_experiment(pages):
+    """An Experiment whose result pages are served from memory."""
+    experiment = Experiment.__new__(Experiment)
+    experiment.job_id = 1
+    experiment.get_status = lambda job_id: "Completed"
+    experiment._fetch_results_page = lambda page, page_size: {
+        "success": True,
+        "data": {"docs": pages[page] if page < len(pages) else [], "columns": COLUMNS},
+    }
+    return experiment
+
+
+# The first page is evaluated, the second not yet, and the third again
+PAGES = [
+    [{"prompt": "a", "faithfulness": result(1)}, {"prompt": "b", "faithfulness": result(2)}],
+    [{"prompt": "c", "faithfulness": None}, {"prompt": "d", "faithfulness": None}],
+    [{"prompt": "e", "faithfulness": result(3)}],
+]
+SPLIT_COLUMNS = ["prompt", "Faithfulness_reason", "Faithfulness_metric_config", "Faithfulness_status"]
+
+
+def test_get_all_results_splits_metric_columns_on_every_page():
+    results = make_experiment(PAGES).get_all_results(page_size=2)
+
+    assert list(results.columns) == SPLIT_COLUMNS
+    assert results["prompt"].tolist() == ["a", "b", "c", "d", "e"]
+    assert results["Faithfulness_reason"].tolist() == ["score 1", "score 2", None, None, "score 3"]
+
+
+def test_get_all_results_uses_metric_columns_of_any_page():
+    results = make_experiment(PAGES[1:]).get_all_results(page_size=2)
+
+    assert list(results.columns) == SPLIT_COLUMNS
+    assert results["Faithfulness_status"].tolist() == [None, None, "PASS"]
+
+
+def test_iter_results_pages_have_the_same_columns():
+    pages = list(make_experiment(PAGES).iter_results(page_size=2, prefetch=2))
+
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert all(list(page.columns) == SPLIT_COLUMNS for page in pages)
+
+
+def test_iter_results_as_records():
+    pages = list(make_experiment(PAGES).iter_results(page_size=2, as_records=True))
+
+    assert pages == PAGES
+
+
+def test_parse_response_detects_metric_columns_by_default():
+    response = {"data": {"docs": PAGES[0], "columns": COLUMNS}}
+    success, frame = Experiment.__new__(Experiment).parse_response(response)
+
+    assert success
+    assert list(frame.columns) == SPLIT_COLUMNS
+    pd.testing.assert_series_equal(frame["Faithfulness_status"], pd.Series(["PASS", "PASS"], name="Faithfulness_status"))
+
+
+def test_iter_results_requires_a_job():
+    experiment = make_experiment(PAGES)
+    experiment.job_id = None
+    with pytest.raises(Exception, match="run an experiment"):
+        next(experiment.iter_results())
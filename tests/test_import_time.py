@@ -0,0 +1,67 @@
+import subprocess
+import sys
+
+import pytest
+
+# Modules that must not be imported before the class that needs them is accessed
+HEAVY_MODULES = (
+    "aiohttp",
+    "google.generativeai",
+    "groq",
+    "langchain",
+    "litellm",
+    "llama_index",
+    "markdown",
+    "openai",
+    "opentelemetry",
+    "pandas",
+    "PyPDF2",
+)
+
+# The heavy modules each import is allowed to pull in
+CASES = {
+    "import ragaai_catalyst": (),
+    "from ragaai_catalyst import RagaAICatalyst": (),
+    "from ragaai_catalyst import Tracer": (
+        "aiohttp",
+        "langchain",
+        "llama_index",
+        "openai",
+        "opentelemetry",
+        "pandas",
+    ),
+    "from ragaai_catalyst import GuardrailsManager": (),
+}
+
+
+def imported_modules(statement):
+    """Run an import statement in a fresh interpreter under `-X importtime`, and return the modules it imported."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        # Optional dependencies of the class may be missing in this environment
+        pytest.skip(f"`{statement}` failed: {result.stderr.strip().splitlines()[-1]}")
+    modules = set()
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and line.count("|") == 2:
+            modules.add(line.rsplit("|", 1)[1].strip())
+    return modules
+
+
+def heavy_imports(modules, allowed):
+    """Return the heavy modules that were imported without being allowed."""
+    return sorted(
+        heavy
+        for heavy in HEAVY_MODULES
+        if heavy not in allowed and any(name == heavy or name.startswith(heavy + ".") for name in modules)
+    )
+
+
+@pytest.mark.parametrize("statement, allowed", CASES.items(), ids=list(CASES))
+def test_no_eager_heavy_imports(statement, allowed):
+    modules = imported_modules(statement)
+    assert "ragaai_catalyst" in modules
+    assert heavy_imports(modules, allowed) == []